@@ -0,0 +1,100 @@
+"""
+ベンチマーク共通ヘルパー。
+
+teams_transcript_notion_sync.config は必須の環境変数を最初に参照したときに要求するため、
+ベンチマークでは import 前にダミー値と一時ディレクトリを設定しておく。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+STUB_DIR = BENCH_DIR / "stubs"
+SRC_DIR = BENCH_DIR.parent / "src"
+
+
+def bootstrap_env(base_dir: Path, **overrides: str) -> None:
+    """一時ディレクトリを APP_BASE_DIR にして、パッケージを import できる状態にする。"""
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+    defaults = {
+        "APP_BASE_DIR": str(base_dir),
+        "ONEDRIVE_MEETINGS_DIR": str(base_dir / "meetings"),
+        "WHISPER_BIN": str(STUB_DIR / "fake_whisper.py"),
+        "WHISPER_MODEL": str(base_dir / "ggml-dummy.bin"),
+        "NOTION_TOKEN": "secret_dummy",
+        "NOTION_DATABASE_ID": "dummy",
+        "BASE_URL": "http://127.0.0.1:9/v1",
+        "MODEL": "dummy",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    for key, value in overrides.items():
+        os.environ[key] = value
+
+
+def make_test_mp4(
+    path: Path,
+    *,
+    seconds: float,
+    leading_silence: float = 30.0,
+    ffmpeg_bin: str = "ffmpeg",
+) -> Path:
+    """先頭に無音のあるステレオ 48kHz AAC の mp4 を生成する。"""
+    expr = f"if(lt(t\\,{leading_silence})\\,0\\,0.3*sin(2*PI*440*t))"
+    cmd = [
+        ffmpeg_bin,
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        f"aevalsrc={expr}|{expr}:s=48000:d={seconds}",
+        "-c:a",
+        "aac",
+        str(path),
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def make_fake_mp4(
+    path: Path,
+    *,
+    seconds: float,
+    leading_silence: float = 30.0,
+    gaps: list[tuple[float, float]] = (),
+    bytes_per_second: int = 16_000,
+) -> Path:
+    """
+    stubs/fake_ffmpeg.py が読める偽の mp4 を作る（サイズは AAC 128kbps 相当）。
+
+    gaps には会議の途中の無音を (開始秒, 長さ) で渡す。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = b"FAKEMP4\n" + json.dumps(
+        {"seconds": seconds, "leading_silence": leading_silence, "gaps": [list(g) for g in gaps]}
+    ).encode() + b"\n"
+    size = max(int(seconds * bytes_per_second), len(header))
+    with open(path, "wb") as f:
+        f.write(header)
+        # 内容ハッシュが録画ごとに変わるよう、パスを混ぜた埋め草にする
+        filler = (str(path).encode() + b"\0") * 64
+        left = size - len(header)
+        while left > 0:
+            chunk = filler[: min(left, len(filler))]
+            f.write(chunk)
+            left -= len(chunk)
+    return path
+
+
+def dir_bytes(path: Path) -> int:
+    """ディレクトリ配下のファイルサイズ合計を返す。"""
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
@@ -0,0 +1,76 @@
+"""
+音声経路のベンチマーク: 2ファイル経路 (file) vs パイプ経路 (stream)。
+
+    python benchmarks/bench_audio_path.py --minutes 30 --repeat 3
+
+file  : convert_mp4_to_wav -> remove_silence_from_wav -> transcribe_meeting
+stream: transcribe_stream（ffmpeg 1本 -> pipe -> whisper.cpp）
+
+壁時計時間と、transcripts/ に書き込まれたバイト数を比較する。
+WHISPER_BIN を指定しなければ benchmarks/stubs/fake_whisper.py を使う。
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from _common import bootstrap_env, dir_bytes, make_test_mp4
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-audio-") as tmp:
+        base = Path(tmp)
+        bootstrap_env(base)
+
+        from teams_transcript_notion_sync.audio import (
+            convert_mp4_to_wav,
+            remove_silence_from_wav,
+        )
+        from teams_transcript_notion_sync.config import FFMPEG_BIN, TRANSCRIPT_DIR
+        from teams_transcript_notion_sync.transcribe import (
+            transcribe_meeting,
+            transcribe_stream,
+        )
+
+        mp4 = make_test_mp4(
+            base / "meeting.mp4", seconds=args.minutes * 60, ffmpeg_bin=FFMPEG_BIN
+        )
+
+        def run_file() -> None:
+            wav = convert_mp4_to_wav(mp4)
+            nosilence = remove_silence_from_wav(wav)
+            transcribe_meeting(nosilence)
+
+        def run_stream() -> None:
+            transcribe_stream(mp4)
+
+        print(f"input: {mp4.stat().st_size:,} bytes, {args.minutes:g} min")
+        print(f"{'mode':<8}{'wall[s] median':>16}{'min':>10}{'bytes written':>18}")
+        for name, fn in (("file", run_file), ("stream", run_stream)):
+            times = []
+            written = 0
+            for _ in range(args.repeat):
+                shutil.rmtree(TRANSCRIPT_DIR, ignore_errors=True)
+                TRANSCRIPT_DIR.mkdir(parents=True)
+                t0 = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - t0)
+                written = dir_bytes(TRANSCRIPT_DIR)
+            print(
+                f"{name:<8}{statistics.median(times):>16.2f}{min(times):>10.2f}"
+                f"{written:>18,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+CLI の起動時間（コールドスタート）のベンチマーク。
+
+    python benchmarks/bench_cold_start.py --repeat 20
+    python benchmarks/bench_cold_start.py --commands status scan
+
+サブコマンドごとに新しいプロセスで CLI を起動し、終了までの時間（最小/中央値）、
+パッケージの import にかかった時間（-X importtime）と、その過程で import された
+重いモジュール（notion_client / openai / requests / dotenv）を表示する。
+あわせて、Notion / LLM / whisper の環境変数を消した状態でもそのサブコマンドが動くかを確認する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import SRC_DIR, bootstrap_env
+
+# 起動時間に効く外部パッケージ
+HEAVY_MODULES = ("notion_client", "openai", "httpx", "requests", "dotenv")
+# scan / status などには不要なはずの環境変数
+SECRET_ENV = ("WHISPER_BIN", "WHISPER_MODEL", "NOTION_TOKEN", "NOTION_DATABASE_ID", "BASE_URL", "MODEL")
+
+_RUN_CLI = "import sys; from teams_transcript_notion_sync.cli import main; main(sys.argv[1:])"
+
+
+def _env(drop: tuple[str, ...] = ()) -> dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k not in drop}
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SRC_DIR), os.environ.get("PYTHONPATH", "")) if p
+    )
+    return env
+
+
+def _run(command: list[str], env: dict[str, str], *extra: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *extra, "-c", _RUN_CLI, *command],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+
+def _import_times(command: list[str], env: dict[str, str]) -> dict[str, float]:
+    """-X importtime の出力から、パッケージ全体と重いモジュールの import 時間（ミリ秒、累積）を返す。"""
+    res = _run(command, env, "-X", "importtime")
+    found: dict[str, float] = {"package": 0.0}
+    for line in res.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        try:
+            ms = int(cumulative) / 1000
+        except ValueError:
+            continue
+        if name.strip() in HEAVY_MODULES:
+            found[name.strip()] = ms
+        # インデントのない行が、CLI から直接 import されたモジュール
+        elif name.startswith(" teams_transcript_notion_sync"):
+            found["package"] += ms
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--commands", nargs="+", default=["status", "scan", "flush", "--help"]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-cold-") as tmp:
+        base = Path(tmp)
+        bootstrap_env(base, NOTION_BASE_URL="http://127.0.0.1:9")
+        (base / "meetings").mkdir()
+        full_env = _env()
+        minimal_env = _env(SECRET_ENV)
+
+        # 1回目はバイトコードのコンパイルなどが入るので捨てる
+        for command in args.commands:
+            _run([command], full_env)
+
+        print(
+            f"{'command':<10}{'min[ms]':>9}{'median':>9}{'import':>9}  {'minimal env':<13}"
+            "heavy imports [ms]"
+        )
+        for command in args.commands:
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                _run([command], full_env)
+                times.append((time.perf_counter() - start) * 1000)
+
+            minimal = _run([command], minimal_env)
+            minimal_ok = "ok" if minimal.returncode == 0 else "FAILED"
+            imports = _import_times([command], full_env)
+            package_ms = imports.pop("package")
+            heavy_text = ", ".join(f"{k} {v:.1f}" for k, v in imports.items()) or "-"
+            print(
+                f"{command:<10}{min(times):>9.1f}{statistics.median(times):>9.1f}"
+                f"{package_ms:>9.1f}  {minimal_ok:<13}{heavy_text}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+エンドツーエンドのベンチマーク（外部サービスなし）。
+
+    python benchmarks/bench_e2e.py --meetings 4 --minutes 30 --cpu-jobs 2 --net-jobs 2
+    python benchmarks/bench_e2e.py --compare benchmarks/results/e2e-<前回>.json
+    python benchmarks/bench_e2e.py --lengths 180,15,15,15 --policy fifo      # 長さの違う会議
+    python benchmarks/bench_e2e.py --gaps 6 --gap-seconds 60 --silence-removal leading  # 途中の無音
+    python benchmarks/bench_e2e.py --repeat-run 20 --repeat-min-run 0      # whisper の繰り返し
+    python benchmarks/bench_e2e.py --llm-backends 3 --llm-slots 1         # LLM ゲートウェイを複数台に
+
+偽の mp4（_common.make_fake_mp4）を会議フォルダに置き、pipeline.process_new_meetings を
+そのまま実行する。外部のコマンド/サービスはすべてローカルのスタンドインに置き換える。
+
+    ffmpeg      -> stubs/fake_ffmpeg.py   (FAKE_FFMPEG_LATENCY / FAKE_FFMPEG_RTF)
+    ffprobe     -> stubs/fake_ffprobe.py
+    whisper.cpp -> stubs/fake_whisper.py  (FAKE_WHISPER_LOAD_SECONDS / FAKE_WHISPER_RTF)
+    LLM         -> stubs/fake_llm.py      (OpenAI 互換, 応答待ち時間と同時処理数を指定。--llm-backends 台)
+    Notion      -> stubs/mock_notion.py   (100件制限と 429 を再現)
+
+ステージごとの処理時間（件数/平均/p50/p95/最大）、会議ごとの完了までの時間、
+スループット、ピーク RSS、realtime factor を表示し、JSON に保存する
+（--output、既定は benchmarks/results/）。--compare に以前の JSON を渡すと主な指標の差分を表示する。
+
+ステージの処理時間は、パイプライン自身が書き出す計測ログ（METRICS_LOG）から集計する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from _common import BENCH_DIR, STUB_DIR, bootstrap_env, make_fake_mp4
+
+sys.path.insert(0, str(STUB_DIR))
+from fake_llm import start_fake_llm  # noqa: E402
+from mock_notion import start_mock_notion  # noqa: E402
+
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+def _git_revision() -> str:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCH_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=BENCH_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{rev}-dirty" if dirty else rev
+
+
+def _peak_rss_mb(who: int) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux は KiB、macOS はバイト
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _get(url: str) -> str:
+    from urllib.request import urlopen
+
+    with urlopen(url) as res:
+        return res.read().decode()
+
+
+def _summarize(values: list[float]) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values),
+        "p50": values[len(values) // 2],
+        "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+        "max": values[-1],
+    }
+
+
+def _print_report(result: dict) -> None:
+    p = result["params"]
+    if p.get("lengths"):
+        meetings = f"meetings of {p['lengths']} min"
+    else:
+        meetings = f"{p['meetings']} meetings x {p['minutes']} min"
+    print(
+        f"\n{meetings}, cpu_jobs={p['cpu_jobs']} net_jobs={p['net_jobs']} "
+        f"audio_mode={p['audio_mode']} policy={p.get('policy', 'fifo')} "
+        f"({result['revision']})"
+    )
+    print(f"{'stage':<16}{'count':>6}{'mean[s]':>10}{'p50':>9}{'p95':>9}{'max':>9}")
+    for stage, s in result["stages"].items():
+        if s["count"]:
+            print(
+                f"{stage:<16}{s['count']:>6}{s['mean']:>10.3f}{s['p50']:>9.3f}"
+                f"{s['p95']:>9.3f}{s['max']:>9.3f}"
+            )
+    m = result["meeting_latency"]
+    t = result["throughput"]
+    print(f"meeting latency p50 {m.get('p50', 0):.2f}s / max {m.get('max', 0):.2f}s")
+    r = result["realtime_factor"]
+    if r["count"]:
+        print(f"realtime factor (until transcript) mean {r['mean']:.4f} / max {r['max']:.4f}")
+    print(
+        f"wall {result['wall_seconds']:.2f}s, {t['meetings_per_hour']:.1f} meetings/h, "
+        f"{t['audio_minutes_per_minute']:.1f} audio-min/min"
+    )
+    print(
+        f"peak RSS: self {result['peak_rss_mb']['self']:.1f} MB, "
+        f"largest child {result['peak_rss_mb']['children']:.1f} MB"
+    )
+    print(
+        f"requests: LLM {result['llm']['requests']} (max concurrent {result['llm']['max_concurrent']}, "
+        f"per backend {result['llm'].get('per_backend', [result['llm']['requests']])}), "
+        f"Notion {result['notion']['total_requests']} (429: {result['notion']['rate_limited']})"
+    )
+    t = result["totals"]
+    print(
+        f"LLM tokens: prompt {t['llm_prompt_tokens']:.0f} / completion {t['llm_completion_tokens']:.0f}, "
+        f"Notion blocks {t['notion_blocks']:.0f}, retries {t['retries']:.0f}"
+    )
+    print(
+        f"silence removed {t.get('silence_removed_seconds', 0):.0f}s "
+        f"(silence_removal={p.get('silence_removal', 'leading')}), "
+        f"whisper time saved ~{t.get('whisper_seconds_saved', 0):.1f}s"
+    )
+    print(
+        f"repetitions removed: {t.get('repeat_lines_removed', 0):.0f} line(s), "
+        f"{t.get('repeat_chars_removed', 0):.0f} chars"
+    )
+
+
+def _print_comparison(old: dict, new: dict) -> None:
+    rows = [("wall_seconds", old["wall_seconds"], new["wall_seconds"])]
+    rows += [
+        (f"throughput.{k}", old["throughput"][k], new["throughput"][k])
+        for k in ("meetings_per_hour", "audio_minutes_per_minute")
+    ]
+    rows += [
+        (f"meeting_latency.{k}", old["meeting_latency"][k], new["meeting_latency"][k])
+        for k in ("p50", "max")
+        if k in old["meeting_latency"] and k in new["meeting_latency"]
+    ]
+    rows += [
+        (f"peak_rss_mb.{k}", old["peak_rss_mb"][k], new["peak_rss_mb"][k])
+        for k in ("self", "children")
+    ]
+    for stage in new["stages"]:
+        if old["stages"].get(stage, {}).get("count") and new["stages"][stage]["count"]:
+            rows.append(
+                (f"{stage}.mean", old["stages"][stage]["mean"], new["stages"][stage]["mean"])
+            )
+    print(f"\ncompared with {old['revision']} ({old['timestamp']})")
+    print(f"{'metric':<34}{'before':>12}{'after':>12}{'change':>9}")
+    for name, before, after in rows:
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<34}{before:>12.3f}{after:>12.3f}{change:>+8.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--meetings", type=int, default=4)
+    parser.add_argument("--minutes", type=float, default=30.0, help="1会議あたりの長さ（分）")
+    parser.add_argument(
+        "--lengths",
+        help="会議ごとの長さ（分）をカンマ区切りで指定する（--meetings / --minutes より優先）",
+    )
+    parser.add_argument(
+        "--policy",
+        choices=["fifo", "shortest", "newest", "priority"],
+        default="shortest",
+        help="SCHEDULE_POLICY",
+    )
+    parser.add_argument("--leading-silence", type=float, default=30.0)
+    parser.add_argument("--gaps", type=int, default=0, help="1会議あたりの途中の無音の数（等間隔に置く）")
+    parser.add_argument("--gap-seconds", type=float, default=60.0, help="途中の無音1つの長さ（秒）")
+    parser.add_argument("--silence-removal", choices=["vad", "leading"], default="vad")
+    parser.add_argument(
+        "--repeat-run", type=int, default=0, help="whisper が10発話ごとに繰り返す決まり文句の行数"
+    )
+    parser.add_argument(
+        "--repeat-min-run", type=int, default=3, help="TRANSCRIPT_REPEAT_MIN_RUN"
+    )
+    parser.add_argument("--cpu-jobs", type=int, default=2)
+    parser.add_argument("--net-jobs", type=int, default=2)
+    parser.add_argument("--audio-mode", choices=["stream", "file"], default="stream")
+    parser.add_argument("--whisper-rtf", type=float, default=0.002)
+    parser.add_argument("--whisper-load", type=float, default=0.2)
+    parser.add_argument("--ffmpeg-rtf", type=float, default=0.0005)
+    parser.add_argument("--ffmpeg-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-per-1k-chars", type=float, default=0.01)
+    parser.add_argument("--llm-backends", type=int, default=1, help="LLM ゲートウェイの台数（LLM_BACKENDS）")
+    parser.add_argument("--llm-slots", type=int, default=0, help="1台が同時に処理できる件数（0 で無制限）")
+    parser.add_argument("--notion-rate", type=float, default=3.0, help="モック Notion のレート制限 (req/s)")
+    parser.add_argument("--output", type=Path, help="結果の JSON (default: benchmarks/results/e2e-<rev>-<時刻>.json)")
+    parser.add_argument("--compare", type=Path, help="比較する以前の結果 JSON")
+    args = parser.parse_args()
+    if args.lengths:
+        lengths = [float(m) for m in args.lengths.split(",")]
+    else:
+        lengths = [args.minutes] * args.meetings
+
+    notion_server, notion_url = start_mock_notion(rate=args.notion_rate)
+    llm_servers = [
+        start_fake_llm(
+            latency=args.llm_latency, per_1k_chars=args.llm_per_1k_chars, slots=args.llm_slots
+        )
+        for _ in range(args.llm_backends)
+    ]
+    llm_urls = [f"{url}/v1" for _, url in llm_servers]
+
+    with tempfile.TemporaryDirectory(prefix="bench-e2e-") as tmp:
+        base = Path(tmp)
+        bootstrap_env(
+            base,
+            FFMPEG_BIN=str(STUB_DIR / "fake_ffmpeg.py"),
+            FFPROBE_BIN=str(STUB_DIR / "fake_ffprobe.py"),
+            SCHEDULE_POLICY=args.policy,
+            WHISPER_BIN=str(STUB_DIR / "fake_whisper.py"),
+            BASE_URL=llm_urls[0],
+            LLM_BACKENDS=",".join(llm_urls),
+            NOTION_BASE_URL=notion_url,
+            NOTION_RATE_LIMIT=str(args.notion_rate),
+            AUDIO_MODE=args.audio_mode,
+            SILENCE_REMOVAL=args.silence_removal,
+            TRANSCRIPT_REPEAT_MIN_RUN=str(args.repeat_min_run),
+            WHISPER_BACKEND="subprocess",
+            FILE_STABLE_SECONDS="0",
+            FAKE_WHISPER_RTF=str(args.whisper_rtf),
+            FAKE_WHISPER_LOAD_SECONDS=str(args.whisper_load),
+            FAKE_WHISPER_REPEAT_RUN=str(args.repeat_run),
+            FAKE_FFMPEG_RTF=str(args.ffmpeg_rtf),
+            FAKE_FFMPEG_LATENCY=str(args.ffmpeg_latency),
+        )
+        meetings_dir = Path(os.environ["ONEDRIVE_MEETINGS_DIR"])
+        for i, minutes in enumerate(lengths):
+            seconds = minutes * 60
+            step = (seconds - args.leading_silence) / (args.gaps + 1)
+            make_fake_mp4(
+                meetings_dir / f"meeting-{i:03d}.mp4",
+                seconds=seconds,
+                leading_silence=args.leading_silence,
+                gaps=[
+                    (args.leading_silence + step * (k + 1), args.gap_seconds)
+                    for k in range(args.gaps)
+                ],
+            )
+
+        from teams_transcript_notion_sync import pipeline
+        from teams_transcript_notion_sync.config import METRICS_LOG, PROCESSED_DB
+        from teams_transcript_notion_sync.db import count_by_status
+
+        start = time.time()
+        pipeline.process_new_meetings(cpu_jobs=args.cpu_jobs, net_jobs=args.net_jobs)
+        wall = time.time() - start
+
+        events = [json.loads(line) for line in METRICS_LOG.read_text().splitlines()]
+        statuses = count_by_status(PROCESSED_DB)
+
+    records = [e for e in events if e["event"] == "stage"]
+    stage_names = ["wav", "nosilence", "transcript", "summary", "notion", "notion_upload"]
+    stages = {
+        stage: _summarize([r["duration"] for r in records if r["stage"] == stage])
+        for stage in stage_names
+    }
+    finished = {}
+    for r in records:
+        if r["stage"] == "notion_upload" and r["status"] == "ok":
+            finished[r["path"]] = r["time"] - start
+    totals = {
+        key: sum(r.get(key, 0) for r in records)
+        for key in (
+            "llm_prompt_tokens",
+            "llm_completion_tokens",
+            "notion_blocks",
+            "retries",
+            "silence_removed_seconds",
+            "whisper_seconds_saved",
+            "repeat_lines_removed",
+            "repeat_chars_removed",
+        )
+    }
+
+    llm_stats = [json.loads(_get(f"{url}/__stats")) for _, url in llm_servers]
+    audio_minutes = sum(lengths)
+    result = {
+        "revision": _git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "wall_seconds": wall,
+        "statuses": statuses,
+        "stages": stages,
+        "meeting_latency": _summarize(list(finished.values())),
+        "realtime_factor": _summarize(
+            [e["realtime_factor"] for e in events if e["event"] == "realtime_factor"]
+        ),
+        "totals": totals,
+        "throughput": {
+            "meetings_per_hour": len(finished) / wall * 3600,
+            "audio_minutes_per_minute": audio_minutes / (wall / 60),
+        },
+        "peak_rss_mb": {
+            "self": _peak_rss_mb(resource.RUSAGE_SELF),
+            "children": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        },
+        "llm": {
+            "requests": sum(s["requests"] for s in llm_stats),
+            "max_concurrent": max(s["max_concurrent"] for s in llm_stats),
+            "per_backend": [s["requests"] for s in llm_stats],
+        },
+        "notion": json.loads(_get(f"{notion_url}/__stats")),
+    }
+    notion_server.shutdown()
+    for llm_server, _ in llm_servers:
+        llm_server.shutdown()
+
+    _print_report(result)
+
+    output = args.output or RESULTS_DIR / (
+        f"e2e-{result['revision']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"saved: {output}")
+
+    if args.compare:
+        _print_comparison(json.loads(args.compare.read_text()), result)
+
+
+if __name__ == "__main__":
+    main()
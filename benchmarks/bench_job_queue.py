@@ -0,0 +1,153 @@
+"""
+ジョブキュー（job_queue）で複数ワーカーに分担させるベンチマーク（外部サービスなし）。
+
+    python benchmarks/bench_job_queue.py --meetings 8 --workers 1 2 4
+    python benchmarks/bench_job_queue.py --workers 3 --kill-after 2   # 1つのワーカーを強制終了
+
+偽の mp4 を置いて `enqueue` を1回実行し、`worker --drain` を別々のプロセスとして workers 個
+起動して、キューが空になるまでの時間を測る（ffmpeg / whisper.cpp / LLM / Notion は
+bench_e2e.py と同じスタンドイン）。--kill-after を指定すると、その秒数後に最初のワーカーを
+SIGKILL し、リースが切れたジョブが他のワーカーに引き継がれることを確認する。
+
+どの場合も、すべてのジョブが done になり、Notion のページ数が会議数と等しく、
+同じ会議を2回文字起こししていないこと（計測ログの transcript ステージが1会議1回）を確認する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+from _common import SRC_DIR, STUB_DIR, bootstrap_env, make_fake_mp4
+
+sys.path.insert(0, str(STUB_DIR))
+from fake_llm import start_fake_llm  # noqa: E402
+from mock_notion import start_mock_notion  # noqa: E402
+
+
+def _cli(*args: str) -> list[str]:
+    return [sys.executable, "-c", "from teams_transcript_notion_sync.cli import main; main()", *args]
+
+
+def _stats(url: str) -> dict:
+    with urllib.request.urlopen(f"{url}/__stats") as res:
+        return json.load(res)
+
+
+def _run(n_workers: int, args: argparse.Namespace) -> dict:
+    notion_server, notion_url = start_mock_notion(rate=args.notion_rate)
+    llm_server, llm_url = start_fake_llm(latency=args.llm_latency)
+    with tempfile.TemporaryDirectory(prefix="bench-job-queue-") as tmp:
+        base = Path(tmp)
+        bootstrap_env(
+            base,
+            APP_BASE_DIR=str(base),
+            ONEDRIVE_MEETINGS_DIR=str(base / "meetings"),
+            FFMPEG_BIN=str(STUB_DIR / "fake_ffmpeg.py"),
+            FFPROBE_BIN=str(STUB_DIR / "fake_ffprobe.py"),
+            WHISPER_BIN=str(STUB_DIR / "fake_whisper.py"),
+            WHISPER_BACKEND="subprocess",
+            BASE_URL=f"{llm_url}/v1",
+            NOTION_BASE_URL=notion_url,
+            NOTION_RATE_LIMIT=str(args.notion_rate),
+            NOTION_OUTBOX_INTERVAL="0.5",
+            FILE_STABLE_SECONDS="0",
+            FAKE_WHISPER_RTF=str(args.whisper_rtf),
+            FAKE_WHISPER_LOAD_SECONDS=str(args.whisper_load),
+            JOB_LEASE_SECONDS=str(args.lease),
+            JOB_POLL_INTERVAL="0.2",
+        )
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (str(SRC_DIR), os.environ.get("PYTHONPATH")) if p
+        )
+        for i in range(args.meetings):
+            make_fake_mp4(base / "meetings" / f"meeting-{i:03d}.mp4", seconds=args.minutes * 60)
+
+        subprocess.run(_cli("enqueue"), env=env, check=True, capture_output=True)
+
+        start = time.perf_counter()
+        logs = [open(base / f"worker-{i}.log", "w") for i in range(n_workers)]
+        workers = [
+            subprocess.Popen(
+                _cli("worker", "--drain"), env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+            for log in logs
+        ]
+        if args.kill_after is not None:
+            time.sleep(args.kill_after)
+            workers[0].send_signal(signal.SIGKILL)
+        for p in workers:
+            p.wait()
+        elapsed = time.perf_counter() - start
+        for log in logs:
+            log.close()
+
+        conn = sqlite3.connect(base / "data" / "processed_files.sqlite3")
+        jobs = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        retried = conn.execute("SELECT COUNT(*) FROM jobs WHERE attempts > 1").fetchone()[0]
+        conn.close()
+        events = [
+            json.loads(line) for line in (base / "data" / "metrics.jsonl").read_text().splitlines()
+        ]
+        transcribed = Counter(
+            e["path"]
+            for e in events
+            if e["event"] == "stage" and e["stage"] == "transcript" and e["status"] == "ok"
+        )
+        result = {
+            "workers": n_workers,
+            "elapsed": elapsed,
+            "jobs": jobs,
+            "retried": retried,
+            "transcribed_twice": sum(1 for n in transcribed.values() if n > 1),
+            "notion_pages": _stats(notion_url)["pages"],
+            "llm_requests": _stats(llm_url)["requests"],
+        }
+    notion_server.shutdown()
+    llm_server.shutdown()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meetings", type=int, default=8)
+    parser.add_argument("--minutes", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--whisper-rtf", type=float, default=0.002)
+    parser.add_argument("--whisper-load", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--notion-rate", type=float, default=10.0)
+    parser.add_argument("--lease", type=float, default=3.0, help="JOB_LEASE_SECONDS")
+    parser.add_argument("--kill-after", type=float, help="この秒数後に最初のワーカーを SIGKILL する")
+    args = parser.parse_args()
+
+    print(
+        f"{'workers':>7}{'elapsed[s]':>11}{'speedup':>9}{'meetings/min':>14}"
+        f"  {'jobs':<22}{'retried':>8}{'twice':>6}{'pages':>6}{'LLM req':>8}"
+    )
+    baseline = None
+    for n in args.workers:
+        r = _run(n, args)
+        # 最初の行（既定は1ワーカー）との比
+        baseline = baseline or r["elapsed"]
+        jobs = ", ".join(f"{k} {v}" for k, v in sorted(r["jobs"].items()))
+        print(
+            f"{n:>7}{r['elapsed']:>11.2f}{baseline / r['elapsed']:>8.1f}x"
+            f"{args.meetings / r['elapsed'] * 60:>14.1f}  {jobs:<22}{r['retried']:>8}"
+            f"{r['transcribed_twice']:>6}{r['notion_pages']:>6}{r['llm_requests']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
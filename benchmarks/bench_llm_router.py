@@ -0,0 +1,99 @@
+"""
+LLM ルーター（llm_router.Router）のベンチマーク（ローカルの OpenAI 互換スタブを使用）。
+
+    python benchmarks/bench_llm_router.py --backends 3 --requests 60 --threads 12
+
+同時に処理できる件数が slots 件のゲートウェイ（stubs/fake_llm.py）を何台か起動し、
+threads 本のスレッドから合計 requests 件の要約リクエストを送って、
+
+    single : 1台だけ（従来の BASE_URL 1つの構成）
+    pooled : 全台に振り分け
+    slow   : 1台だけ応答が slow-factor 倍遅い（遅い台に送る件数が減ることを確認）
+    down   : 1台が 503 を返し続ける（別の台に切り替わり、リクエストが失敗しないことを確認）
+
+の所要時間・スループット・台ごとの件数と失敗数を表示する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from _common import bootstrap_env
+from stubs.fake_llm import start_fake_llm
+
+
+def _stats(url: str) -> dict:
+    with urllib.request.urlopen(f"{url}/__stats") as res:
+        return json.load(res)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=12, help="同時に要約する数（会議数 × 並列度）")
+    parser.add_argument("--latency", type=float, default=0.2, help="1リクエストの処理時間（秒）")
+    parser.add_argument("--slots", type=int, default=2, help="1台が同時に処理できる件数")
+    parser.add_argument("--max-inflight", type=int, default=2, help="LLM_BACKEND_MAX_INFLIGHT")
+    parser.add_argument("--slow-factor", type=float, default=4.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-llm-router-") as tmp:
+        bootstrap_env(Path(tmp))
+        from teams_transcript_notion_sync.llm_router import Router
+
+        scenarios = {
+            "single": [{}],
+            "pooled": [{}] * args.backends,
+            "slow": [{"latency": args.latency * args.slow_factor}] + [{}] * (args.backends - 1),
+            "down": [{"fail_status": 503}] + [{}] * (args.backends - 1),
+        }
+        print(
+            f"{'scenario':<8}{'backends':>9}{'elapsed[s]':>11}{'req/s':>8}{'failed':>7}"
+            f"  per backend (requests/errors)"
+        )
+        for name, options in scenarios.items():
+            servers = [
+                start_fake_llm(**{"latency": args.latency, "slots": args.slots, **o})
+                for o in options
+            ]
+            urls = [url for _, url in servers]
+            router = Router(
+                [f"{url}/v1" for url in urls], max_inflight=args.max_inflight, cooldown=5.0
+            )
+
+            def call(i: int) -> bool:
+                try:
+                    router.chat(
+                        model="dummy",
+                        messages=[{"role": "user", "content": f"要約してください {i}"}],
+                    )
+                    return True
+                except Exception:
+                    return False
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                results = list(pool.map(call, range(args.requests)))
+            elapsed = time.perf_counter() - start
+
+            per_backend = []
+            for url in urls:
+                s = _stats(url)
+                per_backend.append(f"{s['requests']}/{s['failed']}")
+            print(
+                f"{name:<8}{len(urls):>9}{elapsed:>11.2f}{args.requests / elapsed:>8.1f}"
+                f"{results.count(False):>7}  {'  '.join(per_backend)}"
+            )
+            for server, _ in servers:
+                server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
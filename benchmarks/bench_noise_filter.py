@@ -0,0 +1,115 @@
+"""
+発話者ラベルのノイズ除去のマイクロベンチマーク。
+
+    python benchmarks/bench_noise_filter.py --hours 1 4 8 --label-ratio 0.05
+
+数時間分の合成文字起こし（一部の行に「名前:」ラベル付き）について、
+従来の実装（全文を行リストにして2段階の正規表現で判定）と、
+remove_speaker_label_noise（文字列）/ filter_file（ファイル -> ファイル）の
+処理時間・1行あたりの時間・ピークメモリ（tracemalloc）を比較し、出力が同じことを確認する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from _common import bootstrap_env
+from bench_notion_upload import synthetic_transcript
+
+_LABELS = ["おだしょー", "りなたむ", "吉田", "Tanaka"]
+
+
+def labeled_transcript(hours: float, label_ratio: float, seed: int = 0) -> str:
+    """synthetic_transcript の一部の行に発話者ラベルを混ぜる。"""
+    rng = random.Random(seed)
+    lines = []
+    for line in synthetic_transcript(hours * 60, 3.0).splitlines():
+        if rng.random() < label_ratio:
+            prefix, _, text = line.partition("]  ")
+            line = f"{prefix}]  {rng.choice(_LABELS)}:{text}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> tuple[float, int, object]:
+    """(最速の処理時間, ピークメモリ, 結果) を返す。時間は tracemalloc なしで測る。"""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--label-ratio", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-noise-") as tmp:
+        tmp_dir = Path(tmp)
+        bootstrap_env(tmp_dir)
+        from teams_transcript_notion_sync import noise_filter as nf
+
+        def legacy(text: str) -> str:
+            # 変更前の remove_speaker_label_noise と同じ処理
+            cleaned_lines = []
+            for line in text.splitlines():
+                m_ts = nf._TIMESTAMP_PREFIX_RE.match(line)
+                if m_ts:
+                    prefix, rest = m_ts.group(1), m_ts.group(2).lstrip()
+                    m_label = nf._SPEAKER_LABEL_RE.match(rest)
+                    if m_label:
+                        line = prefix + m_label.group("utterance")
+                else:
+                    rest = line.lstrip()
+                    m_label = nf._SPEAKER_LABEL_RE.match(rest)
+                    if m_label:
+                        line = line[: len(line) - len(rest)] + m_label.group("utterance")
+                cleaned_lines.append(line)
+            result = "\n".join(cleaned_lines)
+            if text.endswith("\n"):
+                result += "\n"
+            return result
+
+        print(
+            f"{'hours':>6}{'lines':>9}{'MB':>7}  {'mode':<8}"
+            f"{'seconds':>9}{'us/line':>9}{'peak MB':>9}  same"
+        )
+        for hours in args.hours:
+            text = labeled_transcript(hours, args.label_ratio)
+            n_lines = text.count("\n")
+            src = tmp_dir / f"transcript-{hours:g}h.txt"
+            src.write_text(text)
+            expected = legacy(text)
+
+            modes = {
+                "legacy": lambda: legacy(src.read_text()),
+                "string": lambda: nf.remove_speaker_label_noise(src.read_text()),
+                "file": lambda: nf.filter_file(src, tmp_dir / "out.txt"),
+            }
+            for name, fn in modes.items():
+                elapsed, peak, result = _measure(fn, args.repeat)
+                if name == "file":
+                    result = (tmp_dir / "out.txt").read_text()
+                print(
+                    f"{hours:>6g}{n_lines:>9,}{len(text.encode()) / 1e6:>7.1f}  {name:<8}"
+                    f"{elapsed:>9.3f}{elapsed / n_lines * 1e6:>9.2f}{peak / 1e6:>9.2f}"
+                    f"  {'yes' if result == expected else 'NO'}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Notion ブロック詰め込みのベンチマーク（ネットワーク通信なし）。
+
+    python benchmarks/bench_notion_packing.py --minutes 30 90 180
+
+サンプルの文字起こしについて、従来の 1800 文字ごとの段落分割と、
+pack_transcript_blocks（flat / heading / toggle）とで、
+ブロック数・リクエスト数（pages.create + blocks.children.append）・送信バイト数を比較する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from _common import bootstrap_env
+from bench_notion_upload import synthetic_transcript
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[30, 90, 180])
+    parser.add_argument("--seconds-per-line", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-packing-") as tmp:
+        bootstrap_env(Path(tmp))
+        from teams_transcript_notion_sync import notion_writer as nw
+
+        def legacy(text: str) -> list[dict]:
+            return [
+                {"object": "block", "paragraph": {"rich_text": [nw._rich_text(c)]}}
+                for c in nw._chunk(text)
+            ]
+
+        modes = {
+            "legacy": legacy,
+            "flat": lambda t: nw.pack_transcript_blocks(t, layout="flat"),
+            "heading": lambda t: nw.pack_transcript_blocks(t, layout="heading"),
+            "toggle": lambda t: nw.pack_transcript_blocks(t, layout="toggle"),
+        }
+
+        print(f"{'minutes':>8}{'chars':>10}  {'mode':<8}{'blocks':>8}{'requests':>10}{'bytes':>12}")
+        for minutes in args.minutes:
+            text = synthetic_transcript(minutes, args.seconds_per_line)
+            for name, build in modes.items():
+                blocks = build(text)
+                batches = list(nw.iter_batches(blocks))
+                sent = sum(nw.payload_bytes(b) for b in batches)
+                print(
+                    f"{minutes:>8g}{len(text):>10,}  {name:<8}{len(blocks):>8}"
+                    f"{len(batches):>10}{sent:>12,}"
+                )
+
+
+if __name__ == "__main__":
+    main()
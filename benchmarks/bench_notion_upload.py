@@ -0,0 +1,75 @@
+"""
+Notion アップロードのベンチマーク（ローカルのモック Notion サーバーを使用）。
+
+    python benchmarks/bench_notion_upload.py --minutes 90 --rate 3
+
+長い文字起こしで create_meeting_page を実行し、リクエスト数・送信バイト数・
+429 の回数・所要時間を表示する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from _common import bootstrap_env
+from stubs.mock_notion import start_mock_notion
+
+SUMMARY = "| トピック | 内容 |\n|---|---|\n| 会話の内容 | テスト |\n| 決定事項 | なし |\n"
+
+
+def synthetic_transcript(minutes: float, seconds_per_line: float = 4.0) -> str:
+    lines = []
+    t = 0.0
+    n = 0
+    while t < minutes * 60:
+        n += 1
+        s, e = t, t + seconds_per_line
+        lines.append(
+            f"[{int(s // 3600):02d}:{int(s % 3600 // 60):02d}:{s % 60:06.3f} --> "
+            f"{int(e // 3600):02d}:{int(e % 3600 // 60):02d}:{e % 60:06.3f}]  "
+            f"これはベンチマーク用の発話です。議題{n % 7}について確認します。"
+        )
+        t = e
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=90.0)
+    parser.add_argument("--rate", type=float, default=3.0, help="モック側のレート制限 (req/s)")
+    args = parser.parse_args()
+
+    server, url = start_mock_notion(rate=args.rate)
+    with tempfile.TemporaryDirectory(prefix="bench-notion-") as tmp:
+        bootstrap_env(Path(tmp), NOTION_BASE_URL=url)
+        from teams_transcript_notion_sync.notion_writer import create_meeting_page
+
+        transcript = synthetic_transcript(args.minutes)
+        t0 = time.perf_counter()
+        create_meeting_page(
+            title="benchmark",
+            date=None,
+            teams_url=None,
+            summary_text=SUMMARY,
+            transcript_text=transcript,
+        )
+        elapsed = time.perf_counter() - t0
+
+    stats = json.load(urllib.request.urlopen(f"{url}/__stats"))
+    server.shutdown()
+
+    print(f"transcript chars : {len(transcript):,}")
+    print(f"elapsed          : {elapsed:.2f}s")
+    print(f"requests         : {stats['total_requests']} {stats['requests']}")
+    print(f"bytes sent       : {stats['bytes_received']:,}")
+    print(f"429 responses    : {stats['rate_limited']}")
+    print(f"blocks created   : {stats['blocks']}")
+
+
+if __name__ == "__main__":
+    main()
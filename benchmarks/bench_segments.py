@@ -0,0 +1,198 @@
+"""
+文字起こしの読み込み・分割のマイクロベンチマーク。
+
+    python benchmarks/bench_segments.py --hours 1 4 8
+
+数時間分の合成文字起こしについて、従来の文字列の経路（行のリストにして1行ずつ
+parse_line する / whisper の JSON を tuple のリストにする）と、segments.Transcript
+（1つの文字列 + 行ごとのオフセットと時刻の array）とで、
+
+    parse  : txt の読み込みと行ごとの時刻の解析
+    json   : whisper.cpp の -oj 出力の読み込み
+    chunks : 要約用のチャンク分割（split_transcript）
+    notion : 時間帯ごとの Notion ブロックへの詰め込み（layout=heading）
+    lookup : 時間帯（10分）ごとの行の検索
+
+の処理時間と、読み込んだ結果が保持するメモリ（tracemalloc）を比較し、結果が同じことを確認する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from _common import bootstrap_env
+from bench_notion_upload import synthetic_transcript
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> tuple[float, int, object]:
+    """(最速の処理時間, 結果が保持するメモリ, 結果) を返す。時間は tracemalloc なしで測る。"""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    del result
+    tracemalloc.start()
+    result = fn()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, retained, result
+
+
+def _whisper_json(text: str, parse_line: Callable) -> str:
+    """合成文字起こしと同じ内容の whisper.cpp -oj 出力。"""
+    transcription = []
+    for line in text.splitlines():
+        start, end, utterance = parse_line(line)
+        transcription.append(
+            {"offsets": {"from": int(start * 1000), "to": int(end * 1000)}, "text": f" {utterance}"}
+        )
+    return json.dumps({"transcription": transcription}, ensure_ascii=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--seconds-per-line", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-segments-") as tmp:
+        tmp_dir = Path(tmp)
+        bootstrap_env(tmp_dir)
+        from teams_transcript_notion_sync import notion_writer as nw
+        from teams_transcript_notion_sync.segments import Transcript
+        from teams_transcript_notion_sync.summarizer import estimate_tokens, split_transcript
+        from teams_transcript_notion_sync.timestamps import format_line, parse_line
+
+        # ===== 変更前の実装（文字列の経路） =====
+
+        def legacy_parse(text: str) -> list:
+            return [(line, parse_line(line)) for line in text.splitlines()]
+
+        def legacy_json(json_path: Path) -> tuple[list, str]:
+            # セグメントを tuple のリストに読み、txt の本文を組み立てる
+            data = json.loads(json_path.read_text())
+            segments = [
+                (seg["offsets"]["from"] / 1000, seg["offsets"]["to"] / 1000, seg["text"].strip())
+                for seg in data["transcription"]
+                if seg["text"].strip()
+            ]
+            return segments, "".join(format_line(s, e, t) + "\n" for s, e, t in segments)
+
+        def legacy_chunks(text: str, max_tokens: int = 12000) -> list[str]:
+            chunks, current, current_tokens = [], [], 0
+            for line in text.splitlines(keepends=True):
+                line_tokens = estimate_tokens(line)
+                if current and current_tokens + line_tokens > max_tokens:
+                    chunks.append("".join(current))
+                    current, current_tokens = [], 0
+                current.append(line)
+                current_tokens += line_tokens
+            if current:
+                chunks.append("".join(current))
+            return chunks
+
+        def legacy_notion(text: str, group_seconds: float = 600, segment_chars: int = 1800) -> list:
+            groups: list = []
+            for line in text.splitlines():
+                parsed = parse_line(line)
+                if parsed is not None:
+                    bucket = parsed[0] // group_seconds * group_seconds
+                    if not groups or groups[-1][0] != bucket:
+                        groups.append((bucket, []))
+                groups[-1][1].append(line)
+            packed = []
+            for _, lines in groups:
+                segments, current = [], ""
+                for line in lines:
+                    line += "\n"
+                    if current and len(current) + len(line) > segment_chars:
+                        segments.append(current)
+                        current = ""
+                    current += line
+                segments.append(current)
+                packed.append(segments)
+            return packed
+
+        def legacy_lookup(parsed: list, hours: float) -> list[int]:
+            return [
+                sum(1 for _, p in parsed if p and t <= p[0] < t + 600)
+                for t in range(0, int(hours * 3600), 600)
+            ]
+
+        # ===== Transcript =====
+
+        def segments_notion(transcript: Transcript) -> list:
+            return [
+                transcript.pack(first, last, 1800)
+                for _, first, last in nw._group_by_time(transcript, 600)
+            ]
+
+        def segments_lookup(transcript: Transcript, hours: float) -> list[int]:
+            return [
+                len(transcript.between(t, t + 600)) for t in range(0, int(hours * 3600), 600)
+            ]
+
+        print(
+            f"{'hours':>6}{'lines':>9}{'MB':>7}  {'step':<8}"
+            f"{'legacy[s]':>10}{'segments':>10}{'speedup':>9}"
+            f"{'legacy MB':>11}{'segments':>10}  same"
+        )
+        for hours in args.hours:
+            text = synthetic_transcript(hours * 60, args.seconds_per_line)
+            n_lines = text.count("\n")
+            txt_path = tmp_dir / f"transcript-{hours:g}h.txt"
+            txt_path.write_text(text)
+            json_path = tmp_dir / f"transcript-{hours:g}h.json"
+            json_path.write_text(_whisper_json(text, parse_line))
+
+            parsed = legacy_parse(text)
+            transcript = Transcript(text)
+            steps = {
+                "parse": (
+                    lambda: legacy_parse(txt_path.read_text()),
+                    # 時刻は最初に使うときに解析されるので、duration まで含めて測る
+                    lambda: (t := Transcript.load(txt_path), t.duration)[0],
+                    lambda a, b: [p for _, p in a] == [tuple(s) for s in b],
+                ),
+                "json": (
+                    lambda: legacy_json(json_path),
+                    lambda: Transcript.from_whisper_json(json_path),
+                    lambda a, b: a == ([(s.start, s.end, s.text) for s in b], b.text),
+                ),
+                "chunks": (
+                    lambda: legacy_chunks(text),
+                    lambda: split_transcript(text),
+                    lambda a, b: a == b,
+                ),
+                "notion": (
+                    lambda: legacy_notion(text),
+                    lambda: segments_notion(Transcript(text)),
+                    lambda a, b: a == b,
+                ),
+                "lookup": (
+                    lambda: legacy_lookup(parsed, hours),
+                    lambda: segments_lookup(transcript, hours),
+                    lambda a, b: a == b,
+                ),
+            }
+            for step, (legacy, new, same) in steps.items():
+                legacy_s, legacy_mem, legacy_result = _measure(legacy, args.repeat)
+                new_s, new_mem, new_result = _measure(new, args.repeat)
+                same_text = "yes" if same(legacy_result, new_result) else "NO"
+                print(
+                    f"{hours:>6g}{n_lines:>9,}{len(text.encode()) / 1e6:>7.1f}  {step:<8}"
+                    f"{legacy_s:>10.3f}{new_s:>10.3f}{legacy_s / new_s:>8.1f}x"
+                    f"{legacy_mem / 1e6:>11.2f}{new_mem / 1e6:>10.2f}  {same_text}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+ffmpeg のスタンドイン。
+
+ベンチマーク用に、audio.py が使う呼び出し（-i INPUT [-af FILTER] ... OUTPUT、OUTPUT が "-" なら stdout）
+を受け付け、16kHz / mono / s16le の WAV を書き出す。
+
+入力:
+    - _common.make_fake_mp4 が作る偽の mp4（先頭行 "FAKEMP4" + JSON で長さと先頭の無音を持つ）
+    - このスタブが書き出した WAV（無音は 0 のサンプルで表される）
+
+-af / 出力に応じて次のフィルタを模す（音声は無音 = 0 のサンプルと矩形波だけでできている）。
+    silenceremove: 先頭の無音を取り除く
+    aselect      : silence.py の select_filter が作る gte(t,a)*lt(t,b) の区間（10ms 単位）だけを残す
+    silencedetect: 出力が "-f null -" なら何も書かず、d 秒以上の無音を stderr に報告する
+
+環境変数:
+    FAKE_FFMPEG_LATENCY: 起動ごとの固定の待ち時間（秒）
+    FAKE_FFMPEG_RTF: 入力音声1秒あたりの処理時間（realtime factor）
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import struct
+import sys
+import time
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+FAKE_MP4_MAGIC = b"FAKEMP4\n"
+# 無音でない区間のサンプル（+4096 / -4096 の矩形波）
+_TONE = b"\x00\x10\x00\xf0"
+_CHUNK = BYTES_PER_SECOND
+# 10ms 分のバイト数（無音/音声の区間はこの単位で扱う）
+_FRAME = BYTES_PER_SECOND // 100
+_ASELECT_RE = re.compile(r"aselect='([^']*)'")
+_TERM_RE = re.compile(r"gte\(t,(-?[0-9.]+)\)\*lt\(t,(-?[0-9.]+)\)")
+
+
+def _wav_header(data_bytes: int) -> bytes:
+    return (
+        b"RIFF"
+        + struct.pack("<I", 36 + data_bytes)
+        + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, 1, SAMPLE_RATE, BYTES_PER_SECOND, 2, 16)
+        + b"data"
+        + struct.pack("<I", data_bytes)
+    )
+
+
+def _parse_args(argv: list[str]) -> tuple[str | None, str, str]:
+    src = None
+    audio_filter = ""
+    for i, arg in enumerate(argv[:-1]):
+        if arg == "-i":
+            src = argv[i + 1]
+        elif arg in ("-af", "-filter:a"):
+            audio_filter = argv[i + 1]
+    return src, audio_filter, argv[-1] if argv else ""
+
+
+def _frames(seconds: float) -> int:
+    return int(round(seconds * 100))
+
+
+def _mp4_runs(f) -> list[tuple[int, bool]]:
+    """偽 mp4 の音声を (10ms フレーム数, 無音かどうか) の並びで返す。"""
+    meta = json.loads(f.readline())
+    total = _frames(float(meta["seconds"]))
+    silent = [(0, min(_frames(float(meta.get("leading_silence", 0.0))), total))]
+    for start, length in meta.get("gaps", []):
+        silent.append((_frames(start), min(_frames(start + length), total)))
+
+    runs: list[tuple[int, bool]] = []
+    position = 0
+    for start, end in sorted(silent):
+        start = max(start, position)
+        if end <= start:
+            continue
+        if start > position:
+            runs.append((start - position, False))
+        runs.append((end - start, True))
+        position = end
+    if position < total:
+        runs.append((total - position, False))
+    return runs
+
+
+def _wav_runs(f) -> list[tuple[int, bool]]:
+    """このスタブが書き出した WAV を読み、(10ms フレーム数, 無音かどうか) の並びで返す。"""
+    zero_frame = b"\0" * _FRAME
+    runs: list[tuple[int, bool]] = []
+
+    def push(silent: bool, n: int = 1) -> None:
+        if runs and runs[-1][1] == silent:
+            runs[-1] = (runs[-1][0] + n, silent)
+        else:
+            runs.append((n, silent))
+
+    f.seek(44)
+    while chunk := f.read(_CHUNK):
+        if chunk == zero_frame * (len(chunk) // _FRAME):
+            push(True, len(chunk) // _FRAME)
+        elif b"\0\0" not in chunk:
+            push(False, -(-len(chunk) // _FRAME))
+        else:
+            for i in range(0, len(chunk), _FRAME):
+                push(chunk[i : i + _FRAME] == zero_frame)
+    return runs
+
+
+def _selected(runs: list[tuple[int, bool]], audio_filter: str) -> list[tuple[int, int]]:
+    """フィルタを通した後に残るフレームの範囲 [start, end) のリスト。"""
+    total = sum(n for n, _ in runs)
+    if m := _ASELECT_RE.search(audio_filter):
+        ranges = []
+        for a, b in _TERM_RE.findall(m.group(1)):
+            start = max(math.ceil(float(a) * 100 - 1e-6), 0)
+            end = min(math.ceil(float(b) * 100 - 1e-6), total)
+            if end > start:
+                ranges.append((start, end))
+        return ranges
+    if "silenceremove" in audio_filter and runs and runs[0][1]:
+        return [(runs[0][0], total)]
+    return [(0, total)]
+
+
+def _pcm(runs: list[tuple[int, bool]], ranges: list[tuple[int, int]]):
+    """残すフレームの PCM を 1秒程度ずつ返す。"""
+    tone = _TONE * (_CHUNK // len(_TONE))
+    zeros = b"\0" * _CHUNK
+    for start, end in ranges:
+        position = 0
+        for n, silent in runs:
+            lo, hi = max(start, position), min(end, position + n)
+            position += n
+            left = max(hi - lo, 0) * _FRAME
+            while left:
+                size = min(left, _CHUNK)
+                yield (zeros if silent else tone)[:size]
+                left -= size
+
+
+def _silencedetect(runs: list[tuple[int, bool]], audio_filter: str) -> None:
+    """silencedetect と同じ形式で、d 秒以上の無音と最後の時刻を stderr に書く。"""
+    m = re.search(r"silencedetect=[^,]*?d=([0-9.]+)", audio_filter)
+    min_frames = _frames(float(m.group(1))) if m else 200
+    position = 0
+    total = sum(n for n, _ in runs)
+    for n, silent in runs:
+        if silent and n >= min_frames:
+            print(f"[silencedetect @ 0x0] silence_start: {position / 100:g}", file=sys.stderr)
+            # 本物と同様、無音のまま終わった場合は silence_end を出さない
+            if position + n < total:
+                print(
+                    f"[silencedetect @ 0x0] silence_end: {(position + n) / 100:g} | "
+                    f"silence_duration: {n / 100:g}",
+                    file=sys.stderr,
+                )
+        position += n
+    h, rest = divmod(total, 360_000)
+    minutes, rest = divmod(rest, 6000)
+    print(
+        f"size=N/A time={h:02d}:{minutes:02d}:{rest / 100:05.2f} bitrate=N/A speed=N/A",
+        file=sys.stderr,
+    )
+
+
+def main(argv: list[str]) -> int:
+    src, audio_filter, dst = _parse_args(argv)
+    if src is None or not dst:
+        print("usage: fake_ffmpeg -i INPUT [-af FILTER] OUTPUT", file=sys.stderr)
+        return 2
+
+    time.sleep(float(os.environ.get("FAKE_FFMPEG_LATENCY", "0")))
+
+    with open(src, "rb") as f:
+        if f.read(len(FAKE_MP4_MAGIC)) == FAKE_MP4_MAGIC:
+            runs = _mp4_runs(f)
+        else:
+            f.seek(0)
+            if f.read(4) != b"RIFF":
+                print(f"{src}: unsupported input (fake ffmpeg)", file=sys.stderr)
+                return 1
+            runs = _wav_runs(f)
+
+    seconds = sum(n for n, _ in runs) / 100
+    time.sleep(seconds * float(os.environ.get("FAKE_FFMPEG_RTF", "0")))
+
+    if "silencedetect" in audio_filter:
+        _silencedetect(runs, audio_filter)
+        return 0
+
+    ranges = _selected(runs, audio_filter)
+    out = sys.stdout.buffer if dst == "-" else open(dst, "wb")
+    try:
+        out.write(_wav_header(sum(end - start for start, end in ranges) * _FRAME))
+        for chunk in _pcm(runs, ranges):
+            out.write(chunk)
+    except BrokenPipeError:
+        return 1
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+ffprobe のスタンドイン。
+
+audio.probe_duration_seconds が使う呼び出し（-show_entries format=duration ... INPUT）を受け付け、
+_common.make_fake_mp4 の偽 mp4 または fake_ffmpeg.py の WAV の長さ（秒）を1行で出力する。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+FAKE_MP4_MAGIC = b"FAKEMP4\n"
+BYTES_PER_SECOND = 16000 * 2
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        print("usage: fake_ffprobe [options] INPUT", file=sys.stderr)
+        return 2
+    src = argv[-1]
+    try:
+        with open(src, "rb") as f:
+            head = f.read(len(FAKE_MP4_MAGIC))
+            if head == FAKE_MP4_MAGIC:
+                seconds = float(json.loads(f.readline())["seconds"])
+            elif head[:4] == b"RIFF":
+                seconds = (os.fstat(f.fileno()).st_size - 44) / BYTES_PER_SECOND
+            else:
+                print(f"{src}: Invalid data found when processing input", file=sys.stderr)
+                return 1
+    except OSError as e:
+        print(f"{src}: {e.strerror}", file=sys.stderr)
+        return 1
+    print(f"{seconds:.6f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+OpenAI 互換 API（POST /v1/chat/completions）のローカルスタブ。
+
+要約プロンプトに対して、summarizer の検証を通る2列の Markdown テーブルを返す。
+応答までの待ち時間は固定分 + プロンプト1000文字あたりの時間で調整できる。
+slots を指定すると、同時に処理するのはその件数までになり、残りは順番待ちになる
+（1台の GPU で動くローカルゲートウェイの再現用）。
+fail_status を指定すると、すべてのリクエストにそのステータス（503 など）で応答する
+（ゲートウェイの障害の再現用。server.RequestHandlerClass.state.fail_status で途中から切り替えられる）。
+リクエスト数・失敗数と最大同時実行数は GET /__stats で取得できる。
+
+    python benchmarks/stubs/fake_llm.py --port 8766 --latency 0.5
+
+    # または Python から
+    server, url = start_fake_llm(latency=0.5)   # LLM_BASE_URL = f"{url}/v1"
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _State:
+    def __init__(
+        self, latency: float, per_1k_chars: float, fail_status: int = 0, slots: int = 0
+    ) -> None:
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(slots) if slots > 0 else None
+        self.latency = latency
+        self.per_1k_chars = per_1k_chars
+        self.fail_status = fail_status
+        self.requests = 0
+        self.failed = 0
+        self.prompt_chars = 0
+        self.active = 0
+        self.max_active = 0
+
+
+def _table(prompt: str) -> str:
+    digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+    return (
+        "| トピック | 内容 |\n"
+        "|---|---|\n"
+        f"| 議題 | ベンチマーク用の要約 {digest} |\n"
+        "| 決定事項 | 次回までに確認する |\n"
+        "| TODO | 担当者が資料を更新する |\n"
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state: _State
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/__stats":
+            with self.state.lock:
+                self._send(
+                    200,
+                    {
+                        "requests": self.state.requests,
+                        "failed": self.state.failed,
+                        "prompt_chars": self.state.prompt_chars,
+                        "max_concurrent": self.state.max_active,
+                    },
+                )
+            return
+        self._send(404, {"error": {"message": f"GET {self.path} is not supported"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"POST {self.path} is not supported"}})
+            return
+
+        prompt = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+        state = self.state
+        if state.fail_status:
+            with state.lock:
+                state.failed += 1
+            self._send(state.fail_status, {"error": {"message": "fake gateway failure"}})
+            return
+        if state.slots is not None:
+            state.slots.acquire()
+        with state.lock:
+            state.requests += 1
+            state.prompt_chars += len(prompt)
+            state.active += 1
+            state.max_active = max(state.max_active, state.active)
+        try:
+            time.sleep(state.latency + len(prompt) / 1000 * state.per_1k_chars)
+        finally:
+            with state.lock:
+                state.active -= 1
+            if state.slots is not None:
+                state.slots.release()
+
+        content = _table(prompt)
+        self._send(
+            200,
+            {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 2,
+                    "completion_tokens": len(content) // 2,
+                    "total_tokens": (len(prompt) + len(content)) // 2,
+                },
+            },
+        )
+
+
+def start_fake_llm(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    *,
+    latency: float = 0.0,
+    per_1k_chars: float = 0.0,
+    fail_status: int = 0,
+    slots: int = 0,
+) -> tuple[ThreadingHTTPServer, str]:
+    """スタブをバックグラウンドスレッドで起動し、(server, base_url) を返す。"""
+    handler = type(
+        "Handler", (_Handler,), {"state": _State(latency, per_1k_chars, fail_status, slots)}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.5, help="応答までの固定の待ち時間（秒）")
+    parser.add_argument("--per-1k-chars", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=0, help="すべてこのステータスで失敗させる")
+    parser.add_argument("--slots", type=int, default=0, help="同時に処理する件数（0 で無制限）")
+    args = parser.parse_args()
+
+    server, url = start_fake_llm(
+        args.host,
+        args.port,
+        latency=args.latency,
+        per_1k_chars=args.per_1k_chars,
+        fail_status=args.fail_status,
+        slots=args.slots,
+    )
+    print(f"fake OpenAI API listening on {url}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
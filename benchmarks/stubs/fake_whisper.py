@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+whisper.cpp (whisper-cli) のスタンドイン。
+
+ベンチマーク用に、本物と同じ引数 (-m / -f / -of / -otxt / -oj) を受け取り、
+入力の WAV を最後まで読み込んでから、タイムスタンプ付きの txt または json を書き出す。
+
+環境変数:
+    FAKE_WHISPER_LOAD_SECONDS: モデル読み込みを模した固定の待ち時間（秒）
+    FAKE_WHISPER_RTF: 音声1秒あたりの処理時間（realtime factor）
+    FAKE_WHISPER_REPEAT_RUN: 10発話ごとに、同じ決まり文句をこの回数だけ続けて出力する
+        （無音や雑音の区間で本物が起こす繰り返しを模す）
+"""
+
+import json
+import os
+import sys
+import time
+
+_WAV_HEADER_BYTES = 44
+_BYTES_PER_SECOND = 16000 * 2  # 16kHz / mono / s16le
+_REPEATED = "ご視聴ありがとうございました"
+
+
+def _fmt(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def main(argv: list[str]) -> int:
+    args = dict(zip(argv[::1], argv[1::1]))
+    src = args.get("-f")
+    out_prefix = args.get("-of")
+    if not src or not out_prefix:
+        print("usage: fake_whisper -m MODEL -f INPUT -of PREFIX -otxt", file=sys.stderr)
+        return 2
+
+    time.sleep(float(os.environ.get("FAKE_WHISPER_LOAD_SECONDS", "0")))
+
+    # 入力を最後まで読む（本物と同様、パイプ入力でも全量を受け取ってから処理する）
+    stream = sys.stdin.buffer if src == "-" else open(src, "rb")
+    total = 0
+    with stream:
+        while chunk := stream.read(1 << 20):
+            total += len(chunk)
+
+    audio_seconds = max(total - _WAV_HEADER_BYTES, 0) / _BYTES_PER_SECOND
+    time.sleep(audio_seconds * float(os.environ.get("FAKE_WHISPER_RTF", "0")))
+
+    # 会議ごとに内容が変わるよう、出力ファイル名を発話に含める（LLM キャッシュが効かないように）
+    tag = os.path.basename(out_prefix)
+    repeat_run = int(os.environ.get("FAKE_WHISPER_REPEAT_RUN", "0"))
+    segments = []
+    t = 0.0
+    spoken = 0
+    while t < audio_seconds:
+        end = min(t + 5.0, audio_seconds)
+        if repeat_run and spoken % 10 == 0 and segments and segments[-1][2] != _REPEATED:
+            for _ in range(repeat_run):
+                end = min(t + 2.0, audio_seconds)
+                segments.append((t, end, _REPEATED))
+                t = end
+            continue
+        segments.append((t, end, f"テスト発話 {spoken + 1} {tag}"))
+        spoken += 1
+        t = end
+
+    if "-oj" in argv:
+        transcription = [
+            {
+                "timestamps": {"from": _fmt(s).replace(".", ","), "to": _fmt(e).replace(".", ",")},
+                "offsets": {"from": int(s * 1000), "to": int(e * 1000)},
+                "text": f" {text}",
+            }
+            for s, e, text in segments
+        ]
+        with open(f"{out_prefix}.json", "w") as f:
+            json.dump({"transcription": transcription}, f, ensure_ascii=False)
+    if "-otxt" in argv:
+        with open(f"{out_prefix}.txt", "w") as f:
+            for s, e, text in segments:
+                f.write(f"[{_fmt(s)} --> {_fmt(e)}]  {text}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
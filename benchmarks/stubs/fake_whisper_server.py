@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+whisper.cpp の whisper-server のスタンドイン。
+
+起動時に1度だけ「モデル読み込み」（FAKE_WHISPER_LOAD_SECONDS 秒の待ち）を行い、
+以降は POST /inference（multipart の file）に verbose_json 形式で応答する。
+
+    fake_whisper_server.py -m MODEL --host 127.0.0.1 --port 8178
+
+環境変数:
+    FAKE_WHISPER_LOAD_SECONDS: モデル読み込みを模した待ち時間（秒、起動時のみ）
+    FAKE_WHISPER_RTF: 音声1秒あたりの処理時間（realtime factor）
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WAV_HEADER_BYTES = 44
+_BYTES_PER_SECOND = 16000 * 2
+
+# 本物と同じく推論は1件ずつ処理する
+_infer_lock = threading.Lock()
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict[str, bytes]:
+    msg = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in msg.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = part.get_payload(decode=True) or b""
+    return fields
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._send_json(200, {"status": "ok"})
+
+    def do_POST(self) -> None:
+        if self.path != "/inference":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", "0"))
+        fields = _parse_multipart(self.headers["Content-Type"], self.rfile.read(length))
+        audio = fields.get("file")
+        if audio is None:
+            self._send_json(400, {"error": "no 'file' field in the request"})
+            return
+
+        seconds = max(len(audio) - _WAV_HEADER_BYTES, 0) / _BYTES_PER_SECOND
+        with _infer_lock:
+            time.sleep(seconds * float(os.environ.get("FAKE_WHISPER_RTF", "0")))
+
+        segments = []
+        t = 0.0
+        while t < seconds:
+            end = min(t + 5.0, seconds)
+            segments.append(
+                {"id": len(segments), "start": t, "end": end, "text": f" テスト発話 {len(segments) + 1}"}
+            )
+            t = end
+        self._send_json(
+            200,
+            {
+                "task": "transcribe",
+                "language": fields.get("language", b"ja").decode(),
+                "duration": seconds,
+                "text": "".join(s["text"] for s in segments),
+                "segments": segments,
+            },
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--model", default="")
+    parser.add_argument("-l", "--language", default="ja")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8178)
+    args = parser.parse_args()
+
+    time.sleep(float(os.environ.get("FAKE_WHISPER_LOAD_SECONDS", "0")))
+    ThreadingHTTPServer((args.host, args.port), _Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
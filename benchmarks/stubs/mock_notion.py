@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Notion API のローカルモックサーバー。
+
+notion_client.Client(base_url=...) から使える最小限のエンドポイントを実装し、
+本物と同じ制約（1リクエストあたり children 100件（入れ子の children も数える）、
+レート制限時の 429 + Retry-After）
+を再現する。リクエスト数と受信バイト数は GET /__stats で取得できる。
+
+    python benchmarks/stubs/mock_notion.py --port 8765 --rate 3
+
+    # または Python から
+    server, url = start_mock_notion(rate=3)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_CHILDREN = 100
+
+
+class _State:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.lock = threading.Lock()
+        self.pages: dict[str, dict] = {}
+        self.blocks: dict[str, dict] = {}
+        self.children: dict[str, list[str]] = {}
+        self.requests: Counter[str] = Counter()
+        self.bytes_received = 0
+        self.rate_limited = 0
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def take_token(self) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def add_blocks(self, parent_id: str, blocks: list[dict], after: str | None = None) -> list[dict]:
+        created = []
+        for block in blocks:
+            block = dict(block)
+            nested = None
+            btype = block.get("type") or next(k for k in block if k not in ("object", "type"))
+            body = dict(block.get(btype, {}))
+            if "children" in body:
+                nested = body.pop("children")
+            block_id = str(uuid.uuid4())
+            block.update({"object": "block", "id": block_id, "type": btype, btype: body})
+            block["has_children"] = bool(nested)
+            self.blocks[block_id] = block
+            self.children[block_id] = []
+            if nested:
+                self.add_blocks(block_id, nested)
+            created.append(block)
+
+        siblings = self.children.setdefault(parent_id, [])
+        pos = siblings.index(after) + 1 if after in siblings else len(siblings)
+        siblings[pos:pos] = [b["id"] for b in created]
+        return created
+
+
+def _error(status: int, code: str, message: str) -> tuple[int, dict]:
+    return status, {"object": "error", "status": status, "code": code, "message": message}
+
+
+def _count_blocks(blocks: list) -> int:
+    """入れ子の children を含めたブロック数。"""
+    total = 0
+    for block in blocks:
+        total += 1
+        for key, value in block.items():
+            if key not in ("object", "type") and isinstance(value, dict):
+                total += _count_blocks(value.get("children", []))
+    return total
+
+
+def _plain_text(prop: dict) -> str:
+    items = prop.get("rich_text") or prop.get("title") or []
+    return "".join(i.get("text", {}).get("content", "") for i in items)
+
+
+def _handle(state: _State, method: str, path: str, body: dict) -> tuple[int, dict]:
+    if method == "POST" and path == "/v1/pages":
+        children = body.get("children", [])
+        if _count_blocks(children) > MAX_CHILDREN:
+            return _error(400, "validation_error", f"body.children.length should be ≤ `{MAX_CHILDREN}`")
+        page_id = str(uuid.uuid4())
+        page = {
+            "object": "page",
+            "id": page_id,
+            "parent": body.get("parent"),
+            "properties": body.get("properties", {}),
+            "archived": False,
+        }
+        state.pages[page_id] = page
+        state.children[page_id] = []
+        state.add_blocks(page_id, children)
+        return 200, page
+
+    if m := re.fullmatch(r"/v1/pages/([^/]+)", path):
+        page = state.pages.get(m.group(1))
+        if page is None:
+            return _error(404, "object_not_found", "page not found")
+        if method == "PATCH":
+            page["properties"].update(body.get("properties", {}))
+            if "archived" in body:
+                page["archived"] = body["archived"]
+        return 200, page
+
+    if m := re.fullmatch(r"/v1/blocks/([^/]+)/children", path):
+        parent_id = m.group(1)
+        if parent_id not in state.children:
+            return _error(404, "object_not_found", "block not found")
+        if method == "PATCH":
+            children = body.get("children", [])
+            if _count_blocks(children) > MAX_CHILDREN:
+                return _error(400, "validation_error", f"body.children.length should be ≤ `{MAX_CHILDREN}`")
+            created = state.add_blocks(parent_id, children, body.get("after"))
+            return 200, {"object": "list", "results": created, "has_more": False, "next_cursor": None}
+        results = [state.blocks[i] for i in state.children[parent_id]]
+        return 200, {"object": "list", "results": results, "has_more": False, "next_cursor": None}
+
+    if m := re.fullmatch(r"/v1/blocks/([^/]+)", path):
+        block_id = m.group(1)
+        block = state.blocks.get(block_id)
+        if block is None:
+            return _error(404, "object_not_found", "block not found")
+        if method == "DELETE":
+            del state.blocks[block_id]
+            for siblings in state.children.values():
+                if block_id in siblings:
+                    siblings.remove(block_id)
+            block["archived"] = True
+        elif method == "PATCH":
+            btype = block["type"]
+            block[btype].update(body.get(btype, {}))
+        return 200, block
+
+    if method == "POST" and (m := re.fullmatch(r"/v1/databases/([^/]+)/query", path)):
+        flt = body.get("filter") or {}
+        results = []
+        for page in state.pages.values():
+            if page["archived"] or (page.get("parent") or {}).get("database_id") != m.group(1):
+                continue
+            if "property" in flt:
+                cond = flt.get("rich_text") or flt.get("title") or {}
+                value = _plain_text(page["properties"].get(flt["property"], {}))
+                if "equals" in cond and value != cond["equals"]:
+                    continue
+            results.append(page)
+        return 200, {"object": "list", "results": results, "has_more": False, "next_cursor": None}
+
+    return _error(404, "invalid_request_url", f"{method} {path} is not supported by the mock")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state: _State
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+
+        if path == "/__stats":
+            with self.state.lock:
+                self._send(
+                    200,
+                    {
+                        "requests": dict(self.state.requests),
+                        "total_requests": sum(self.state.requests.values()),
+                        "bytes_received": self.state.bytes_received,
+                        "rate_limited": self.state.rate_limited,
+                        "pages": len(self.state.pages),
+                        "blocks": len(self.state.blocks),
+                    },
+                )
+            return
+
+        with self.state.lock:
+            if not self.state.take_token():
+                self.state.rate_limited += 1
+                self._send(
+                    429,
+                    _error(429, "rate_limited", "Rate limited")[1],
+                    {"Retry-After": "1"},
+                )
+                return
+            endpoint = re.sub(r"/[0-9a-f-]{36}", "/{id}", path)
+            self.state.requests[f"{self.command} {endpoint}"] += 1
+            self.state.bytes_received += len(raw)
+            body = json.loads(raw) if raw else {}
+            status, payload = _handle(self.state, self.command, path, body)
+        self._send(status, payload)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+
+def start_mock_notion(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    *,
+    rate: float = 0.0,
+    burst: float = 3.0,
+) -> tuple[ThreadingHTTPServer, str]:
+    """モックサーバーをバックグラウンドスレッドで起動し、(server, base_url) を返す。"""
+    handler = type("Handler", (_Handler,), {"state": _State(rate, burst)})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=3.0, help="req/s (0 で無制限)")
+    parser.add_argument("--burst", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server, url = start_mock_notion(args.host, args.port, rate=args.rate, burst=args.burst)
+    print(f"mock Notion API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
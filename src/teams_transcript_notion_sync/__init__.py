@@ -1,2 +1,4 @@
 def main() -> None:
-    print("Hello from teams-transcript-notion-sync!")
+    from .cli import main as cli_main
+
+    cli_main()
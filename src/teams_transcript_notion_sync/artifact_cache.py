@@ -0,0 +1,166 @@
+# src/teams_transcript_notion_sync/artifact_cache.py
+"""
+録画の内容ハッシュ -> 生成物（wav / 文字起こし / 要約）のキャッシュ。
+
+OneDrive の再同期やフォルダ移動では、内容が同じでも mtime やパスが変わる。
+内容ハッシュで既に処理済みの録画を見分け、ffmpeg / whisper / LLM / Notion を
+やり直さずに済ませる。
+
+ハッシュは2段階:
+  1) 部分ハッシュ: サイズ + 先頭/中央/末尾の数MBだけを読む（高速）
+  2) 完全ハッシュ: 部分ハッシュとサイズが一致する候補があるときだけ全体を読む
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .config import PROCESSED_DB
+from .db import connect, transaction
+
+_SAMPLE_BYTES = 1 << 20  # 1 MiB
+_READ_BLOCK = 1 << 20
+
+
+@dataclass
+class Artifacts:
+    """処理済みの録画に対応する生成物。"""
+
+    source_path: Path
+    transcript_path: Path
+    summary_path: Path
+    wav_path: Path | None = None
+    digest: str | None = None  # 録画の完全ハッシュ（分かっていれば register で計算し直さない）
+
+    def exists(self) -> bool:
+        return self.transcript_path.exists() and self.summary_path.exists()
+
+
+def partial_hash(path: Path, size: int | None = None) -> str:
+    """サイズと先頭/中央/末尾のサンプルから部分ハッシュを計算する。"""
+    if size is None:
+        size = path.stat().st_size
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    with path.open("rb") as f:
+        offsets = [0]
+        if size > 3 * _SAMPLE_BYTES:
+            offsets += [size // 2 - _SAMPLE_BYTES // 2, size - _SAMPLE_BYTES]
+        elif size > _SAMPLE_BYTES:
+            offsets.append(size - _SAMPLE_BYTES)
+        for offset in offsets:
+            f.seek(offset)
+            h.update(f.read(_SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def full_hash(path: Path) -> str:
+    """ファイル全体のハッシュを計算する。"""
+    h = hashlib.blake2b(digest_size=32)
+    with path.open("rb") as f:
+        while block := f.read(_READ_BLOCK):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_key(path: Path, digest: str | None = None) -> str:
+    """
+    録画を一意に表すキー（パス + 内容ハッシュ）。Notion ページの重複防止に使う。
+
+    digest に full_hash(path) の結果を渡すと、ファイル全体を読み直さない。
+    """
+    return f"{path}#{(digest or full_hash(path))[:16]}"
+
+
+def lookup(path: Path, size: int | None = None) -> Artifacts | None:
+    """
+    内容が同じ処理済みの録画があれば、その生成物を返す。
+
+    部分ハッシュとサイズが一致した場合にだけ完全ハッシュを計算して確定する。
+    生成物のファイルが消えている場合はヒットとみなさない。
+    """
+    if size is None:
+        size = path.stat().st_size
+    rows = connect(PROCESSED_DB).execute(
+        """
+        SELECT full_hash, source_path, wav_path, transcript_path, summary_path
+        FROM artifacts WHERE size = ? AND partial_hash = ?
+        """,
+        (size, partial_hash(path, size)),
+    ).fetchall()
+    if not rows:
+        return None
+
+    digest = full_hash(path)
+    for row in rows:
+        if row["full_hash"] != digest:
+            continue
+        artifacts = Artifacts(
+            source_path=Path(row["source_path"]),
+            transcript_path=Path(row["transcript_path"]),
+            summary_path=Path(row["summary_path"]),
+            wav_path=Path(row["wav_path"]) if row["wav_path"] else None,
+            digest=digest,
+        )
+        if artifacts.exists():
+            return artifacts
+    return None
+
+
+def register(
+    path: Path,
+    *,
+    transcript_path: Path,
+    summary_path: Path,
+    wav_path: Path | None = None,
+    digest: str | None = None,
+) -> None:
+    """
+    処理が完了した録画の内容ハッシュと生成物を記録する。
+
+    digest に full_hash(path) の結果を渡すと、ファイル全体を読み直さない。
+    """
+    size = path.stat().st_size
+    p_hash = partial_hash(path, size)
+    f_hash = digest or full_hash(path)
+    with transaction(PROCESSED_DB) as conn:
+        conn.execute(
+            """
+            INSERT INTO artifacts (
+                full_hash, size, partial_hash, source_path,
+                wav_path, transcript_path, summary_path, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (full_hash) DO UPDATE SET
+                source_path = excluded.source_path,
+                wav_path = excluded.wav_path,
+                transcript_path = excluded.transcript_path,
+                summary_path = excluded.summary_path,
+                updated_at = excluded.updated_at
+            """,
+            (
+                f_hash,
+                size,
+                p_hash,
+                str(path),
+                str(wav_path) if wav_path else None,
+                str(transcript_path),
+                str(summary_path),
+                time.time(),
+            ),
+        )
+
+
+def relink(path: Path, artifacts: Artifacts) -> None:
+    """移動/再同期された録画を、既存の生成物に付け替える。"""
+    with transaction(PROCESSED_DB) as conn:
+        conn.execute(
+            """
+            UPDATE artifacts SET source_path = ?, updated_at = ?
+            WHERE source_path = ?
+            """,
+            (str(path), time.time(), str(artifacts.source_path)),
+        )
@@ -1,8 +1,10 @@
 # src/teams_transcript_notion_sync/audio.py
 from pathlib import Path
 import subprocess
+import wave
 
-from .config import FFMPEG_BIN, TRANSCRIPT_DIR
+from .config import FFMPEG_BIN, FFPROBE_BIN, TRANSCRIPT_DIR
+from .silence import OffsetMap, plan_for, save_offsets
 
 
 def convert_mp4_to_wav(mp4_path: Path) -> Path:
@@ -30,6 +32,14 @@ def convert_mp4_to_wav(mp4_path: Path) -> Path:
     return wav_path
 
 
+def _silenceremove_filter(start_silence: float, start_threshold_db: float) -> str:
+    """先頭の無音区間を除去する silenceremove フィルタ式を返す。"""
+    return (
+        "silenceremove="
+        f"start_periods=1:start_silence={start_silence}:start_threshold={start_threshold_db}dB"
+    )
+
+
 def remove_silence_from_wav(
     wav_path: Path,
     *,
@@ -38,7 +48,11 @@ def remove_silence_from_wav(
     output_path: Path | None = None,
 ) -> Path:
     """
-    ffmpeg の silenceremove フィルタで無音区間を除去した .wav を生成する。
+    無音区間を除去した .wav を生成する。
+
+    SILENCE_REMOVAL=vad なら途中の無音もすべて切り落とし、時刻の対応表を
+    <出力の stem>.offsets.json に保存する（silence.py）。
+    leading なら ffmpeg の silenceremove フィルタで先頭の無音だけを除去する。
 
     例:
       ffmpeg -i input.wav \\
@@ -53,10 +67,11 @@ def remove_silence_from_wav(
         # e.g. sample.nosilence.wav -> sample.nosilence
         # FilenotFoundError: [Errno 2] No such file or directory: 'sample.nosilence.wav'となる
 
-    af = (
-        "silenceremove="
-        f"start_periods=1:start_silence={start_silence}:start_threshold={start_threshold_db}dB"
-    )
+    offsets = plan_for(wav_path)
+    if offsets is not None:
+        af = offsets.select_filter()
+    else:
+        af = _silenceremove_filter(start_silence, start_threshold_db)
 
     cmd = [
         FFMPEG_BIN,
@@ -69,4 +84,94 @@ def remove_silence_from_wav(
     ]
 
     subprocess.run(cmd, check=True)
+    save_offsets(output_path, offsets)
+    return output_path
+
+
+def open_pcm_stream(
+    mp4_path: Path,
+    *,
+    start_silence: float = 5,
+    start_threshold_db: float = -40.0,
+    offsets: OffsetMap | None = None,
+) -> subprocess.Popen:
+    """
+    mp4 を 1本の ffmpeg フィルタグラフでデコードし、16kHz/モノラル/無音除去済みの
+    WAV (PCM s16le) を stdout に流すプロセスを起動する。
+
+    offsets を渡すとその対応表で残す区間だけを、なければ先頭の無音だけを除去する。
+
+    convert_mp4_to_wav + remove_silence_from_wav と同じ処理を、中間ファイルなしで行う。
+    呼び出し側は返り値の stdout を whisper.cpp の stdin につなぎ、wait() で終了を確認すること。
+    """
+    af = ",".join(
+        [
+            "aresample=16000",
+            "aformat=sample_fmts=s16:channel_layouts=mono",
+            offsets.select_filter()
+            if offsets is not None
+            else _silenceremove_filter(start_silence, start_threshold_db),
+        ]
+    )
+
+    cmd = [
+        FFMPEG_BIN,
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        str(mp4_path),
+        "-vn",
+        "-af",
+        af,
+        "-c:a",
+        "pcm_s16le",
+        "-f",
+        "wav",
+        "-",  # stdout
+    ]
+
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE)
+
+
+def probe_duration_seconds(media_path: Path) -> float:
+    """ffprobe でメディアファイルの長さ（秒）を調べる。"""
+    cmd = [
+        FFPROBE_BIN,
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        str(media_path),
+    ]
+    res = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return float(res.stdout.strip())
+
+
+def wav_duration_seconds(wav_path: Path) -> float:
+    """WAV ファイルの長さ（秒）をヘッダから求める。"""
+    with wave.open(str(wav_path), "rb") as w:
+        return w.getnframes() / w.getframerate()
+
+
+def extract_wav_segment(
+    wav_path: Path,
+    output_path: Path,
+    start: float,
+    end: float,
+) -> Path:
+    """WAV の [start, end) 秒の区間を別の WAV として書き出す（再エンコードなし）。"""
+    with wave.open(str(wav_path), "rb") as src:
+        rate = src.getframerate()
+        first = min(int(start * rate), src.getnframes())
+        last = min(int(end * rate), src.getnframes())
+        src.setpos(first)
+        frames = src.readframes(last - first)
+        params = src.getparams()
+
+    with wave.open(str(output_path), "wb") as dst:
+        dst.setparams(params)
+        dst.writeframes(frames)
     return output_path
@@ -0,0 +1,143 @@
+# src/teams_transcript_notion_sync/checkpoints.py
+"""
+会議ごとのステージチェックポイント。
+
+    wav -> nosilence -> transcript -> summary -> notion
+
+各ステージの出力パスと指紋（サイズ+mtime）、入力側の指紋を記録しておき、
+再実行時は「記録が連続していて、必要な出力ファイルが残っている」最も後ろの
+ステージから再開する。LLM や Notion が失敗しても、次回は文字起こしをやり直さない。
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Sequence
+
+from .config import PROCESSED_DB
+from .db import connect, transaction
+
+STAGES = ("wav", "nosilence", "transcript", "summary", "notion")
+
+# 直前のステージの出力に加えて、再開時に残っている必要がある出力
+_EXTRA_REQUIRES = {"notion": ("transcript",)}
+
+
+@dataclass
+class Checkpoint:
+    """1ステージ分のチェックポイント。"""
+
+    stage: str
+    output: Path | None
+    fingerprint: str
+    input_fingerprint: str
+
+    def output_fresh(self) -> bool:
+        """出力ファイルが記録時のまま残っているか（出力ファイルのないステージは常に True）。"""
+        if self.output is None:
+            return True
+        try:
+            return file_fingerprint(self.output) == self.fingerprint
+        except FileNotFoundError:
+            return False
+
+
+def file_fingerprint(path: Path) -> str:
+    """ファイルの指紋（サイズと mtime）を返す。"""
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def load(mp4: Path) -> Dict[str, Checkpoint]:
+    """会議のチェックポイントを {ステージ名: Checkpoint} で返す。"""
+    rows = connect(PROCESSED_DB).execute(
+        """
+        SELECT stage, output, fingerprint, input_fingerprint
+        FROM stage_checkpoints WHERE path = ?
+        """,
+        (str(mp4),),
+    )
+    return {
+        row["stage"]: Checkpoint(
+            stage=row["stage"],
+            output=Path(row["output"]) if row["output"] else None,
+            fingerprint=row["fingerprint"],
+            input_fingerprint=row["input_fingerprint"],
+        )
+        for row in rows
+    }
+
+
+def record(
+    mp4: Path,
+    stage: str,
+    *,
+    output: Path | None,
+    input_fingerprint: str,
+) -> str:
+    """ステージの完了を記録し、その出力の指紋を返す。"""
+    # 出力ファイルのないステージ（notion）は入力の指紋をそのまま引き継ぐ
+    fingerprint = file_fingerprint(output) if output is not None else input_fingerprint
+    with transaction(PROCESSED_DB) as conn:
+        conn.execute(
+            """
+            INSERT INTO stage_checkpoints
+                (path, stage, output, fingerprint, input_fingerprint, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path, stage) DO UPDATE SET
+                output = excluded.output,
+                fingerprint = excluded.fingerprint,
+                input_fingerprint = excluded.input_fingerprint,
+                updated_at = excluded.updated_at
+            """,
+            (
+                str(mp4),
+                stage,
+                str(output) if output is not None else None,
+                fingerprint,
+                input_fingerprint,
+                time.time(),
+            ),
+        )
+    return fingerprint
+
+
+def invalidate(mp4: Path, from_stage: str) -> None:
+    """from_stage とそれ以降のステージのチェックポイントを削除する（強制再実行用）。"""
+    stages = STAGES[STAGES.index(from_stage) :]
+    with transaction(PROCESSED_DB) as conn:
+        conn.executemany(
+            "DELETE FROM stage_checkpoints WHERE path = ? AND stage = ?",
+            [(str(mp4), stage) for stage in stages],
+        )
+
+
+def resume_index(
+    stages: Sequence[str],
+    checkpoints: Dict[str, Checkpoint],
+    source_fingerprint: str,
+) -> int:
+    """
+    再開するステージの位置を返す（len(stages) ならすべて完了済み）。
+
+    先頭から「入力の指紋が直前の出力の指紋と一致する」チェックポイントが続く範囲で、
+    再開に必要な出力ファイルが残っている最も後ろの位置を選ぶ。
+    """
+    chain = 0
+    expected = source_fingerprint
+    for stage in stages:
+        cp = checkpoints.get(stage)
+        if cp is None or cp.input_fingerprint != expected:
+            break
+        expected = cp.fingerprint
+        chain += 1
+
+    for k in range(chain, 0, -1):
+        if k == len(stages):
+            return k
+        needed = (stages[k - 1], *_EXTRA_REQUIRES.get(stages[k], ()))
+        if all(s in checkpoints and checkpoints[s].output_fresh() for s in needed):
+            return k
+    return 0
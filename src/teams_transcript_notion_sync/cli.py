@@ -0,0 +1,188 @@
+# src/teams_transcript_notion_sync/cli.py
+import argparse
+from pathlib import Path
+from typing import Sequence
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError("1以上の整数を指定してください")
+    return n
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="teams-transcript-notion-sync")
+    parser.set_defaults(command="run", cpu_jobs=None, net_jobs=None)
+    sub = parser.add_subparsers(dest="command")
+
+    # run: 新しい会議を探して処理する（デフォルト）
+    run = sub.add_parser("run", help="新しい会議を処理してNotionにアップロードする")
+    run.add_argument(
+        "--cpu-jobs",
+        type=_positive_int,
+        help="ffmpeg/whisper を並列実行するプロセス数 (default: PIPELINE_CPU_JOBS)",
+    )
+    run.add_argument(
+        "--net-jobs",
+        type=_positive_int,
+        help="要約/Notion を並列実行するスレッド数 (default: PIPELINE_NET_JOBS)",
+    )
+
+    # watch: 常駐して、新しい録画が届くたびに処理する
+    watch = sub.add_parser("watch", help="フォルダを監視し、新しい録画が届いたら処理する")
+    watch.add_argument("--cpu-jobs", type=_positive_int, help="run と同じ")
+    watch.add_argument("--net-jobs", type=_positive_int, help="run と同じ")
+    watch.add_argument(
+        "--poll",
+        action="store_true",
+        help="inotify を使わずにポーリングで監視する (default: WATCH_BACKEND)",
+    )
+
+    # enqueue / worker: ジョブキューを介して複数のプロセス・ホストで分担する
+    enqueue = sub.add_parser(
+        "enqueue", help="新しい会議をジョブキューに積む（処理は worker が行う）"
+    )
+    enqueue.add_argument(
+        "--interval",
+        type=float,
+        default=0,
+        help="この秒数ごとにスキャンして積み続ける (default: 0 = 1回だけ)",
+    )
+    worker = sub.add_parser("worker", help="ジョブキューから会議を取り出して処理する")
+    worker.add_argument(
+        "--processes",
+        type=_positive_int,
+        default=1,
+        help="このホストで起動するワーカープロセスの数 (default: 1)",
+    )
+    worker.add_argument(
+        "--drain",
+        action="store_true",
+        help="キューが空になったら終了する（指定しなければ新しいジョブを待ち続ける）",
+    )
+
+    # scan: 処理対象の一覧とスキャン統計だけを表示する
+    scan = sub.add_parser("scan", help="新規/更新された mp4 を一覧表示する（処理はしない）")
+    scan.add_argument(
+        "--full",
+        action="store_true",
+        help="差分インデックスを使わずにすべてのディレクトリを読み直す",
+    )
+
+    # plan: 処理予定の順番と完了予定を表示する
+    plan = sub.add_parser("plan", help="新しい会議を処理する順番と完了予定を表示する（処理はしない）")
+    plan.add_argument(
+        "--policy",
+        choices=["fifo", "shortest", "newest", "priority"],
+        help="並べ方 (default: SCHEDULE_POLICY)",
+    )
+    plan.add_argument("--cpu-jobs", type=_positive_int, help="run と同じ")
+
+    # rerun: チェックポイントを破棄して指定ステージから処理し直す
+    rerun = sub.add_parser("rerun", help="指定したステージから会議を処理し直す")
+    rerun.add_argument("mp4", type=Path, help="対象の mp4 ファイル")
+    rerun.add_argument(
+        "--stage",
+        choices=["wav", "nosilence", "transcript", "summary", "notion"],
+        default="wav",
+        help="このステージとそれ以降を強制的に再実行する (default: wav = すべて)",
+    )
+
+    # flush: Notion 送信キューに残っているページを送る
+    sub.add_parser("flush", help="Notion 送信キューに残っているページを送る")
+
+    # status: 処理状態の集計を表示する
+    sub.add_parser("status", help="処理状態ごとの件数を表示する")
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "run":
+        from .pipeline import process_new_meetings
+
+        process_new_meetings(cpu_jobs=args.cpu_jobs, net_jobs=args.net_jobs)
+
+    elif args.command == "watch":
+        from .config import WATCH_BACKEND
+        from .watch import watch
+
+        watch(
+            cpu_jobs=args.cpu_jobs,
+            net_jobs=args.net_jobs,
+            backend="poll" if args.poll else WATCH_BACKEND,
+        )
+
+    elif args.command == "enqueue":
+        import time
+
+        from .job_queue import enqueue_new_meetings
+
+        while True:
+            enqueue_new_meetings()
+            if args.interval <= 0:
+                break
+            try:
+                time.sleep(args.interval)
+            except KeyboardInterrupt:
+                break
+
+    elif args.command == "worker":
+        from .job_queue import run_workers
+
+        run_workers(args.processes, drain=args.drain)
+
+    elif args.command == "scan":
+        from .scanner import find_new_mp4s
+
+        for path in find_new_mp4s(full=args.full):
+            print(path)
+
+    elif args.command == "plan":
+        from datetime import datetime, timedelta
+
+        from .config import PIPELINE_CPU_JOBS, SCHEDULE_POLICY
+        from .scanner import find_new_mp4s
+        from . import scheduler
+
+        policy = args.policy or SCHEDULE_POLICY
+        cpu_jobs = args.cpu_jobs or PIPELINE_CPU_JOBS
+        jobs = scheduler.plan(find_new_mp4s(), policy)
+        now = datetime.now()
+        for i, est in enumerate(scheduler.estimate(jobs, cpu_jobs), 1):
+            # 長さを調べられなかった録画はファイルサイズからの概算（~ を付ける）
+            approx = "" if est.job.duration is not None else "~"
+            minutes = f"{approx}{est.job.estimated_duration / 60:.1f}"
+            finish = now + timedelta(seconds=est.finish)
+            print(f"{i:>3}  {minutes:>7} min  done ~{finish:%H:%M}  {est.job.path}")
+        print(scheduler.describe(jobs, cpu_jobs, policy))
+
+    elif args.command == "rerun":
+        from .pipeline import rerun_meeting
+
+        rerun_meeting(args.mp4.resolve(), args.stage)
+
+    elif args.command == "flush":
+        from .outbox import flush, pending_count
+
+        sent, failed = flush()
+        print(f"sent {sent}, failed {failed}, pending {pending_count()}")
+
+    elif args.command == "status":
+        from .config import PROCESSED_DB
+        from .db import count_by_status, count_jobs_by_status
+
+        counts = count_by_status(PROCESSED_DB)
+        for status, n in counts.items():
+            print(f"{status:<12}{n:>6}")
+        print(f"{'total':<12}{sum(counts.values()):>6}")
+
+        # job_queue は import しない（scanner が ONEDRIVE_MEETINGS_DIR を要求するため）
+        jobs = count_jobs_by_status(PROCESSED_DB)
+        if jobs:
+            print("\njob queue")
+            for status, n in jobs.items():
+                print(f"{status:<12}{n:>6}")
@@ -1,9 +1,18 @@
 # src/teams_transcript_notion_sync/config.py
+"""
+設定（環境変数 / .env）。
+
+各値は最初に参照されたときに読み込んで検証する。使う側はこれまでどおり
+
+    from .config import NOTION_TOKEN
+
+と書けばよく、その時点で NOTION_TOKEN だけが評価される。scan や status のように
+Notion / LLM / whisper を使わないコマンドは、それらの環境変数がなくても動く。
+"""
+
+from functools import cached_property
 from pathlib import Path
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 
 def _require_env(name: str) -> str:
@@ -14,34 +23,387 @@ def _require_env(name: str) -> str:
     return value
 
 
-BASE_DIR = Path(os.environ.get("APP_BASE_DIR", Path(__file__).resolve().parents[2]))
+def _choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    """選択肢のどれかを取る環境変数を取得する（小文字に正規化する）。"""
+    value = os.environ.get(name, default).lower()
+    if value not in choices:
+        expected = ", ".join(f"'{c}'" for c in choices[:-1]) + f" or '{choices[-1]}'"
+        raise RuntimeError(f"{name} must be {expected} (got '{value}')")
+    return value
+
+
+def _mkdir(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class Settings:
+    """環境変数から読む設定値。各値は最初に参照されたときに一度だけ評価する。"""
+
+    @cached_property
+    def BASE_DIR(self) -> Path:
+        return Path(os.environ.get("APP_BASE_DIR", Path(__file__).resolve().parents[2]))
+
+    # ===== パス関連 =====
+    @cached_property
+    def ONEDRIVE_MEETINGS_DIR(self) -> Path:
+        return Path(_require_env("ONEDRIVE_MEETINGS_DIR"))
+
+    # 以下の3つは最初に参照されたときに作成する
+    @cached_property
+    def DATA_DIR(self) -> Path:
+        return _mkdir(self.BASE_DIR / "data")
+
+    @cached_property
+    def TRANSCRIPT_DIR(self) -> Path:
+        return _mkdir(self.BASE_DIR / "transcripts")
+
+    @cached_property
+    def SUMMARY_DIR(self) -> Path:
+        return _mkdir(self.BASE_DIR / "summaries")
+
+    # 処理状態DB（SQLite）。旧形式の processed_files.json があれば初回に取り込む。
+    @cached_property
+    def PROCESSED_DB(self) -> Path:
+        return self.DATA_DIR / "processed_files.sqlite3"
+
+    # DB のジャーナルモード。WAL は同じホストのプロセス間でしか共有できないので、
+    # 複数ホストのワーカーで DATA_DIR を共有する場合は delete にする
+    @cached_property
+    def DB_JOURNAL_MODE(self) -> str:
+        return _choice("DB_JOURNAL_MODE", "wal", ("wal", "delete"))
+
+    # ディレクトリごとの mtime とファイル一覧（差分スキャン用）
+    @cached_property
+    def SCAN_INDEX(self) -> Path:
+        return self.DATA_DIR / "scan_index.json"
+
+    # 最終更新からこの秒数が経つまでは、OneDrive がまだ書き込み中とみなして処理しない
+    @cached_property
+    def FILE_STABLE_SECONDS(self) -> float:
+        return float(os.environ.get("FILE_STABLE_SECONDS", "60"))
+
+    # 途中で失敗した（status が done / queued 以外の）会議を、次の実行でチェックポイントから
+    # 処理し直す回数の上限。失敗がこの回数に達した会議は、録画が更新されるまで選ばない
+    @cached_property
+    def MEETING_MAX_ATTEMPTS(self) -> int:
+        return int(os.environ.get("MEETING_MAX_ATTEMPTS", "3"))
+
+    # watch モード: auto（inotify が使えなければポーリング） / inotify / poll
+    @cached_property
+    def WATCH_BACKEND(self) -> str:
+        return _choice("WATCH_BACKEND", "auto", ("auto", "inotify", "poll"))
+
+    # ポーリング時のスキャン間隔（秒）
+    @cached_property
+    def WATCH_POLL_INTERVAL(self) -> float:
+        return float(os.environ.get("WATCH_POLL_INTERVAL", "30"))
+
+    # ステージごとの計測ログ（JSON Lines）。空にすると書き出さない
+    @cached_property
+    def METRICS_LOG(self) -> Path | None:
+        value = os.environ.get("METRICS_LOG")
+        if value is None:
+            return self.DATA_DIR / "metrics.jsonl"
+        return Path(value) if value else None
+
+    # Prometheus の textfile collector 用ファイル（例: /var/lib/node_exporter/textfile/teams_sync.prom）。
+    # 未設定なら書き出さない
+    @cached_property
+    def METRICS_PROM_FILE(self) -> Path | None:
+        value = os.environ.get("METRICS_PROM_FILE", "")
+        return Path(value) if value else None
+
+    # ===== whisper.cpp =====
+    @cached_property
+    def WHISPER_BIN(self) -> Path:
+        return Path(_require_env("WHISPER_BIN"))
+
+    @cached_property
+    def WHISPER_MODEL(self) -> Path:
+        return Path(_require_env("WHISPER_MODEL"))
+
+    # 文字起こしバックエンド
+    #   subprocess: 会議ごとに WHISPER_BIN を起動する（従来の方式）
+    #   server    : モデルを読み込んだまま常駐する whisper-server に HTTP で依頼する。
+    #               サーバーに接続できない場合は subprocess にフォールバックする。
+    @cached_property
+    def WHISPER_BACKEND(self) -> str:
+        return _choice("WHISPER_BACKEND", "subprocess", ("subprocess", "server"))
+
+    @cached_property
+    def WHISPER_SERVER_URL(self) -> str:
+        return os.environ.get("WHISPER_SERVER_URL", "http://127.0.0.1:8178")
+
+    # 設定されていれば、サーバーが起動していないときにこのバイナリで起動する
+    @cached_property
+    def WHISPER_SERVER_BIN(self) -> str | None:
+        return os.environ.get("WHISPER_SERVER_BIN")
+
+    @cached_property
+    def WHISPER_SERVER_TIMEOUT(self) -> float:
+        return float(os.environ.get("WHISPER_SERVER_TIMEOUT", "3600"))
+
+    @cached_property
+    def WHISPER_SERVER_START_TIMEOUT(self) -> float:
+        return float(os.environ.get("WHISPER_SERVER_START_TIMEOUT", "120"))
+
+    # 分割並列文字起こし
+    #   TRANSCRIBE_JOBS が2以上で、音声が TRANSCRIBE_CHUNK_SECONDS より長い場合に有効。
+    #   ウィンドウ分割には wav ファイルが必要なため、この場合は AUDIO_MODE=file の経路を使う。
+    @cached_property
+    def TRANSCRIBE_JOBS(self) -> int:
+        return int(os.environ.get("TRANSCRIBE_JOBS", "1"))
+
+    @cached_property
+    def TRANSCRIBE_CHUNK_SECONDS(self) -> float:
+        return float(os.environ.get("TRANSCRIBE_CHUNK_SECONDS", "600"))
+
+    @cached_property
+    def TRANSCRIBE_CHUNK_OVERLAP(self) -> float:
+        return float(os.environ.get("TRANSCRIBE_CHUNK_OVERLAP", "10"))
+
+    # ===== ffmpeg =====
+    # パス通っていればデフォルト "ffmpeg" でOK。必要なら .env で FFMPEG_BIN を上書き。
+    @cached_property
+    def FFMPEG_BIN(self) -> str:
+        return os.environ.get("FFMPEG_BIN", "ffmpeg")
+
+    # 録画の長さを調べる ffprobe。未設定なら FFMPEG_BIN と同じ場所の ffprobe を使う
+    @cached_property
+    def FFPROBE_BIN(self) -> str:
+        value = os.environ.get("FFPROBE_BIN")
+        if value:
+            return value
+        ffmpeg = Path(self.FFMPEG_BIN)
+        return str(ffmpeg.with_name("ffprobe")) if ffmpeg.parent != Path(".") else "ffprobe"
+
+    # 無音の除去
+    #   leading: 先頭の無音だけを除去する（デフォルト）
+    #   vad    : silencedetect で SILENCE_MIN_SECONDS 以上の無音を会議の途中も含めてすべて切り落とし、
+    #            文字起こしの時刻を元の録画の時刻に戻す。whisper は速くなるが、
+    #            SILENCE_THRESHOLD_DB より小さい声の発言を無音とみなして落とすことがある
+    @cached_property
+    def SILENCE_REMOVAL(self) -> str:
+        return _choice("SILENCE_REMOVAL", "leading", ("leading", "vad"))
 
-# ===== パス関連 =====
-ONEDRIVE_MEETINGS_DIR = Path(_require_env("ONEDRIVE_MEETINGS_DIR"))
+    # この秒数以上続く無音を切る。切った箇所の前後には SILENCE_PADDING 秒ずつ無音を残す
+    @cached_property
+    def SILENCE_MIN_SECONDS(self) -> float:
+        return float(os.environ.get("SILENCE_MIN_SECONDS", "3"))
 
-DATA_DIR = BASE_DIR / "data"
-TRANSCRIPT_DIR = BASE_DIR / "transcripts"
-SUMMARY_DIR = BASE_DIR / "summaries"
-PROCESSED_DB = DATA_DIR / "processed_files.json"
+    @cached_property
+    def SILENCE_PADDING(self) -> float:
+        return float(os.environ.get("SILENCE_PADDING", "0.5"))
 
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-TRANSCRIPT_DIR.mkdir(parents=True, exist_ok=True)
-SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
+    # 無音とみなす音量（dB）
+    @cached_property
+    def SILENCE_THRESHOLD_DB(self) -> float:
+        return float(os.environ.get("SILENCE_THRESHOLD_DB", "-40"))
 
-# ===== whisper.cpp =====
-WHISPER_BIN = Path(_require_env("WHISPER_BIN"))
-WHISPER_MODEL = Path(_require_env("WHISPER_MODEL"))
+    # 音声の受け渡し方法
+    #   stream: ffmpeg の出力をパイプで whisper.cpp に渡す（中間wavを書かない）
+    #   file  : wav / -nosilence.wav を書き出してから whisper.cpp に渡す（従来の経路）
+    @cached_property
+    def AUDIO_MODE(self) -> str:
+        return _choice("AUDIO_MODE", "stream", ("stream", "file"))
 
-# ===== ffmpeg =====
-# パス通っていればデフォルト "ffmpeg" でOK。必要なら .env で FFMPEG_BIN を上書き。
-FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+    # 文字起こしの繰り返し（whisper の「ご視聴ありがとうございました」の連続など）の除去
+    #   同じ発話（空白・句読点を除いて比較）の行が TRANSCRIPT_REPEAT_MIN_RUN 行以上続いたら、
+    #   最初の1行だけを残す。0 にすると除去しない
+    @cached_property
+    def TRANSCRIPT_REPEAT_MIN_RUN(self) -> int:
+        return int(os.environ.get("TRANSCRIPT_REPEAT_MIN_RUN", "3"))
+
+    # 1行の中で同じ語句が4回以上続く部分を1回にまとめるか（on / off）
+    #   「いやいやいやいや」のような実際の発言も書き換えるので、既定は off
+    @cached_property
+    def TRANSCRIPT_INLINE_REPEAT(self) -> bool:
+        return _choice("TRANSCRIPT_INLINE_REPEAT", "off", ("on", "off")) == "on"
+
+    # ===== Notion =====
+    @cached_property
+    def NOTION_TOKEN(self) -> str:
+        return _require_env("NOTION_TOKEN")
+
+    @cached_property
+    def NOTION_DATABASE_ID(self) -> str:
+        return _require_env("NOTION_DATABASE_ID")
+
+    # テスト用のモックサーバーなどに向ける場合に上書きする
+    @cached_property
+    def NOTION_BASE_URL(self) -> str:
+        return os.environ.get("NOTION_BASE_URL", "https://api.notion.com")
+
+    # Notion API の平均リクエスト数/秒（公式の上限は約3 req/s）と、429/5xx のリトライ回数
+    #   リクエスト数/秒は、同じ処理状態DB を使う全プロセスの合計
+    @cached_property
+    def NOTION_RATE_LIMIT(self) -> float:
+        return float(os.environ.get("NOTION_RATE_LIMIT", "3"))
+
+    @cached_property
+    def NOTION_MAX_RETRIES(self) -> int:
+        return int(os.environ.get("NOTION_MAX_RETRIES", "5"))
+
+    # 録画のキー（パス + 内容ハッシュ）を保存するページプロパティ（rich_text）。
+    # 再実行時に既存ページを探して更新するために使う。データベースにそのプロパティがないと
+    # ページの作成が 400 になるので、既定は空（ローカルの記録だけで判定する）。
+    @cached_property
+    def NOTION_SOURCE_KEY_PROPERTY(self) -> str:
+        return os.environ.get("NOTION_SOURCE_KEY_PROPERTY", "")
+
+    # 文字起こしのレイアウト: flat（段落のみ） / heading（時間帯ごとに見出し） / toggle（時間帯ごとに折りたたみ）
+    @cached_property
+    def NOTION_TRANSCRIPT_LAYOUT(self) -> str:
+        return _choice("NOTION_TRANSCRIPT_LAYOUT", "flat", ("flat", "heading", "toggle"))
+
+    @cached_property
+    def NOTION_TRANSCRIPT_GROUP_MINUTES(self) -> float:
+        return float(os.environ.get("NOTION_TRANSCRIPT_GROUP_MINUTES", "10"))
+
+    # 送信キュー（outbox）: 1回に取り出す件数、バックグラウンド送信の間隔（秒）、
+    # 送信失敗（4xx など恒久的なエラー）を何回まで再試行するか
+    @cached_property
+    def NOTION_OUTBOX_BATCH(self) -> int:
+        return int(os.environ.get("NOTION_OUTBOX_BATCH", "20"))
+
+    @cached_property
+    def NOTION_OUTBOX_INTERVAL(self) -> float:
+        return float(os.environ.get("NOTION_OUTBOX_INTERVAL", "10"))
+
+    @cached_property
+    def NOTION_OUTBOX_MAX_ATTEMPTS(self) -> int:
+        return int(os.environ.get("NOTION_OUTBOX_MAX_ATTEMPTS", "5"))
+
+    # ===== LLM (Local Gateway) =====
+    # ゲートウェイURLとモデルは必須
+    @cached_property
+    def LLM_BASE_URL(self) -> str:
+        return _require_env("BASE_URL")
+
+    @cached_property
+    def LLM_MODEL(self) -> str:
+        return _require_env("MODEL")
+
+    @cached_property
+    def LLM_API_KEY(self) -> str | None:
+        return os.environ.get("API_KEY")  # APIキーは任意
+
+    # 複数の OpenAI 互換ゲートウェイに振り分ける場合は、URL をカンマ区切りで並べる
+    # （未設定なら BASE_URL の1台だけ）。モデル名と API キーはすべて共通
+    @cached_property
+    def LLM_BACKENDS(self) -> list[str]:
+        urls = [u.strip() for u in os.environ.get("LLM_BACKENDS", "").split(",") if u.strip()]
+        return urls or [self.LLM_BASE_URL]
+
+    # 1台あたりの同時リクエスト数の上限と、エラーになった台を外しておく秒数（連続すると倍々に延ばす）
+    @cached_property
+    def LLM_BACKEND_MAX_INFLIGHT(self) -> int:
+        return max(int(os.environ.get("LLM_BACKEND_MAX_INFLIGHT", "4")), 1)
+
+    @cached_property
+    def LLM_BACKEND_COOLDOWN(self) -> float:
+        return float(os.environ.get("LLM_BACKEND_COOLDOWN", "30"))
+
+    # ===== パイプライン並列度 =====
+    # CPUステージ(ffmpeg/whisper)のプロセス数と、ネットワークステージ(LLM/Notion)のスレッド数
+    @cached_property
+    def PIPELINE_CPU_JOBS(self) -> int:
+        return int(os.environ.get("PIPELINE_CPU_JOBS", "1"))
+
+    @cached_property
+    def PIPELINE_NET_JOBS(self) -> int:
+        return int(os.environ.get("PIPELINE_NET_JOBS", "2"))
+
+    # ===== 分散ワーカー（job_queue） =====
+    # ワーカーがジョブを確保しておく秒数（処理中は 1/3 ごとに延長する）。
+    # 延長が途絶えた（ワーカーが落ちた）ジョブは、この秒数が過ぎるとキューに戻る
+    @cached_property
+    def JOB_LEASE_SECONDS(self) -> float:
+        return float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+
+    # リースが切れた回数がこの回数に達したジョブは、ワーカーを落とす録画とみなして failed にする
+    @cached_property
+    def JOB_MAX_ATTEMPTS(self) -> int:
+        return int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+
+    # キューが空のときに次のジョブを探すまでの間隔（秒）
+    @cached_property
+    def JOB_POLL_INTERVAL(self) -> float:
+        return float(os.environ.get("JOB_POLL_INTERVAL", "10"))
+
+    # ===== 処理順（scheduler） =====
+    # fifo: 見つかった順 / shortest: 短い録画から / newest: 新しい録画から /
+    # priority: SCHEDULE_FOLDER_PRIORITY の優先度が高いフォルダから（同じなら短い順）
+    @cached_property
+    def SCHEDULE_POLICY(self) -> str:
+        return _choice("SCHEDULE_POLICY", "shortest", ("fifo", "shortest", "newest", "priority"))
+
+    # フォルダごとの優先度（ONEDRIVE_MEETINGS_DIR からの相対パス=整数 をカンマ区切り）。
+    # 例: "定例=10,全社/月次=-5"。一致しないフォルダは 0
+    @cached_property
+    def SCHEDULE_FOLDER_PRIORITY(self) -> dict[str, int]:
+        priorities: dict[str, int] = {}
+        for item in os.environ.get("SCHEDULE_FOLDER_PRIORITY", "").split(","):
+            if not item.strip():
+                continue
+            folder, sep, value = item.rpartition("=")
+            try:
+                if not sep or not folder.strip():
+                    raise ValueError
+                priorities[folder.strip().strip("/")] = int(value)
+            except ValueError:
+                raise RuntimeError(
+                    f"SCHEDULE_FOLDER_PRIORITY must be 'folder=int,...' (got '{item.strip()}')"
+                ) from None
+        return priorities
+
+    # ===== 要約 (map-reduce) =====
+    # 1回のLLM呼び出しに渡す文字起こしの上限（概算トークン数）。超える場合はチャンクに分割する。
+    @cached_property
+    def SUMMARY_CHUNK_TOKENS(self) -> int:
+        return int(os.environ.get("SUMMARY_CHUNK_TOKENS", "12000"))
+
+    # チャンク要約の同時実行数
+    @cached_property
+    def SUMMARY_MAX_PARALLEL(self) -> int:
+        return int(os.environ.get("SUMMARY_MAX_PARALLEL", "4"))
+
+    # 要約の表が不正だった場合に、不正な出力とエラーコードだけを送って直させる回数
+    @cached_property
+    def SUMMARY_REPAIR_ATTEMPTS(self) -> int:
+        return int(os.environ.get("SUMMARY_REPAIR_ATTEMPTS", "2"))
+
+    # LLM 応答キャッシュの上限サイズ（バイト）
+    @cached_property
+    def LLM_CACHE_MAX_BYTES(self) -> int:
+        return int(os.environ.get("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    """設定を返す。初回だけ .env を読み込む。"""
+    global _settings
+    if _settings is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _settings = Settings()
+    return _settings
+
+
+def __getattr__(name: str):
+    # `from .config import X` / `config.X` で参照された設定だけを評価する（PEP 562）
+    if not name.isupper() or not isinstance(getattr(Settings, name, None), cached_property):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(get_settings(), name)
+    # 2回目以降は通常のモジュール属性として参照される
+    globals()[name] = value
+    return value
 
-# ===== Notion =====
-NOTION_TOKEN = _require_env("NOTION_TOKEN")
-NOTION_DATABASE_ID = _require_env("NOTION_DATABASE_ID")
 
-# ===== LLM (Local Gateway) =====
-# ゲートウェイURLとモデルは必須
-LLM_BASE_URL = _require_env("BASE_URL")
-LLM_MODEL = _require_env("MODEL")
-LLM_API_KEY = os.environ.get("API_KEY")  # APIキーは任意
+def __dir__() -> list[str]:
+    names = [n for n, v in vars(Settings).items() if isinstance(v, cached_property)]
+    return sorted(set(globals()) | set(names))
@@ -1,17 +1,325 @@
 # src/teams_transcript_notion_sync/db.py
+"""
+処理状態DB（SQLite, WALモード。DB_JOURNAL_MODE=delete で従来のジャーナル）。
+
+以前の processed_files.json と同じく {パス: レコード} の形で読み書きできるが、
+更新は1行単位のトランザクションで行うため、履歴が増えても更新コストは一定で、
+複数プロセスから同時に書き込んでも更新が失われない。
+
+同じディレクトリに旧形式の JSON（<DB名>.json）があれば、初回接続時に取り込み、
+<DB名>.json.migrated にリネームする。
+"""
+
 import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, Iterator
+
+from .config import DB_JOURNAL_MODE
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS processed_files (
+        path TEXT PRIMARY KEY,
+        mtime INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        note TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_processed_files_status ON processed_files (status)",
+    # 内容ハッシュ -> 生成物（artifact_cache）
+    """
+    CREATE TABLE IF NOT EXISTS artifacts (
+        full_hash TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        partial_hash TEXT NOT NULL,
+        source_path TEXT NOT NULL,
+        wav_path TEXT,
+        transcript_path TEXT NOT NULL,
+        summary_path TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_artifacts_partial ON artifacts (size, partial_hash)",
+    # 会議ごとのステージチェックポイント（checkpoints）
+    """
+    CREATE TABLE IF NOT EXISTS stage_checkpoints (
+        path TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        output TEXT,
+        fingerprint TEXT NOT NULL,
+        input_fingerprint TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (path, stage)
+    )
+    """,
+    # LLM 応答キャッシュ（llm_cache）
+    """
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_used_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used_at)",
+    # 録画 -> Notion ページ/ブロックの対応（notion_writer.upsert_page）
+    """
+    CREATE TABLE IF NOT EXISTS notion_pages (
+        source_key TEXT PRIMARY KEY,
+        page_id TEXT NOT NULL,
+        props_hash TEXT NOT NULL,
+        block_ids TEXT NOT NULL,
+        block_hashes TEXT NOT NULL,
+        block_types TEXT,
+        updated_at REAL NOT NULL
+    )
+    """,
+    # Notion 送信待ちのページ（outbox）
+    """
+    CREATE TABLE IF NOT EXISTS notion_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT NOT NULL,
+        source_key TEXT,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        last_error TEXT,
+        artifacts TEXT,
+        created_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_notion_outbox_status ON notion_outbox (status, id)",
+    # 複数ワーカーで分担する会議のジョブキュー（job_queue）。seq の小さい順に取り出す
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        path TEXT PRIMARY KEY,
+        mtime INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        lease_until REAL,
+        last_error TEXT,
+        updated_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, seq)",
+    # 録画の長さ（scheduler）。size / mtime_ns が変わったら調べ直す
+    """
+    CREATE TABLE IF NOT EXISTS media_durations (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        duration REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    # プロセス間で共有するレート制限の残りトークン（rate_limit.SharedTokenBucket）
+    """
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        name TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    # ステージごとの計測値の累積（metrics.py）。labels は Prometheus 形式の 'stage="summary"' など
+    """
+    CREATE TABLE IF NOT EXISTS metrics (
+        name TEXT NOT NULL,
+        labels TEXT NOT NULL DEFAULT '',
+        value REAL NOT NULL,
+        PRIMARY KEY (name, labels)
+    )
+    """,
+]
+
+# 後から追加した列（既存のDBには ALTER TABLE で追加する）: (テーブル, 列, 定義)
+_ADDED_COLUMNS = [
+    ("processed_files", "attempts", "INTEGER NOT NULL DEFAULT 0"),
+    ("notion_outbox", "artifacts", "TEXT"),
+    ("notion_pages", "block_types", "TEXT"),
+]
+
+# 同時書き込み時にロック解放を待つ時間（ミリ秒）
+_BUSY_TIMEOUT_MS = 30_000
+
+# (pid, DBパス) ごとにスレッドローカルな接続を使い回す。
+# fork したワーカーに親の接続を持ち込まないよう pid もキーに含める。
+_local = threading.local()
+
+
+def _legacy_json_path(path: Path) -> Path:
+    return path.with_suffix(".json")
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """DBへの接続を返す（スキーマ作成と旧JSONの移行を含む）。"""
+    conns: Dict[tuple, sqlite3.Connection] = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    key = (os.getpid(), str(path))
+    conn = conns.get(key)
+    if conn is not None:
+        return conn
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS}")
+    with _transaction(conn):
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        _add_missing_columns(conn)
+        _migrate_legacy_json(conn, _legacy_json_path(path))
+
+    conns[key] = conn
+    return conn
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    # BEGIN IMMEDIATE で最初から書き込みロックを取り、読み取り→書き込みの競合を防ぐ
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@contextmanager
+def transaction(path: Path) -> Iterator[sqlite3.Connection]:
+    """書き込みトランザクションを開始する。ブロックを抜けるとコミットされる。"""
+    with _transaction(connect(path)) as conn:
+        yield conn
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    """古いスキーマで作られたDBに、後から追加した列を足す。"""
+    for table, column, decl in _ADDED_COLUMNS:
+        columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _migrate_legacy_json(conn: sqlite3.Connection, json_path: Path) -> None:
+    """旧形式の processed_files.json を取り込む（1度だけ）。"""
+    if not json_path.exists():
+        return
+
+    data: Dict[str, Any] = json.loads(json_path.read_text() or "{}")
+    now = time.time()
+    conn.executemany(
+        """
+        INSERT INTO processed_files (path, mtime, status, note, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (path) DO NOTHING
+        """,
+        [
+            (key, rec.get("mtime", 0), rec.get("status", "done"), rec.get("note"), now)
+            for key, rec in data.items()
+        ],
+    )
+    json_path.rename(json_path.with_name(json_path.name + ".migrated"))
+    print(f"[INFO] Migrated {len(data)} records from {json_path}")
+
+
+def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+    rec: Dict[str, Any] = {
+        "mtime": row["mtime"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+    }
+    if row["note"]:
+        rec["note"] = row["note"]
+    return rec
 
 
 def load_db(path: Path) -> Dict[str, Any]:
-    """JSONファイルからDBを読み込む。存在しない場合は空の辞書を返す。"""
-    if not path.exists():
-        return {}
-    return json.loads(path.read_text())
+    """DBを {パス: レコード} の辞書として読み込む。存在しない場合は空の辞書を返す。"""
+    rows = connect(path).execute("SELECT path, mtime, status, note, attempts FROM processed_files")
+    return {row["path"]: _row_to_record(row) for row in rows}
 
 
 def save_db(path: Path, data: Dict[str, Any]) -> None:
-    """DBをJSONファイルに保存する。"""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    """{パス: レコード} の辞書をまとめてDBに書き込む（既存のレコードは上書き）。"""
+    with transaction(path) as conn:
+        for key, rec in data.items():
+            _upsert(conn, key, rec)
+
+
+def get_record(path: Path, key: str) -> Dict[str, Any] | None:
+    """1件のレコードを取得する。"""
+    row = connect(path).execute(
+        "SELECT path, mtime, status, note, attempts FROM processed_files WHERE path = ?",
+        (key,),
+    ).fetchone()
+    return _row_to_record(row) if row else None
+
+
+def put_record(path: Path, key: str, rec: Dict[str, Any]) -> None:
+    """
+    1件のレコードを書き込む（存在すれば置き換える）。
+
+    attempts（失敗した回数）は status=error を書くたびに1増え、done になるか録画が
+    更新される（mtime が変わる）と 0 に戻る。rec の attempts は使わない。
+    """
+    with transaction(path) as conn:
+        _upsert(conn, key, rec)
+
+
+def count_by_status(path: Path) -> Dict[str, int]:
+    """status ごとの件数を返す。"""
+    rows = connect(path).execute(
+        "SELECT status, COUNT(*) AS n FROM processed_files GROUP BY status ORDER BY status"
+    )
+    return {row["status"]: row["n"] for row in rows}
+
+
+def count_jobs_by_status(path: Path) -> Dict[str, int]:
+    """ジョブキュー（job_queue）の status ごとの件数を返す。"""
+    rows = connect(path).execute(
+        "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status ORDER BY status"
+    )
+    return {row["status"]: row["n"] for row in rows}
+
+
+def _upsert(conn: sqlite3.Connection, key: str, rec: Dict[str, Any]) -> None:
+    conn.execute(
+        """
+        INSERT INTO processed_files (path, mtime, status, note, attempts, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET
+            attempts = CASE
+                WHEN excluded.status = 'done' OR processed_files.mtime != excluded.mtime
+                THEN excluded.attempts
+                ELSE processed_files.attempts + excluded.attempts
+            END,
+            mtime = excluded.mtime,
+            status = excluded.status,
+            note = excluded.note,
+            updated_at = excluded.updated_at
+        """,
+        (
+            key,
+            rec["mtime"],
+            rec["status"],
+            rec.get("note"),
+            int(rec["status"] == "error"),
+            time.time(),
+        ),
+    )
@@ -0,0 +1,348 @@
+# src/teams_transcript_notion_sync/job_queue.py
+"""
+複数のワーカーで会議を分担するジョブキュー（処理状態DB の jobs テーブル）。
+
+    teams-transcript-notion-sync enqueue   # find_new_mp4s の結果を SCHEDULE_POLICY の順に積む
+    teams-transcript-notion-sync worker    # ジョブを1件ずつ取り出して処理する（何台・何プロセスでも）
+
+ワーカーは同じホストの複数プロセスでも、APP_BASE_DIR（DB・文字起こし・要約）と
+ONEDRIVE_MEETINGS_DIR を同じパスで共有する複数ホストでもよい（複数ホストの場合は DB_JOURNAL_MODE=delete）。
+
+    pending --claim--> leased --complete--> done
+       ^                 |  \\--fail-------> failed（処理中のエラー。会議は status=error）
+       +---リース切れ----+    （リース切れが JOB_MAX_ATTEMPTS 回に達したら failed）
+
+- 取り出しは1つの書き込みトランザクションで行うので、同じジョブを2つのワーカーが取ることはない。
+- 処理中は JOB_LEASE_SECONDS の 1/3 ごとにリースを延長する（ハートビート）。ワーカーが落ちたり
+  止まったりしてリースが切れたジョブは、次に取り出そうとしたワーカーがキューに戻す。
+- 文字起こしの後にリースを確かめ、失っていれば（別のワーカーが引き継いでいるので）要約と
+  Notion の送信キューには進まない。引き継いだワーカーはチェックポイントから再開する。
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from .config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+    PROCESSED_DB,
+    WHISPER_BACKEND,
+)
+from .db import count_jobs_by_status, transaction
+from .scanner import mark_processed
+
+
+@dataclass
+class Lease:
+    """ワーカーが確保したジョブ。"""
+
+    path: Path
+    worker: str
+    attempts: int
+
+
+def worker_id() -> str:
+    """このプロセスのワーカー名（ホスト名:pid）。"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ===== キューの操作 =====
+
+
+def enqueue(paths: Iterable[Path]) -> int:
+    """
+    録画を渡された順にキューの末尾に積み、新しく積んだ件数を返す。
+
+    積み済みの録画は、処理中でなく、更新されて（mtime が変わって）いるか前回失敗していれば積み直す
+    （失敗した会議を選ぶかどうかは find_new_mp4s が MEETING_MAX_ATTEMPTS で判断する）。
+    """
+    now = time.time()
+    added = 0
+    with transaction(PROCESSED_DB) as conn:
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) AS n FROM jobs").fetchone()["n"]
+        for path in paths:
+            seq += 1
+            cur = conn.execute(
+                """
+                INSERT INTO jobs (path, mtime, seq, status, attempts, updated_at)
+                VALUES (?, ?, ?, 'pending', 0, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    mtime = excluded.mtime,
+                    seq = excluded.seq,
+                    status = 'pending',
+                    attempts = 0,
+                    worker = NULL,
+                    lease_until = NULL,
+                    last_error = NULL,
+                    updated_at = excluded.updated_at
+                WHERE jobs.status != 'leased'
+                    AND (jobs.mtime != excluded.mtime OR jobs.status = 'failed')
+                """,
+                (str(path), int(path.stat().st_mtime), seq, now),
+            )
+            added += cur.rowcount
+    return added
+
+
+def _requeue_expired(conn: sqlite3.Connection, now: float) -> List[tuple[str, str]]:
+    """リースの切れたジョブをキューに戻し、諦めたジョブの (path, エラー) を返す。"""
+    gave_up: List[tuple[str, str]] = []
+    rows = conn.execute(
+        "SELECT path, worker, attempts FROM jobs WHERE status = 'leased' AND lease_until < ?",
+        (now,),
+    ).fetchall()
+    for row in rows:
+        name = Path(row["path"]).name
+        if row["attempts"] >= JOB_MAX_ATTEMPTS:
+            error = f"lease expired {row['attempts']} times (last worker: {row['worker']})"
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', worker = NULL, lease_until = NULL,
+                    last_error = ?, updated_at = ?
+                WHERE path = ?
+                """,
+                (error, now, row["path"]),
+            )
+            print(f"[ERROR] Giving up {name}: {error}")
+            gave_up.append((row["path"], error))
+        else:
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'pending', worker = NULL, lease_until = NULL,
+                    last_error = ?, updated_at = ?
+                WHERE path = ?
+                """,
+                (f"lease expired (worker: {row['worker']})", now, row["path"]),
+            )
+            print(f"[WARN] Lease on {name} held by {row['worker']} expired; returning it to the queue")
+    return gave_up
+
+
+def claim(worker: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Lease | None:
+    """キューの先頭のジョブを lease_seconds 秒確保する（空なら None）。"""
+    now = time.time()
+    with transaction(PROCESSED_DB) as conn:
+        gave_up = _requeue_expired(conn, now)
+        row = conn.execute(
+            "SELECT path, attempts FROM jobs WHERE status = 'pending' ORDER BY seq LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE path = ?
+                """,
+                (worker, now + lease_seconds, now, row["path"]),
+            )
+    for path, error in gave_up:
+        _set_meeting_status(Path(path), "error", error)
+    if row is None:
+        return None
+    return Lease(Path(row["path"]), worker, row["attempts"] + 1)
+
+
+def _update_leased(lease: Lease, assignments: str, params: tuple) -> bool:
+    """自分がリースを持っているジョブだけを更新し、更新できたかを返す。"""
+    with transaction(PROCESSED_DB) as conn:
+        cur = conn.execute(
+            f"""
+            UPDATE jobs SET {assignments}, updated_at = ?
+            WHERE path = ? AND worker = ? AND status = 'leased'
+            """,
+            (*params, time.time(), str(lease.path), lease.worker),
+        )
+    return cur.rowcount == 1
+
+
+def renew(lease: Lease, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+    """リースを延長する。すでに失っていれば（切れて別のワーカーに渡った）False。"""
+    return _update_leased(lease, "lease_until = ?", (time.time() + lease_seconds,))
+
+
+def complete(lease: Lease) -> bool:
+    return _update_leased(lease, "status = 'done', lease_until = NULL", ())
+
+
+def fail(lease: Lease, error: Exception) -> bool:
+    return _update_leased(
+        lease, "status = 'failed', lease_until = NULL, last_error = ?", (str(error),)
+    )
+
+
+def release(lease: Lease) -> bool:
+    """処理を中断したジョブを、リースが切れるのを待たずにキューに戻す。"""
+    return _update_leased(lease, "status = 'pending', worker = NULL, lease_until = NULL", ())
+
+
+def count_by_status() -> Dict[str, int]:
+    """ジョブの status ごとの件数。"""
+    return count_jobs_by_status(PROCESSED_DB)
+
+
+def _set_meeting_status(mp4: Path, status: str, note: str | None = None) -> None:
+    try:
+        mark_processed(mp4, status=status, note=note)
+    except Exception as e:
+        # 状態記録の失敗でワーカーを止めない
+        print(f"[ERROR] failed to update status for {mp4}: {e}")
+
+
+# ===== コーディネーター / ワーカー =====
+
+
+def enqueue_new_meetings() -> int:
+    """新しい録画を SCHEDULE_POLICY の順にキューに積み、新しく積んだ件数を返す。"""
+    from . import scheduler
+    from .scanner import find_new_mp4s
+
+    files = find_new_mp4s()
+    added = enqueue(job.path for job in scheduler.plan(files)) if files else 0
+    counts = count_by_status()
+    print(
+        f"[INFO] Enqueued {added} meeting(s); queue: "
+        f"pending {counts.get('pending', 0)}, leased {counts.get('leased', 0)}"
+    )
+    return added
+
+
+class Heartbeat:
+    """処理中のジョブのリースを一定間隔で延長するスレッド。"""
+
+    def __init__(self, lease: Lease, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-heartbeat", daemon=True)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not renew(self.lease, self.lease_seconds):
+                    print(f"[WARN] Lost the lease on {self.lease.path.name}")
+                    self.lost.set()
+                    return
+            except Exception as e:
+                # DB が一時的にロックされているなどは次の間隔で再試行する
+                print(f"[WARN] Failed to renew the lease on {self.lease.path.name}: {e}")
+
+
+def _process(lease: Lease, lease_seconds: float) -> bool:
+    """確保したジョブを処理する。Notion の送信キューに積めたら True。"""
+    from .pipeline import publish_stage, transcribe_stage
+
+    mp4 = lease.path
+    print(f"[INFO] Claimed {mp4.name} (attempt {lease.attempts}) as {lease.worker}")
+    try:
+        with Heartbeat(lease, lease_seconds) as heartbeat:
+            transcribe_stage(mp4)
+            # 文字起こしの間にリースが切れていたら、引き継いだワーカーに任せる
+            if heartbeat.lost.is_set() or not renew(lease, lease_seconds):
+                print(f"[WARN] Skipping {mp4.name}: another worker has taken it over")
+                return False
+            _set_meeting_status(mp4, "transcribed")
+            publish_stage(mp4)
+    except Exception as e:
+        print(f"[ERROR] while processing {mp4}: {e}")
+        _set_meeting_status(mp4, "error", str(e))
+        fail(lease, e)
+        return False
+    except BaseException:
+        # Ctrl+C などで中断した場合は、すぐに他のワーカーが取れるようにする
+        release(lease)
+        raise
+    complete(lease)
+    return True
+
+
+def run_worker(
+    *,
+    drain: bool = False,
+    lease_seconds: float = JOB_LEASE_SECONDS,
+    poll_interval: float = JOB_POLL_INTERVAL,
+    stop: threading.Event | None = None,
+) -> int:
+    """
+    キューからジョブを1件ずつ取り出して処理し、処理した件数を返す。
+
+    drain=True なら、取り出せるジョブも処理中のジョブもなくなった時点で終了する。そうでなければ Ctrl+C / SIGTERM
+    （または stop.set()）まで、poll_interval 秒ごとに新しいジョブを待つ。
+    """
+    from . import outbox
+
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    if WHISPER_BACKEND == "server":
+        from .whisper_server import ensure_server
+
+        if not ensure_server():
+            print("[WARN] whisper server is not available; using subprocess mode")
+
+    worker = worker_id()
+    processed = 0
+    print(f"[INFO] Worker {worker} started")
+    # Notion への送信はワーカーごとに行う（outbox は行を確保してから送るので重複しない）
+    with outbox.OutboxFlusher() as flusher:
+        try:
+            while not stop.is_set():
+                lease = claim(worker, lease_seconds)
+                if lease is None:
+                    # drain でも、他のワーカーが処理中のジョブがあれば（落ちてリースが切れたら
+                    # 引き継げるように）待つ
+                    if drain and not count_by_status().get("leased"):
+                        break
+                    stop.wait(poll_interval)
+                    continue
+                if _process(lease, lease_seconds):
+                    processed += 1
+                    flusher.notify()
+        except KeyboardInterrupt:
+            pass
+    print(f"[INFO] Worker {worker} stopped after {processed} meeting(s)")
+    return processed
+
+
+def run_workers(processes: int, *, drain: bool = False) -> None:
+    """このホストで processes 個のワーカープロセスを起動し、すべて終わるまで待つ。"""
+    if processes <= 1:
+        run_worker(drain=drain)
+        return
+
+    import multiprocessing
+
+    workers = [
+        multiprocessing.Process(target=run_worker, kwargs={"drain": drain}, name=f"worker-{i}")
+        for i in range(processes)
+    ]
+    for p in workers:
+        p.start()
+    # SIGTERM は各ワーカーに伝え、処理中の会議を終えてから止めさせる
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in workers])
+    try:
+        for p in workers:
+            p.join()
+    except KeyboardInterrupt:
+        # Ctrl+C は子プロセスにも届くので、それぞれが中断したジョブを戻すのを待つ
+        for p in workers:
+            p.join()
@@ -0,0 +1,68 @@
+# src/teams_transcript_notion_sync/llm_cache.py
+"""
+LLM 応答の永続キャッシュ。
+
+キーは (モデル名, メッセージのハッシュ)。同じ文字起こしを再要約するとき
+（Notion の失敗後のリトライや rerun など）に LLM を呼び直さない。
+合計サイズが LLM_CACHE_MAX_BYTES を超えたら、最後に使われたのが古いものから削除する。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from typing import Any, List
+
+from .config import LLM_CACHE_MAX_BYTES, PROCESSED_DB
+from .db import connect, transaction
+
+
+def cache_key(model: str, messages: List[dict[str, Any]]) -> str:
+    payload = json.dumps([model, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get(model: str, messages: List[dict[str, Any]]) -> str | None:
+    """キャッシュ済みの応答を返す。なければ None。"""
+    key = cache_key(model, messages)
+    conn = connect(PROCESSED_DB)
+    row = conn.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    with transaction(PROCESSED_DB) as tx:
+        tx.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (time.time(), key))
+    return row["response"]
+
+
+def put(model: str, messages: List[dict[str, Any]], response: str) -> None:
+    """応答をキャッシュし、上限を超えた分を古い順に削除する。"""
+    key = cache_key(model, messages)
+    now = time.time()
+    with transaction(PROCESSED_DB) as conn:
+        conn.execute(
+            """
+            INSERT INTO llm_cache (key, model, response, size, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                response = excluded.response,
+                size = excluded.size,
+                last_used_at = excluded.last_used_at
+            """,
+            (key, model, response, len(response.encode()), now, now),
+        )
+        _evict(conn, LLM_CACHE_MAX_BYTES)
+
+
+def _evict(conn, max_bytes: int) -> None:
+    rows = conn.execute(
+        "SELECT key, size FROM llm_cache ORDER BY last_used_at DESC"
+    ).fetchall()
+    total = 0
+    stale = []
+    for row in rows:
+        total += row["size"]
+        if total > max_bytes:
+            stale.append((row["key"],))
+    if stale:
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", stale)
@@ -0,0 +1,196 @@
+# src/teams_transcript_notion_sync/llm_router.py
+"""
+複数の OpenAI 互換ゲートウェイへの LLM リクエストの振り分け。
+
+LLM_BACKENDS に並べたゲートウェイごとに OpenAI クライアント（= コネクションプール）を
+1つずつ持ち、プロセス内のすべての要約で使い回す。
+
+    - 振り分け: 正常な台のうち、(処理中の件数 + 1) × 応答時間の移動平均 が最も小さい台
+                （まだ応答のない台は 0 とみなして優先的に試す）
+    - 上限    : 1台あたり LLM_BACKEND_MAX_INFLIGHT 件まで。全台が埋まっていれば空くまで待つ
+    - 切り替え: 接続エラー / タイムアウト / 408 / 409 / 429 / 5xx なら、その台を LLM_BACKEND_COOLDOWN 秒
+                （連続すると倍々に延ばす）外して、まだ試していない台に送り直す。
+                400 などリクエスト自体の誤りは、どの台でも同じなのでそのまま送出する
+
+全台が外れている場合は、いちばん早く復帰する台に送る（何もせずに失敗するよりはよい）。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from . import metrics
+from .config import (
+    LLM_API_KEY,
+    LLM_BACKEND_COOLDOWN,
+    LLM_BACKEND_MAX_INFLIGHT,
+    LLM_BACKENDS,
+)
+
+if TYPE_CHECKING:
+    import openai
+
+# 応答時間の移動平均（EWMA）で、最新の応答に与える重み
+_LATENCY_ALPHA = 0.3
+# 外しておく時間の上限（秒）
+_MAX_COOLDOWN = 600.0
+
+
+def _is_transient(error: Exception) -> bool:
+    """別の台に送り直せば成功する見込みがあるエラーか。"""
+    import openai
+
+    if isinstance(error, openai.APIStatusError):
+        status = getattr(error, "status_code", None) or 0
+        return status in (408, 409, 429) or status >= 500
+    return isinstance(error, openai.APIConnectionError)
+
+
+class Backend:
+    """1台のゲートウェイと、その負荷・健全性の状態（Router のロックの中で更新する）。"""
+
+    def __init__(self, url: str, client: "openai.OpenAI", max_inflight: int):
+        self.url = url
+        self.client = client
+        self.max_inflight = max_inflight
+        self.in_flight = 0
+        self.latency: float | None = None  # 応答時間の移動平均（秒）
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0  # 連続したエラーの回数
+        self.unhealthy_until = 0.0
+
+    def cost(self) -> float:
+        """この台に今送った場合の、応答までの見込み時間。"""
+        return (self.in_flight + 1) * (self.latency or 0.0)
+
+
+class Router:
+    """LLM_BACKENDS への振り分けを行う。スレッドセーフ。"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        *,
+        api_key: str | None = None,
+        max_inflight: int = LLM_BACKEND_MAX_INFLIGHT,
+        cooldown: float = LLM_BACKEND_COOLDOWN,
+    ):
+        if not urls:
+            raise ValueError("LLM のバックエンドを1つ以上指定してください")
+        # openai の import は重いので、最初に要約するときまで遅らせる
+        import openai
+
+        # 複数台あるときは、同じ台で待って再試行するより別の台に送り直すほうが早い
+        options: Dict[str, Any] = {"max_retries": 0} if len(urls) > 1 else {}
+        self.backends = [
+            Backend(url, openai.OpenAI(api_key=api_key, base_url=url, **options), max_inflight)
+            for url in urls
+        ]
+        self.cooldown = cooldown
+        self._cond = threading.Condition()
+
+    def _acquire(self, tried: List[Backend]) -> Backend:
+        """まだ試していない台のうち、最も空いている台を確保する（全台が上限なら待つ）。"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                candidates = [b for b in self.backends if b not in tried]
+                healthy = [b for b in candidates if b.unhealthy_until <= now]
+                pool = healthy or [min(candidates, key=lambda b: b.unhealthy_until)]
+                free = [b for b in pool if b.in_flight < b.max_inflight]
+                if free:
+                    backend = min(free, key=Backend.cost)
+                    backend.in_flight += 1
+                    return backend
+                # 空きが出るか、外していた台が復帰するまで待つ
+                recovering = [b.unhealthy_until - now for b in candidates if b.unhealthy_until > now]
+                self._cond.wait(min(recovering) if recovering else None)
+
+    def _release(
+        self,
+        backend: Backend,
+        *,
+        elapsed: float | None = None,
+        error: Exception | None = None,
+    ) -> float:
+        """
+        確保した台を返し、外しておく秒数を返す。
+
+        elapsed: 成功した応答の所要時間。応答時間の平均に入れ、台を正常に戻す
+        error  : 一時的なエラー。台を外す
+        どちらもなければ（400 などリクエスト側の誤り）、台の状態は変えない。
+        """
+        with self._cond:
+            backend.in_flight -= 1
+            backend.requests += 1
+            cooldown = 0.0
+            if elapsed is not None:
+                backend.latency = (
+                    elapsed
+                    if backend.latency is None
+                    else _LATENCY_ALPHA * elapsed + (1 - _LATENCY_ALPHA) * backend.latency
+                )
+                backend.failures = 0
+                backend.unhealthy_until = 0.0
+            elif error is not None:
+                backend.errors += 1
+                backend.failures += 1
+                cooldown = min(self.cooldown * 2 ** (backend.failures - 1), _MAX_COOLDOWN)
+                backend.unhealthy_until = time.monotonic() + cooldown
+            self._cond.notify_all()
+            return cooldown
+
+    def chat(self, **kwargs: Any) -> Any:
+        """chat.completions.create(**kwargs) を最も空いている台に送る。"""
+        tried: List[Backend] = []
+        while True:
+            backend = self._acquire(tried)
+            start = time.monotonic()
+            try:
+                res = backend.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                transient = _is_transient(e)
+                cooldown = self._release(backend, error=e if transient else None)
+                tried.append(backend)
+                if not transient or len(tried) == len(self.backends):
+                    raise
+                print(
+                    f"[WARN] LLM backend {backend.url} failed ({e.__class__.__name__}); "
+                    f"retrying on another backend (cooldown {cooldown:.0f}s)"
+                )
+                metrics.add(llm_failovers=1)
+                continue
+            self._release(backend, elapsed=time.monotonic() - start)
+            return res
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """台ごとの状態（ベンチマークや調査用）。"""
+        with self._cond:
+            now = time.monotonic()
+            return [
+                {
+                    "url": b.url,
+                    "requests": b.requests,
+                    "errors": b.errors,
+                    "in_flight": b.in_flight,
+                    "latency": b.latency,
+                    "healthy": b.unhealthy_until <= now,
+                }
+                for b in self.backends
+            ]
+
+
+_router: Router | None = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> Router:
+    """会議をまたいで使い回す Router を返す（クライアントの作成は初回だけ）。"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = Router(LLM_BACKENDS, api_key=LLM_API_KEY)
+        return _router
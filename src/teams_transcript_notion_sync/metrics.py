@@ -0,0 +1,229 @@
+# src/teams_transcript_notion_sync/metrics.py
+"""
+ステージごとの計測（処理時間・入力サイズ・結果・リトライ回数）。
+
+    with metrics.stage("summary", mp4):
+        ...
+        metrics.add(llm_prompt_tokens=1234)   # ステージの内側のどこからでも加算できる
+
+1回のステージ実行ごとに、METRICS_LOG に JSON Lines で1行追記する。
+
+    {"time": ..., "event": "stage", "stage": "summary", "path": "...", "status": "ok",
+     "duration": 12.3, "retries": 0, "transcript_chars": 52000, "llm_prompt_tokens": 20000, ...}
+
+あわせて累積値を処理状態DBに集計し、METRICS_PROM_FILE が設定されていれば
+Prometheus の textfile collector 用のファイルを書き出す（ワーカープロセスからの分も合算される）。
+
+文字起こしについては、音声の長さに対する処理時間の比（realtime factor）も記録する。
+計測や書き出しに失敗しても、会議の処理は止めない。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, TypeVar
+
+from .config import METRICS_LOG, METRICS_PROM_FILE, PROCESSED_DB
+from .db import connect, transaction
+
+_PREFIX = "teams_sync"
+T = TypeVar("T")
+
+
+class StageTimer:
+    """実行中の1ステージ分の計測値。"""
+
+    def __init__(self, stage: str, path: Path):
+        self.stage = stage
+        self.path = path
+        self.values: Dict[str, float] = {}
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **values: float) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self.values[key] = self.values.get(key, 0) + value
+
+
+_current: ContextVar[StageTimer | None] = ContextVar("metrics_stage", default=None)
+
+
+def add(**values: float) -> None:
+    """実行中のステージに計測値を加算する（ステージの外で呼ばれた場合は何もしない）。"""
+    timer = _current.get()
+    if timer is not None:
+        timer.add(**values)
+
+
+def bind(fn: Callable[..., T]) -> Callable[..., T]:
+    """スレッドプールに渡す関数を、呼び出し元のステージに計測値を加算するように包む。"""
+    timer = _current.get()
+
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        token = _current.set(timer)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return wrapper
+
+
+@contextmanager
+def stage(name: str, path: Path) -> Iterator[StageTimer]:
+    """ブロックの実行を1ステージとして計測する。"""
+    timer = StageTimer(name, path)
+    token = _current.set(timer)
+    start = time.perf_counter()
+    error: BaseException | None = None
+    try:
+        yield timer
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        duration = timer.duration = time.perf_counter() - start
+        status = "ok" if error is None else "error"
+        event = {
+            "event": "stage",
+            "stage": name,
+            "path": str(path),
+            "status": status,
+            "duration": round(duration, 6),
+            "retries": 0,
+            **timer.values,
+        }
+        if error is not None:
+            event["error"] = f"{type(error).__name__}: {error}"
+        _write_event(event)
+
+        counters = {
+            (f"{_PREFIX}_stage_runs_total", f'stage="{name}",status="{status}"'): 1,
+            (f"{_PREFIX}_stage_duration_seconds_sum", f'stage="{name}"'): duration,
+            (f"{_PREFIX}_stage_duration_seconds_count", f'stage="{name}"'): 1,
+        }
+        for key, value in timer.values.items():
+            counters[(f"{_PREFIX}_stage_{key}_total", f'stage="{name}"')] = value
+        gauges = {(f"{_PREFIX}_stage_last_duration_seconds", f'stage="{name}"'): duration}
+        _update(counters, gauges)
+
+
+def record_realtime_factor(path: Path, audio_seconds: float, processing_seconds: float) -> None:
+    """音声の長さと文字起こしまでの処理時間から realtime factor を記録する。"""
+    if audio_seconds <= 0:
+        return
+    rtf = processing_seconds / audio_seconds
+    _write_event(
+        {
+            "event": "realtime_factor",
+            "path": str(path),
+            "audio_seconds": round(audio_seconds, 3),
+            "processing_seconds": round(processing_seconds, 6),
+            "realtime_factor": round(rtf, 6),
+        }
+    )
+    print(f"[INFO] Realtime factor {rtf:.3f} ({processing_seconds:.1f}s for {audio_seconds:.0f}s of audio)")
+    _update(
+        {
+            (f"{_PREFIX}_realtime_factor_sum", ""): rtf,
+            (f"{_PREFIX}_realtime_factor_count", ""): 1,
+        },
+        {(f"{_PREFIX}_realtime_factor_last", ""): rtf},
+    )
+
+
+def observed_mean(name: str, labels: str = "") -> float | None:
+    """これまでに記録した summary 型の値（_sum / _count）の平均。記録がなければ None。"""
+    rows = dict(
+        connect(PROCESSED_DB).execute(
+            "SELECT name, value FROM metrics WHERE name IN (?, ?) AND labels = ?",
+            (f"{_PREFIX}_{name}_sum", f"{_PREFIX}_{name}_count", labels),
+        ).fetchall()
+    )
+    count = rows.get(f"{_PREFIX}_{name}_count")
+    if not count:
+        return None
+    return rows.get(f"{_PREFIX}_{name}_sum", 0.0) / count
+
+
+def _write_event(event: Dict[str, Any]) -> None:
+    if not METRICS_LOG:
+        return
+    line = json.dumps({"time": round(time.time(), 3), "pid": os.getpid(), **event}, ensure_ascii=False)
+    try:
+        METRICS_LOG.parent.mkdir(parents=True, exist_ok=True)
+        # O_APPEND で1行を1回の write で書くので、複数プロセスから追記しても行が混ざらない
+        fd = os.open(METRICS_LOG, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (line + "\n").encode())
+        finally:
+            os.close(fd)
+    except OSError as e:
+        print(f"[WARN] Failed to write metrics log: {e}")
+
+
+def _update(counters: Dict[tuple, float], gauges: Dict[tuple, float]) -> None:
+    """累積値（カウンター）と最新値（ゲージ）をDBに反映し、textfile を書き直す。"""
+    try:
+        with transaction(PROCESSED_DB) as conn:
+            conn.executemany(
+                """
+                INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?)
+                ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value
+                """,
+                [(name, labels, value) for (name, labels), value in counters.items()],
+            )
+            conn.executemany(
+                """
+                INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?)
+                ON CONFLICT (name, labels) DO UPDATE SET value = excluded.value
+                """,
+                [(name, labels, value) for (name, labels), value in gauges.items()],
+            )
+        if METRICS_PROM_FILE:
+            write_prometheus(METRICS_PROM_FILE)
+    except Exception as e:
+        print(f"[WARN] Failed to update metrics: {e}")
+
+
+def _metric_type(name: str) -> tuple[str, str]:
+    """(TYPE 行に書く名前, 種類) を返す。"""
+    for suffix in ("_sum", "_count"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)], "summary"
+    if name.endswith("_total"):
+        return name, "counter"
+    return name, "gauge"
+
+
+def render_prometheus() -> str:
+    """集計済みの値を Prometheus のテキスト形式で返す。"""
+    rows = connect(PROCESSED_DB).execute(
+        "SELECT name, labels, value FROM metrics ORDER BY name, labels"
+    ).fetchall()
+    lines = []
+    declared = set()
+    for row in sorted(rows, key=lambda r: (_metric_type(r["name"])[0], r["name"], r["labels"])):
+        base, kind = _metric_type(row["name"])
+        if base not in declared:
+            lines.append(f"# TYPE {base} {kind}")
+            declared.add(base)
+        labels = f"{{{row['labels']}}}" if row["labels"] else ""
+        lines.append(f"{row['name']}{labels} {float(row['value'])!r}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path) -> None:
+    """textfile collector 用のファイルをアトミックに書き出す。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(render_prometheus())
+    os.replace(tmp, path)
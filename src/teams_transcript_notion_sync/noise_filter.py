@@ -23,14 +23,38 @@ Teams + whisper.cpp の文字起こしでは、以下のように「存在しな
 ------------
 このフィルターは「正解の発話者名リスト」を持たないヒューリスティックです。
 そのため、ラベルと見なす条件はできるだけ控えめにしてあります。
+
+繰り返しの除去
+--------------
+whisper.cpp は無音や雑音の続く区間で、同じ行を何十回も出力することがあります。
+
+    [01:02:03.000 --> 01:02:05.000]  ご視聴ありがとうございました
+    [01:02:05.000 --> 01:02:07.000]  ご視聴ありがとうございました。
+    ...
+
+collapse_lines は、同じ発話（空白・句読点・全角半角の違いは無視）の行が min_run 行以上
+連続した場合に、最初の1行（とそのタイムスタンプ）だけを残します。間に別の発話が入った行や、
+2回程度の相づち（「はい」「はい」）は実際の発言でもあり得るので残します。
+1行の中で同じ語句が4回以上続く部分を1回にまとめる処理（inline）は、「いやいやいやいや」のような
+実際の発言も書き換えてしまうため、明示的に有効にした場合だけ行います。
+要約の文字数の上限と Notion のブロック数を、意味のない繰り返しで使い切らないためのものです。
 """
 
 from __future__ import annotations
 
+import os
 import re
+import shutil
+import tempfile
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
 
 
 # Teams の txt/vtt 出力に見られるタイムスタンプ行の前置きを検出する。
+# （_TIMESTAMP_PREFIX_RE / _SPEAKER_LABEL_RE は従来の2段階の判定。処理には _LINE_RE を使い、
+#  これらはベンチマークで従来実装と比較するために残している）
 # 先頭の "[00:10:51.000 --> 00:10:53.000]" 部分は残したいので、2グループに分ける。
 _TIMESTAMP_PREFIX_RE = re.compile(
     r"^(\s*\[[0-9:.]+\s*-->\s*[0-9:.]+\]\s*)(.*)$"
@@ -45,11 +69,231 @@ _TIMESTAMP_PREFIX_RE = re.compile(
 #
 # これにより、例えば「URL: https://…」のような行内コロンは
 # 行頭かつ短いラベルでない限りマッチしにくくする。
+_LABEL_CHARS = r"[A-Za-z0-9_\-\u3040-\u30ff\u3400-\u9fff\u30fc]"
 _SPEAKER_LABEL_RE = re.compile(
-    r"^(?P<label>[A-Za-z0-9_\-\u3040-\u30ff\u3400-\u9fff\u30fc]{1,20})\s*[:：](?P<utterance>\S.*)$"
+    rf"^(?P<label>{_LABEL_CHARS}{{1,20}})\s*[:：](?P<utterance>\S.*)$"
+)
+
+# 上の2つを1回で判定する正規表現。
+# keep = 行頭の空白 +（あれば）タイムスタンプとその後の空白。ラベルがあれば keep の直後にマッチする。
+# 1行につき match 1回で済み、ラベルのない行（大半）は文字列を作り直さない。
+_LINE_RE = re.compile(
+    rf"(?P<keep>\s*(?:\[[0-9:.]+\s*-->\s*[0-9:.]+\]\s*)?)"
+    rf"(?:{_LABEL_CHARS}{{1,20}}\s*[:：](?=\S))?"
 )
 
 
+# 繰り返しの判定で無視する文字（空白・句読点・記号）
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+# 1行の中で、2〜20文字の語句が（区切りをはさんで）4回以上続く部分
+_INLINE_REPEAT_RE = re.compile(r"(\S.{1,19}?)(?:[\s、。,.!?！？]*\1){3,}")
+
+
+@dataclass
+class RepeatStats:
+    """collapse_lines で取り除いた量。"""
+
+    lines_removed: int = 0
+    chars_removed: int = 0  # 捨てた行の改行と、1行の中でまとめた繰り返しを含む
+
+
+def _repeat_key(text: str) -> str:
+    return _NON_WORD_RE.sub("", unicodedata.normalize("NFKC", text)).lower()
+
+
+def clean_line(line: str) -> str:
+    """
+    1行（改行を含まない）から行頭の「発話者ラベル:」ノイズを削除する。
+
+    - タイムスタンプ付き行: "[...]" 以降の先頭にラベルがあれば、それだけ取り除く。
+    - タイムスタンプなし行: 元のインデントは残して、行頭のラベルだけ取り除く。
+    - マッチしない行: そのまま返す。
+    """
+    m = _LINE_RE.match(line)
+    keep_end = m.end("keep")
+    if m.end() == keep_end:
+        return line
+    return line[:keep_end] + line[m.end():]
+
+
+def filter_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    行のイテラブル（ファイルオブジェクトなど）を1行ずつ処理し、改行を除いた結果を返す。
+
+    各要素は str.splitlines() と同じ規則で分割してから処理するので、
+    文字起こし全文を1要素として渡しても、1行ずつ渡しても結果は同じになる。
+    """
+    for line in lines:
+        for piece in line.splitlines():
+            yield clean_line(piece)
+
+
+def collapse_lines(
+    lines: Iterable[str],
+    *,
+    min_run: int = 3,
+    inline: bool = False,
+    stats: RepeatStats | None = None,
+) -> Iterator[str]:
+    """
+    改行を含まない行を1行ずつ受け取り、繰り返しを除いた行を返す（1パス・行数に比例する時間）。
+
+    同じ発話の行が min_run 行以上続いたら、最初の1行だけを残す。タイムスタンプは比較に含めないので、
+    残るのは繰り返しの最初の行とそのタイムスタンプになる。min_run 行に満たない連続はそのまま返す
+    （判定のため、最大 min_run - 1 行を手元に留めてから返す）。空行・発話のない行は連続を区切る。
+    inline が真なら、1行の中で同じ語句が4回以上続く部分も1回にまとめる。
+    min_run が 0 以下で inline が偽なら何もしない。
+    """
+    if min_run <= 0 and not inline:
+        yield from lines
+        return
+    run_key = ""
+    run: list[str] = []  # 連続の先頭から、まだ返していない行
+    run_length = 0
+    for line in lines:
+        m = _TIMESTAMP_PREFIX_RE.match(line)
+        prefix, text = (m.group(1), m.group(2)) if m else ("", line)
+
+        if inline:
+            collapsed = _INLINE_REPEAT_RE.sub(r"\1", text)
+            if stats is not None:
+                stats.chars_removed += len(text) - len(collapsed)
+            text = collapsed
+
+        key = _repeat_key(text) if min_run > 0 else ""
+        if key and key == run_key:
+            run_length += 1
+            if run_length < min_run:
+                run.append(prefix + text)
+                continue
+            if stats is not None:
+                dropped = run[1:] + [prefix + text]
+                stats.lines_removed += len(dropped)
+                stats.chars_removed += sum(len(d) + 1 for d in dropped)
+            if run:
+                yield run[0]
+                run = []
+            continue
+
+        yield from run
+        run_key, run_length = key, 1
+        if key:
+            run = [prefix + text]
+        else:
+            run = []
+            yield prefix + text
+    yield from run
+
+
+def collapse_repetitions(
+    text: str,
+    *,
+    min_run: int = 3,
+    inline: bool = False,
+    stats: RepeatStats | None = None,
+) -> str:
+    """
+    文字起こし全文から繰り返しを除いたテキストを返す（挙動は collapse_lines を参照）。
+    """
+    lines = collapse_lines(text.splitlines(), min_run=min_run, inline=inline, stats=stats)
+    result = "\n".join(lines)
+    if text.endswith("\n"):
+        result += "\n"
+    return result
+
+
+def filter_file(
+    src: Path,
+    dst: Path | None = None,
+    *,
+    repeat_min_run: int = 0,
+    inline_repeat: bool = False,
+    stats: RepeatStats | None = None,
+) -> bool:
+    """
+    ファイルからファイルへノイズ除去する（メモリ使用量は行の長さにしか依存しない）。
+
+    dst を省略すると src を置き換える。その場合、内容が変わらなければファイルは書き換えない。
+    出力は remove_speaker_label_noise(src.read_text()) と同じバイト列になる。
+    repeat_min_run が 1 以上か inline_repeat が真なら、さらに collapse_lines で繰り返しを除く
+    （collapse_repetitions(remove_speaker_label_noise(...)) と同じ結果。stats に除いた量を加算する）。
+
+    Returns:
+        内容が変わったかどうか
+    """
+    target = dst or src
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with open(src) as fin, os.fdopen(fd, "w") as fout:
+            if repeat_min_run > 0 or inline_repeat:
+                changed = _write_collapsed(
+                    fin,
+                    fout,
+                    repeat_min_run,
+                    inline_repeat,
+                    stats if stats is not None else RepeatStats(),
+                )
+            else:
+                changed = _write_cleaned(fin, fout)
+
+        if changed or dst is not None:
+            if target.exists():
+                shutil.copymode(target, tmp_name)
+            os.replace(tmp_name, target)
+        else:
+            os.unlink(tmp_name)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return changed
+
+
+def _write_cleaned(fin, fout) -> bool:
+    """ラベルを除去しながら1行ずつ書き出し、内容が変わったかどうかを返す。"""
+    changed = False
+    # 改行は読み込み時に "\n" に揃う（read_text と同じ）ので、最終行以外は必ず "\n" で終わる
+    for line in fin:
+        pieces = line.splitlines()
+        if len(pieces) == 1:
+            out = clean_line(pieces[0])
+        else:
+            # 空行、または "\f" や "\u2028" など str.splitlines() が行区切りとみなす文字を含む
+            out = "\n".join(map(clean_line, pieces))
+        if line.endswith("\n"):
+            out += "\n"
+        if out != line:
+            changed = True
+        fout.write(out)
+    return changed
+
+
+def _write_collapsed(fin, fout, min_run: int, inline: bool, stats: RepeatStats) -> bool:
+    """ラベルの除去と繰り返しの除去をまとめて1パスで書き出し、内容が変わったかどうかを返す。"""
+    before = (stats.lines_removed, stats.chars_removed)
+    labels_removed = False
+    ends_with_newline = False
+
+    def cleaned() -> Iterator[str]:
+        nonlocal labels_removed, ends_with_newline
+        for line in fin:
+            ends_with_newline = line.endswith("\n")
+            for piece in line.splitlines():
+                out = clean_line(piece)
+                labels_removed = labels_removed or out != piece
+                yield out
+
+    for i, out in enumerate(collapse_lines(cleaned(), min_run=min_run, inline=inline, stats=stats)):
+        if i:
+            fout.write("\n")
+        fout.write(out)
+    if ends_with_newline:
+        fout.write("\n")
+    # "\f" などの行区切りは "\n" にそろうが、そうした入力は実際には現れないので変化として扱わない
+    return labels_removed or (stats.lines_removed, stats.chars_removed) != before
+
+
 def remove_speaker_label_noise(text: str) -> str:
     """
     行頭の「発話者ラベル:」ノイズを削除したテキストを返す。
@@ -60,38 +304,11 @@ def remove_speaker_label_noise(text: str) -> str:
     Returns:
         フィルター適用後のテキスト。
 
-    挙動:
-    - タイムスタンプ付き行:
-        "[...]" 以降の先頭にラベルがあれば、それだけ取り除く。
-    - タイムスタンプなし行:
-        行頭にラベルがあれば、それだけ取り除く。
-    - マッチしない行:
-        そのまま返す。
+    挙動は clean_line を参照。長い文字起こしをファイルごと処理する場合は
+    filter_file を使うと全文をメモリに載せずに済む。
     """
-    cleaned_lines: list[str] = []
-
-    for line in text.splitlines():
-        # 1) まずタイムスタンプ前置きの有無を見る
-        m_ts = _TIMESTAMP_PREFIX_RE.match(line)
-        if m_ts:
-            prefix, rest = m_ts.group(1), m_ts.group(2).lstrip()
-            m_label = _SPEAKER_LABEL_RE.match(rest)
-            if m_label:
-                # タイムスタンプは残してラベルだけ落とす
-                line = prefix + m_label.group("utterance")
-        else:
-            # タイムスタンプが無い場合は、元のインデントだけ保持する
-            rest = line.lstrip()
-            m_label = _SPEAKER_LABEL_RE.match(rest)
-            if m_label:
-                leading_ws = line[: len(line) - len(rest)]
-                line = leading_ws + m_label.group("utterance")
-
-        cleaned_lines.append(line)
-
+    result = "\n".join(filter_lines((text,)))
     # 入力の末尾に改行があった場合は保持する
-    result = "\n".join(cleaned_lines)
     if text.endswith("\n"):
         result += "\n"
     return result
-
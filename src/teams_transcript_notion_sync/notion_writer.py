@@ -1,10 +1,152 @@
+import hashlib
+import json
+import threading
+import time
 from datetime import datetime
-from typing import Optional, Iterable, List
-from notion_client import Client
-from .config import NOTION_TOKEN, NOTION_DATABASE_ID
+from typing import TYPE_CHECKING, Any, Callable, Optional, Iterable, Iterator, List
+from .config import (
+    NOTION_BASE_URL,
+    NOTION_RATE_LIMIT,
+    NOTION_MAX_RETRIES,
+    NOTION_TRANSCRIPT_LAYOUT,
+    NOTION_TRANSCRIPT_GROUP_MINUTES,
+    NOTION_SOURCE_KEY_PROPERTY,
+    PROCESSED_DB,
+)
+from . import metrics
+from .db import connect, transaction
+from .rate_limit import SharedTokenBucket
+from .segments import Transcript
+from .timestamps import format_timestamp
 
+if TYPE_CHECKING:
+    from notion_client import Client
+    from notion_client.errors import HTTPResponseError
 
-notion = Client(auth=NOTION_TOKEN)
+# Notion API の1リクエストあたりの children 上限
+NOTION_MAX_CHILDREN = 100
+# Notion API の1リクエストあたりのペイロード上限は 500KB。余裕を見て分割する
+NOTION_MAX_PAYLOAD_BYTES = 400_000
+# rich_text 配列の要素数上限
+NOTION_MAX_RICH_TEXT_ITEMS = 100
+
+# すべての Notion 呼び出しで共有するレートリミッター（平均 約3 req/s）。
+# 同じ処理状態DB を使う全プロセス（job_queue のワーカーなど）の合計をこの速さに抑える
+_rate_limiter = SharedTokenBucket(
+    PROCESSED_DB, "notion", rate=NOTION_RATE_LIMIT, capacity=NOTION_RATE_LIMIT
+)
+
+_client: "Client | None" = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> "Client":
+    """Notion クライアントを返す（notion_client の import と NOTION_TOKEN の検証は初回だけ）。"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from notion_client import Client
+
+            from .config import NOTION_TOKEN
+
+            _client = Client(auth=NOTION_TOKEN, base_url=NOTION_BASE_URL)
+        return _client
+
+
+def _retry_after_seconds(error: "HTTPResponseError", attempt: int) -> float:
+    """429 の Retry-After ヘッダ（なければ指数バックオフ）から待ち時間を求める。"""
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return min(2.0**attempt, 30.0)
+
+
+def _call(fn: Callable[..., Any], **kwargs: Any) -> Any:
+    """レート制限とリトライ（429 / 5xx / タイムアウト）付きで Notion API を呼ぶ。"""
+    from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        _rate_limiter.acquire()
+        metrics.add(notion_requests=1, retries=1 if attempt else 0)
+        try:
+            return fn(**kwargs)
+        except RequestTimeoutError:
+            if attempt == NOTION_MAX_RETRIES:
+                raise
+            time.sleep(min(2.0**attempt, 30.0))
+        except HTTPResponseError as e:
+            status = getattr(e, "status", None)
+            if attempt == NOTION_MAX_RETRIES or not (status == 429 or (status or 0) >= 500):
+                raise
+            wait = _retry_after_seconds(e, attempt)
+            print(f"[WARN] Notion API returned {status}; retrying in {wait:.1f}s")
+            if status == 429:
+                _rate_limiter.pause(wait)
+            else:
+                time.sleep(wait)
+
+
+def payload_bytes(obj: Any) -> int:
+    """JSON としてのおおよその送信バイト数。"""
+    return len(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode())
+
+
+def block_count(block: dict) -> int:
+    """ブロック自身と、入れ子の children（toggle の中の段落、table の行など）の数。"""
+    body = block.get(_block_type(block))
+    nested = body.get("children", []) if isinstance(body, dict) else []
+    return 1 + sum(block_count(child) for child in nested)
+
+
+def iter_batches(
+    children: List[dict],
+    *,
+    max_children: int = NOTION_MAX_CHILDREN,
+    max_bytes: int = NOTION_MAX_PAYLOAD_BYTES,
+) -> Iterator[List[dict]]:
+    """
+    ブロックを、件数（100件）とペイロードサイズの上限に収まるバッチに分ける。
+
+    件数・サイズとも入れ子の children を含めて数える（上限を1つで超えるブロックは単独のバッチにする）。
+    """
+    batch: List[dict] = []
+    size = count = 0
+    for block in children:
+        block_size = payload_bytes(block)
+        blocks = block_count(block)
+        if batch and (count + blocks > max_children or size + block_size > max_bytes):
+            yield batch
+            batch, size, count = [], 0, 0
+        batch.append(block)
+        size += block_size
+        count += blocks
+    if batch:
+        yield batch
+
+
+def upload_page(parent: dict, properties: dict, children: List[dict]) -> str:
+    """ページを作成し、ブロックを上限（100件 / ペイロードサイズ）ずつ追加する。作成したページIDを返す。
+
+    最初のバッチは pages.create に含め、残りは blocks.children.append で追記する。
+    """
+    batches = iter_batches(children)
+    page = _call(
+        _get_client().pages.create,
+        parent=parent,
+        properties=properties,
+        children=next(batches, []),
+    )
+    page_id = page["id"]
+
+    for batch in batches:
+        _call(
+            _get_client().blocks.children.append,
+            block_id=page_id,
+            children=batch,
+        )
+    return page_id
 
 
 def _chunk(text: str, size: int = 1800) -> Iterable[str]:
@@ -22,6 +164,108 @@ def _chunk(text: str, size: int = 1800) -> Iterable[str]:
         yield text[i : i + size]
 
 
+def _rich_text(content: str) -> dict:
+    return {"type": "text", "text": {"content": content}}
+
+
+def _paragraph_blocks(
+    transcript: Transcript, first: int, last: int, segment_chars: int, segments_per_block: int
+) -> List[dict]:
+    """first 行目から last 行目の手前までを paragraph ブロックに詰める。"""
+    # 行境界で segment_chars 以下の rich_text 用セグメントに詰める（1行だけで超える場合のみ行を分割）
+    segments = transcript.pack(first, last, segment_chars)
+
+    blocks = []
+    for i in range(0, len(segments), segments_per_block):
+        group = segments[i : i + segments_per_block]
+        # ブロック末尾の改行は表示上不要なので落とす
+        group[-1] = group[-1].rstrip("\n")
+        group = [seg for seg in group if seg]
+        if group:
+            blocks.append(
+                {
+                    "object": "block",
+                    "paragraph": {"rich_text": [_rich_text(seg) for seg in group]},
+                }
+            )
+    return blocks
+
+
+def _group_by_time(transcript: Transcript, group_seconds: float) -> Iterator[tuple[float, int, int]]:
+    """
+    行を group_seconds ごとの時間帯にまとめ、(時間帯の開始秒, 最初の行, 最後の行の次) を返す。
+
+    タイムスタンプのない行は直前の時間帯に入る（Transcript が直前の時刻を引き継ぐため）。
+    """
+    first = 0
+    while first < len(transcript):
+        bucket = transcript[first].start // group_seconds * group_seconds
+        # 時刻順に並んでいれば、次の時間帯の最初の行は二分探索で求まる
+        last = max(transcript.index_at(bucket + group_seconds, first), first + 1)
+        yield bucket, first, last
+        first = last
+
+
+def pack_transcript_blocks(
+    transcript_text: str,
+    *,
+    layout: str = NOTION_TRANSCRIPT_LAYOUT,
+    group_minutes: float = NOTION_TRANSCRIPT_GROUP_MINUTES,
+    segment_chars: int = 1800,
+    segments_per_block: int = 20,
+) -> List[dict]:
+    """文字起こし全文を、できるだけ少ないNotionブロックに詰める。
+
+    - 1つの paragraph に最大 segments_per_block 個の rich_text を入れる（上限は100個）。
+    - 各 rich_text は segment_chars 文字以下（Notionの上限は約2000文字）。
+    - 区切りは文字起こしの行境界のみ（タイムスタンプ行を途中で割らない）。
+
+    Args:
+        layout: "flat"（段落のみ） / "heading"（時間帯ごとに見出し）
+            / "toggle"（時間帯ごとに折りたたみ）
+        group_minutes: heading / toggle で1つにまとめる時間幅（分）
+    """
+    # 各行を改行で終わらせておく（最後の行にも改行がある前提で詰める）
+    if transcript_text and not transcript_text.endswith("\n"):
+        transcript_text += "\n"
+    transcript = Transcript(transcript_text)
+    segments_per_block = min(segments_per_block, NOTION_MAX_RICH_TEXT_ITEMS)
+
+    if layout == "flat":
+        return _paragraph_blocks(transcript, 0, len(transcript), segment_chars, segments_per_block)
+
+    blocks: List[dict] = []
+    for start, first, last in _group_by_time(transcript, group_minutes * 60):
+        label = f"{format_timestamp(start)[:8]} - {format_timestamp(start + group_minutes * 60)[:8]}"
+        paragraphs = _paragraph_blocks(transcript, first, last, segment_chars, segments_per_block)
+        if layout == "toggle":
+            toggle: dict = {
+                "object": "block",
+                "toggle": {"rich_text": [_rich_text(label)], "children": []},
+            }
+            # トグル自身と合わせて1リクエストの上限（100件 / ペイロードサイズ）を超える分は、
+            # トグルの外に続けて置く
+            size = payload_bytes(toggle)
+            inside = 0
+            for paragraph in paragraphs[: NOTION_MAX_CHILDREN - 1]:
+                size += payload_bytes(paragraph) + 1  # 区切りのカンマ
+                if size > NOTION_MAX_PAYLOAD_BYTES:
+                    break
+                inside += 1
+            toggle["toggle"]["children"] = paragraphs[:inside]
+            blocks.append(toggle)
+            blocks.extend(paragraphs[inside:])
+        else:
+            blocks.append(
+                {
+                    "object": "block",
+                    "heading_3": {"rich_text": [_rich_text(label)]},
+                }
+            )
+            blocks.extend(paragraphs)
+    return blocks
+
+
 def _split_markdown_row(line: str) -> List[str]:
     line = line.strip().strip("|")
     return [c.strip() for c in line.split("|")]
@@ -63,8 +307,10 @@ def markdown_table_to_notion_table_block(summary_text: str) -> dict:
     }
 
 
-def create_meeting_page(title, date, teams_url, summary_text, transcript_text):
-    """Notionに会議ページを作成する。
+def build_meeting_page(
+    title, date, teams_url, summary_text, transcript_text, source_key=None
+) -> tuple[dict, List[dict]]:
+    """会議ページのプロパティとブロック（props, children）を組み立てる。
 
     Args:
         title (str): ページタイトル
@@ -72,7 +318,7 @@ def create_meeting_page(title, date, teams_url, summary_text, transcript_text):
         teams_url (Optional[str]): Teams会議URL
         summary_text (str): 会議要約テキスト
         transcript_text (str): 文字起こし全文テキスト
-
+        source_key (Optional[str]): 録画を一意に表すキー（パス + 内容ハッシュ）
     """
 
     children = []
@@ -97,14 +343,8 @@ def create_meeting_page(title, date, teams_url, summary_text, transcript_text):
             },
         }
     )
-    # 文字起こし全文テキストをチャンクに分割して追加
-    for c in _chunk(transcript_text):
-        children.append(
-            {
-                "object": "block",
-                "paragraph": {"rich_text": [{"type": "text", "text": {"content": c}}]},
-            }
-        )
+    # 文字起こし全文テキストを行境界でブロックに詰めて追加
+    children.extend(pack_transcript_blocks(transcript_text))
 
     # ページプロパティ設定
     props = {"Name": {"title": [{"text": {"content": title}}]}}
@@ -115,10 +355,258 @@ def create_meeting_page(title, date, teams_url, summary_text, transcript_text):
     ## Teams URL
     if teams_url:
         props["Teams URL"] = {"url": teams_url}
+    ## 録画のキー（既存ページの検索用）
+    if source_key and NOTION_SOURCE_KEY_PROPERTY:
+        props[NOTION_SOURCE_KEY_PROPERTY] = {"rich_text": [{"text": {"content": source_key}}]}
 
-    # Notionページ作成
-    notion.pages.create(
-        parent={"database_id": NOTION_DATABASE_ID},
+    return props, children
+
+
+def create_meeting_page(
+    title, date, teams_url, summary_text, transcript_text, source_key=None
+):
+    """Notionに会議ページを作成する。
+
+    source_key を渡した場合は、同じ録画のページがあればそれを更新する（変更のあった
+    ブロックだけを書き換える）。内容が変わっていなければ書き込みは行わない。
+
+    Args:
+        title (str): ページタイトル
+        date (Optional[datetime]): 会議日時
+        teams_url (Optional[str]): Teams会議URL
+        summary_text (str): 会議要約テキスト
+        transcript_text (str): 文字起こし全文テキスト
+        source_key (Optional[str]): 録画を一意に表すキー（パス + 内容ハッシュ）
+
+    Returns:
+        str: 作成（または更新）したページID
+    """
+    props, children = build_meeting_page(
+        title, date, teams_url, summary_text, transcript_text, source_key
+    )
+    from .config import NOTION_DATABASE_ID
+
+    parent = {"database_id": NOTION_DATABASE_ID}
+
+    if source_key:
+        return upsert_page(source_key, parent, props, children)
+
+    # Notionページ作成（ブロックが多い場合は分割して追記）
+    return upload_page(
+        parent=parent,
         properties=props,
         children=children,
     )
+
+
+# ===== 冪等な upsert（差分更新） =====
+
+# 中身をそのまま更新できるブロック種別（子ブロックを持たないもの）
+_UPDATABLE_BLOCK_TYPES = {"paragraph", "heading_1", "heading_2", "heading_3"}
+
+
+def _block_type(block: dict) -> str:
+    return block.get("type") or next(k for k in block if k not in ("object", "type"))
+
+
+def _content_hash(obj: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(obj, ensure_ascii=False, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _load_page_cache(source_key: str) -> dict | None:
+    row = connect(PROCESSED_DB).execute(
+        """
+        SELECT page_id, props_hash, block_ids, block_hashes, block_types
+        FROM notion_pages WHERE source_key = ?
+        """,
+        (source_key,),
+    ).fetchone()
+    if row is None:
+        return None
+    block_ids = json.loads(row["block_ids"])
+    return {
+        "page_id": row["page_id"],
+        "props_hash": row["props_hash"],
+        "block_ids": block_ids,
+        "block_hashes": json.loads(row["block_hashes"]),
+        # 種別を記録する前のキャッシュは種別不明（その場での更新はせず作り直す）
+        "block_types": json.loads(row["block_types"]) if row["block_types"] else [""] * len(block_ids),
+    }
+
+
+def _save_page_cache(
+    source_key: str,
+    page_id: str,
+    props_hash: str,
+    block_ids: List[str],
+    block_hashes: List[str],
+    block_types: List[str],
+) -> None:
+    with transaction(PROCESSED_DB) as conn:
+        conn.execute(
+            """
+            INSERT INTO notion_pages (
+                source_key, page_id, props_hash, block_ids, block_hashes, block_types, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (source_key) DO UPDATE SET
+                page_id = excluded.page_id,
+                props_hash = excluded.props_hash,
+                block_ids = excluded.block_ids,
+                block_hashes = excluded.block_hashes,
+                block_types = excluded.block_types,
+                updated_at = excluded.updated_at
+            """,
+            (
+                source_key,
+                page_id,
+                props_hash,
+                json.dumps(block_ids),
+                json.dumps(block_hashes),
+                json.dumps(block_types),
+                time.time(),
+            ),
+        )
+
+
+def _find_page_by_source_key(source_key: str) -> str | None:
+    """データベースから source_key プロパティが一致するページを探す。"""
+    if not NOTION_SOURCE_KEY_PROPERTY:
+        return None
+    from .config import NOTION_DATABASE_ID
+
+    res = _call(
+        _get_client().databases.query,
+        database_id=NOTION_DATABASE_ID,
+        filter={"property": NOTION_SOURCE_KEY_PROPERTY, "rich_text": {"equals": source_key}},
+        page_size=1,
+    )
+    results = res.get("results", [])
+    return results[0]["id"] if results else None
+
+
+def _list_child_ids(block_id: str) -> List[str]:
+    ids: List[str] = []
+    cursor = None
+    while True:
+        kwargs: dict = {"block_id": block_id, "page_size": NOTION_MAX_CHILDREN}
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        res = _call(_get_client().blocks.children.list, **kwargs)
+        ids.extend(b["id"] for b in res.get("results", []))
+        if not res.get("has_more"):
+            return ids
+        cursor = res.get("next_cursor")
+
+
+def _insert_blocks(page_id: str, blocks: List[dict], after: str | None) -> List[str]:
+    """ブロックを after の直後（None ならページ末尾）に挿入し、作成されたIDを返す。"""
+    ids: List[str] = []
+    for batch in iter_batches(blocks):
+        kwargs: dict = {"block_id": page_id, "children": batch}
+        if after is not None:
+            kwargs["after"] = after
+        res = _call(_get_client().blocks.children.append, **kwargs)
+        # 作成されたブロックはレスポンスの results の先頭に入っている
+        new_ids = [b["id"] for b in res.get("results", [])][: len(batch)]
+        ids.extend(new_ids)
+        if new_ids:
+            after = new_ids[-1]
+    return ids
+
+
+def _reconcile_blocks(
+    page_id: str,
+    old_ids: List[str],
+    old_hashes: List[str],
+    old_types: List[str],
+    children: List[dict],
+    new_hashes: List[str],
+) -> List[str]:
+    """既存ブロックと新しいブロックの差分だけを書き込み、更新後のブロックID一覧を返す。"""
+    # 先頭・末尾の一致部分はそのまま残す
+    prefix = 0
+    while prefix < min(len(old_hashes), len(new_hashes)) and old_hashes[prefix] == new_hashes[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < min(len(old_hashes), len(new_hashes)) - prefix
+        and old_hashes[-1 - suffix] == new_hashes[-1 - suffix]
+    ):
+        suffix += 1
+
+    old_mid = old_ids[prefix : len(old_ids) - suffix]
+    old_mid_types = old_types[prefix : len(old_types) - suffix]
+    new_mid = children[prefix : len(children) - suffix]
+    kept_suffix = old_ids[len(old_ids) - suffix :]
+
+    if not old_mid and not new_mid:
+        return list(old_ids)
+
+    # 同じ位置・同じ種別で、中身だけ変わったブロックはその場で更新する
+    # （blocks.update では種別を変えられないので、既存ブロックの種別も一致している必要がある）
+    if len(old_mid) == len(new_mid) and all(
+        old_type == _block_type(b) and old_type in _UPDATABLE_BLOCK_TYPES
+        for old_type, b in zip(old_mid_types, new_mid)
+    ):
+        for block_id, block in zip(old_mid, new_mid):
+            btype = _block_type(block)
+            _call(_get_client().blocks.update, block_id=block_id, **{btype: block[btype]})
+        return list(old_ids)
+
+    # それ以外は変わった範囲を削除して、新しいブロックを差し込む
+    if prefix == 0 and kept_suffix:
+        # ページ先頭への挿入はできないので、末尾側も含めて作り直す
+        old_mid, new_mid, kept_suffix = old_ids, children, []
+    for block_id in old_mid:
+        _call(_get_client().blocks.delete, block_id=block_id)
+    after = old_ids[prefix - 1] if prefix and kept_suffix else None
+    inserted = _insert_blocks(page_id, new_mid, after)
+    return old_ids[:prefix] + inserted + kept_suffix
+
+
+def upsert_page(source_key: str, parent: dict, properties: dict, children: List[dict]) -> str:
+    """source_key で既存ページを探し、なければ作成、あれば差分だけを更新する。
+
+    ページIDとブロックID・ブロックのハッシュはローカルにキャッシュしておき、
+    内容が変わっていなければ書き込み API を1回も呼ばない。
+    """
+    props_hash = _content_hash(properties)
+    new_hashes = [_content_hash(b) for b in children]
+    new_types = [_block_type(b) for b in children]
+
+    cached = _load_page_cache(source_key)
+    if cached is None:
+        page_id = _find_page_by_source_key(source_key)
+        if page_id is None:
+            page_id = upload_page(parent=parent, properties=properties, children=children)
+            block_ids = _list_child_ids(page_id)
+            _save_page_cache(source_key, page_id, props_hash, block_ids, new_hashes, new_types)
+            return page_id
+        # Notion 上にはあるがローカルに記録がない: 既存ブロックの中身は分からないので入れ替える
+        print(f"[INFO] Found existing Notion page for {source_key}; replacing its blocks")
+        cached = {
+            "page_id": page_id,
+            "props_hash": "",
+            "block_ids": _list_child_ids(page_id),
+            "block_hashes": [],
+        }
+        cached["block_hashes"] = [""] * len(cached["block_ids"])
+        cached["block_types"] = [""] * len(cached["block_ids"])
+
+    page_id = cached["page_id"]
+    if cached["props_hash"] != props_hash:
+        _call(_get_client().pages.update, page_id=page_id, properties=properties)
+
+    block_ids = _reconcile_blocks(
+        page_id,
+        cached["block_ids"],
+        cached["block_hashes"],
+        cached["block_types"],
+        children,
+        new_hashes,
+    )
+    _save_page_cache(source_key, page_id, props_hash, block_ids, new_hashes, new_types)
+    return page_id
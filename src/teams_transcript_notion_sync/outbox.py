@@ -0,0 +1,300 @@
+# src/teams_transcript_notion_sync/outbox.py
+"""
+Notion 送信キュー（outbox）。
+
+要約まで終わった会議のページ（properties / children）を SQLite に積んでおき、
+別スレッドの送信処理がまとめて Notion に書き込む。Notion の障害中やレート制限中も
+文字起こしは止まらず、復旧後にキューの古い順から送られる。
+
+    enqueue(mp4, ...) --> notion_outbox (pending) --flush()--> Notion
+                                                     |
+                                         成功: 行を削除し、生成物を artifact_cache に記録して会議を done にする
+                                         一時的な失敗（接続/タイムアウト/429/5xx）: キュー全体を止めて、待ってから再送
+                                         恒久的な失敗（4xx などそれ以外）: 再試行回数を超えたら failed / error
+
+送信は notion_writer.upsert_page（source_key で既存ページを探して差分更新）を
+使うので、同じページを2回送っても重複しない。複数のプロセス（job_queue のワーカー）が
+同時に flush しても、行を確保してから送るので同じ行を並行して送ることはない。
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, List
+
+from .config import (
+    NOTION_OUTBOX_BATCH,
+    NOTION_OUTBOX_INTERVAL,
+    NOTION_OUTBOX_MAX_ATTEMPTS,
+    PROCESSED_DB,
+)
+from . import artifact_cache, checkpoints, metrics
+from .db import connect, transaction
+from .notion_writer import upload_page, upsert_page
+from .scanner import mark_processed
+
+# 同じプロセス内で送信処理が重ならないようにする
+_flush_lock = threading.Lock()
+# 送信中の行を他のプロセスが取らないように、次の送信時刻をこの秒数だけ先送りしておく
+# （送信の途中でプロセスが落ちた場合は、この秒数が過ぎてから再送される）
+_SEND_LEASE_SECONDS = 600.0
+
+
+def enqueue(
+    mp4: Path,
+    source_key: str | None,
+    parent: dict,
+    properties: dict,
+    children: List[dict],
+    *,
+    artifacts: artifact_cache.Artifacts | None = None,
+) -> int:
+    """ページをキューに追加し、行IDを返す。同じ会議の未送信分は新しい内容で置き換える。
+
+    送信が先に終わって done が上書きされないよう、会議の status=queued はここで記録する。
+    artifacts は送信に成功したときに artifact_cache に記録する（送っていないページの録画を、
+    内容が同じだからといって処理済みとみなさないため）。
+    """
+    _set_meeting_status(str(mp4), "queued")
+    payload = json.dumps(
+        {"parent": parent, "properties": properties, "children": children},
+        ensure_ascii=False,
+    )
+    artifacts_json = (
+        json.dumps(
+            {
+                "transcript_path": str(artifacts.transcript_path),
+                "summary_path": str(artifacts.summary_path),
+                "wav_path": str(artifacts.wav_path) if artifacts.wav_path else None,
+                "digest": artifacts.digest,
+            }
+        )
+        if artifacts is not None
+        else None
+    )
+    now = time.time()
+    with transaction(PROCESSED_DB) as conn:
+        conn.execute("DELETE FROM notion_outbox WHERE path = ?", (str(mp4),))
+        cur = conn.execute(
+            """
+            INSERT INTO notion_outbox (
+                path, source_key, payload, status, attempts, next_attempt_at,
+                artifacts, created_at
+            )
+            VALUES (?, ?, ?, 'pending', 0, ?, ?, ?)
+            """,
+            (str(mp4), source_key, payload, now, artifacts_json, now),
+        )
+    return cur.lastrowid
+
+
+def pending_count() -> int:
+    """送信待ちの件数を返す。"""
+    row = connect(PROCESSED_DB).execute(
+        "SELECT COUNT(*) AS n FROM notion_outbox WHERE status = 'pending'"
+    ).fetchone()
+    return row["n"]
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Notion 側の障害やネットワークエラーなど、待てば直る可能性が高いエラーか。
+
+    429 / 5xx、タイムアウト、接続エラー（notion_client が包まない httpx の例外）だけを一時的とみなす。
+    ペイロードの誤りやプログラムの不具合（KeyError など）は、待っても直らないので恒久的な失敗とする。
+    """
+    import httpx
+    from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+    if isinstance(error, HTTPResponseError):
+        status = getattr(error, "status", None) or 0
+        return status == 429 or status >= 500
+    return isinstance(error, (RequestTimeoutError, httpx.TimeoutException, httpx.TransportError))
+
+
+def _backoff_seconds(attempts: int) -> float:
+    return min(30.0 * 2 ** (attempts - 1), 3600.0)
+
+
+def _send(row: Any) -> str:
+    payload = json.loads(row["payload"])
+    metrics.add(notion_blocks=len(payload["children"]), notion_payload_bytes=len(row["payload"]))
+    if row["source_key"]:
+        return upsert_page(
+            row["source_key"], payload["parent"], payload["properties"], payload["children"]
+        )
+    return upload_page(payload["parent"], payload["properties"], payload["children"])
+
+
+def _claim(row: Any) -> bool:
+    """行を送信用に確保する。複数のワーカーが flush しても、同じページを二重に送らない。"""
+    now = time.time()
+    with transaction(PROCESSED_DB) as conn:
+        cur = conn.execute(
+            """
+            UPDATE notion_outbox SET next_attempt_at = ?
+            WHERE id = ? AND status = 'pending' AND next_attempt_at <= ?
+            """,
+            (now + _SEND_LEASE_SECONDS, row["id"], now),
+        )
+    return cur.rowcount == 1
+
+
+def _set_meeting_status(path: str, status: str, note: str | None = None) -> None:
+    try:
+        mark_processed(Path(path), status=status, note=note)
+    except FileNotFoundError:
+        # 送信待ちの間に録画が移動/削除された
+        pass
+
+
+def _register_artifacts(mp4: Path, artifacts: dict) -> None:
+    """送信済みの録画の内容ハッシュと生成物を記録し、再同期/移動された同じ録画を再処理しないようにする。"""
+    try:
+        artifact_cache.register(
+            mp4,
+            transcript_path=Path(artifacts["transcript_path"]),
+            summary_path=Path(artifacts["summary_path"]),
+            wav_path=Path(artifacts["wav_path"]) if artifacts["wav_path"] else None,
+            digest=artifacts.get("digest"),
+        )
+    except FileNotFoundError:
+        # 送信待ちの間に録画が移動/削除された
+        pass
+
+
+def _on_sent(row: Any, page_id: str) -> None:
+    with transaction(PROCESSED_DB) as conn:
+        # 送信中に同じ会議が再登録されていれば、その行は残す
+        conn.execute(
+            "DELETE FROM notion_outbox WHERE id = ? AND payload = ?",
+            (row["id"], row["payload"]),
+        )
+    if row["artifacts"]:
+        _register_artifacts(Path(row["path"]), json.loads(row["artifacts"]))
+    _set_meeting_status(row["path"], "done")
+    print(f"[INFO] Uploaded to Notion: {Path(row['path']).name} ({page_id})")
+
+
+def _on_failed(row: Any, error: Exception, transient: bool) -> None:
+    attempts = row["attempts"] + 1
+    gave_up = not transient and attempts >= NOTION_OUTBOX_MAX_ATTEMPTS
+    retry_at = time.time() + _backoff_seconds(attempts)
+    with transaction(PROCESSED_DB) as conn:
+        conn.execute(
+            """
+            UPDATE notion_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
+            """,
+            ("failed" if gave_up else "pending", attempts, retry_at, str(error), row["id"]),
+        )
+        if transient:
+            # Notion が使えない間はキュー全体を止め、後ろの行が先に送られないようにする
+            conn.execute(
+                """
+                UPDATE notion_outbox SET next_attempt_at = MAX(next_attempt_at, ?)
+                WHERE status = 'pending'
+                """,
+                (retry_at,),
+            )
+    name = Path(row["path"]).name
+    if gave_up:
+        print(f"[ERROR] Giving up Notion upload for {name} after {attempts} attempts: {error}")
+        # 再処理に選ばれたら、notion ステージ（送信キューへの登録）からやり直す
+        checkpoints.invalidate(Path(row["path"]), "notion")
+        _set_meeting_status(row["path"], "error", note=f"notion: {error}")
+    else:
+        print(f"[WARN] Notion upload for {name} failed (attempt {attempts}): {error}")
+
+
+def flush(limit: int | None = None) -> tuple[int, int]:
+    """
+    送信時刻の来た行を古い順に送り、(送信件数, 失敗件数) を返す。
+
+    一時的なエラー（接続エラー/429/5xx）が出たら Notion が使えないとみなし、
+    その回の送信をそこで打ち切る（後ろの行を先に送らない）。
+    """
+    limit = limit or NOTION_OUTBOX_BATCH
+    sent = failed = 0
+    with _flush_lock:
+        while True:
+            rows = connect(PROCESSED_DB).execute(
+                """
+                SELECT id, path, source_key, payload, attempts, artifacts FROM notion_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+                """,
+                (time.time(), limit),
+            ).fetchall()
+            if not rows:
+                return sent, failed
+
+            for row in rows:
+                if not _claim(row):
+                    # 別のプロセスが送信中
+                    continue
+                try:
+                    with metrics.stage("notion_upload", Path(row["path"])):
+                        page_id = _send(row)
+                except Exception as e:
+                    failed += 1
+                    transient = _is_transient(e)
+                    _on_failed(row, e, transient)
+                    if transient:
+                        return sent, failed
+                    continue
+                _on_sent(row, page_id)
+                sent += 1
+
+
+class OutboxFlusher:
+    """バックグラウンドで一定間隔ごとに flush() を呼ぶスレッド。
+
+    with OutboxFlusher():
+        ...  # この間にキューに積まれたページが順次送られる
+    """
+
+    def __init__(self, interval: float = NOTION_OUTBOX_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notion-outbox", daemon=True)
+
+    def start(self) -> "OutboxFlusher":
+        self._thread.start()
+        return self
+
+    def notify(self) -> None:
+        """次の間隔を待たずに送信する。"""
+        self._wake.set()
+
+    def stop(self, *, final_flush: bool = True) -> None:
+        """スレッドを止める。final_flush=True なら最後に1回送信する。"""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        if final_flush:
+            self._flush_quietly()
+
+    def __enter__(self) -> "OutboxFlusher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._flush_quietly()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _flush_quietly(self) -> None:
+        try:
+            flush()
+        except Exception as e:
+            # DB エラーなどで送信スレッドを落とさない
+            print(f"[ERROR] Notion outbox flush failed: {e}")
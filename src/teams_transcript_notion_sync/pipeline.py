@@ -1,69 +1,261 @@
 # src/teams_transcript_notion_sync/pipeline.py
 from datetime import datetime
 from pathlib import Path
+import subprocess
 
+from .config import (
+    AUDIO_MODE,
+    NOTION_DATABASE_ID,
+    PIPELINE_CPU_JOBS,
+    PIPELINE_NET_JOBS,
+    TRANSCRIBE_CHUNK_SECONDS,
+    TRANSCRIBE_JOBS,
+    WHISPER_BACKEND,
+)
+from . import artifact_cache, checkpoints, metrics, outbox, scheduler
 from .scanner import find_new_mp4s, mark_processed
-from .audio import convert_mp4_to_wav, remove_silence_from_wav
-from .transcribe import transcribe_meeting
+from .audio import convert_mp4_to_wav, remove_silence_from_wav, wav_duration_seconds
+from .silence import OffsetMap, offsets_path
+from .transcribe import transcribe_chunked, transcribe_meeting, transcribe_stream
 from .summarizer import summarize_transcript
-from .notion_writer import create_meeting_page
+from .segments import Transcript
+from .notion_writer import build_meeting_page
 
 
-def process_single_meeting(mp4: Path):
-    """1つの会議(mp4)を処理してNotionにアップロードする。"""
+# 文字起こしまでの CPU ステージ（realtime factor の分子になる）
+_CPU_STAGES = ("wav", "nosilence", "transcript")
+
+
+def _stage_names() -> list[str]:
+    """現在の設定で実行するステージの並び。"""
+    # 分割並列文字起こしは wav のランダムアクセスが必要なのでファイル経路を使う
+    if AUDIO_MODE == "stream" and TRANSCRIBE_JOBS <= 1:
+        return ["transcript", "summary", "notion"]
+    return list(checkpoints.STAGES)
+
+
+def _transcribe_wav(wav_path: Path) -> Path:
+    if TRANSCRIBE_JOBS > 1 and wav_duration_seconds(wav_path) > TRANSCRIBE_CHUNK_SECONDS:
+        return transcribe_chunked(wav_path)
+    return transcribe_meeting(wav_path)
+
+
+def _transcript_seconds(transcript_path: Path) -> float:
+    """文字起こしの最後のタイムスタンプ（元の録画での最後の発話の時刻）。"""
+    return Transcript.load(transcript_path).duration
+
+
+def _run_stage(stage: str, mp4: Path, outputs: dict[str, Path | None]) -> Path | None:
+    """1ステージを実行して出力ファイルのパスを返す（出力ファイルがなければ None）。"""
+
+    if stage == "wav":
+        # 0) mp4 -> wav
+        wav_path = convert_mp4_to_wav(mp4)
+        print(f"[INFO] Converted to wav: {wav_path}")
+        return wav_path
+
+    if stage == "nosilence":
+        # 無音除去
+        wav_path_no_silence = remove_silence_from_wav(
+            outputs["wav"],
+            start_silence=5,
+            start_threshold_db=-40.0,
+        )
+        print(f"[INFO] Removed silence: {wav_path_no_silence}")
+        return wav_path_no_silence
+
+    if stage == "transcript":
+        # 1) 文字起こし
+        if "nosilence" in outputs:
+            transcript_path = _transcribe_wav(outputs["nosilence"])
+            metrics.add(audio_seconds=wav_duration_seconds(outputs.get("wav") or outputs["nosilence"]))
+        else:
+            # mp4 -> (ffmpeg: リサンプル+モノラル+無音除去) -> pipe -> whisper.cpp
+            try:
+                transcript_path = transcribe_stream(
+                    mp4,
+                    start_silence=5,
+                    start_threshold_db=-40.0,
+                )
+            except (subprocess.CalledProcessError, OSError) as e:
+                # whisper.cpp が stdin 入力に対応していない場合などはファイル経路に戻す
+                print(f"[WARN] Streaming transcription failed, falling back to wav files: {e}")
+                wav_path = _run_stage("wav", mp4, outputs)
+                no_silence = _run_stage("nosilence", mp4, {"wav": wav_path})
+                transcript_path = _transcribe_wav(no_silence)
+                metrics.add(audio_seconds=wav_duration_seconds(wav_path))
+            else:
+                # ストリームでは音声の長さが分からないので、無音除去の対応表がなければ
+                # 文字起こしの末尾の時刻で代用する
+                offsets = OffsetMap.load(offsets_path(transcript_path))
+                metrics.add(
+                    audio_seconds=offsets.duration
+                    if offsets is not None
+                    else _transcript_seconds(transcript_path)
+                )
+        print("*" * 20)
+        print(f"[INFO] Transcription completed: {transcript_path}")
+        return transcript_path
+
+    if stage == "summary":
+        # 2) 要約
+        return summarize_transcript(outputs["transcript"])
+
+    if stage == "notion":
+        transcript_path = outputs["transcript"]
+        summary_path = outputs["summary"]
+
+        # 3) Notionページを送信キューに積む（送信は outbox.flush が行う）
+        # 録画全体のハッシュは1回だけ計算し、source_key と artifact_cache の両方で使う
+        digest = artifact_cache.full_hash(mp4)
+        source_key = artifact_cache.source_key(mp4, digest)
+        props, children = build_meeting_page(
+            title=mp4.stem,
+            date=datetime.fromtimestamp(mp4.stat().st_mtime),
+            teams_url=None,
+            summary_text=summary_path.read_text(),
+            transcript_text=transcript_path.read_text(),
+            source_key=source_key,
+        )
+        metrics.add(notion_blocks=len(children))
+        # 内容ハッシュと生成物は、送信に成功したときに outbox が記録する
+        outbox.enqueue(
+            mp4,
+            source_key,
+            {"database_id": NOTION_DATABASE_ID},
+            props,
+            children,
+            artifacts=artifact_cache.Artifacts(
+                source_path=mp4,
+                transcript_path=transcript_path,
+                summary_path=summary_path,
+                wav_path=outputs.get("wav"),
+                digest=digest,
+            ),
+        )
+        print(f"[INFO] Queued Notion page: {mp4.name}")
+        return None
+
+    raise ValueError(f"unknown stage: {stage}")
+
+
+def run_stages(mp4: Path, until: str, *, announce: bool = True) -> dict[str, Path | None]:
+    """
+    チェックポイントから再開して until までのステージを実行し、各ステージの出力を返す。
+
+    完了済みで出力が残っているステージは実行せず、記録済みの出力を使う。
+    announce が偽なら、どこから再開したかを表示しない（同じ会議の続きのステージを実行する場合）。
+    """
+    stages = _stage_names()
+    saved = checkpoints.load(mp4)
+    source_fp = checkpoints.file_fingerprint(mp4)
+    start = checkpoints.resume_index(stages, saved, source_fp)
+    stop = stages.index(until) + 1
+
+    outputs: dict[str, Path | None] = {s: saved[s].output for s in stages[:start]}
+    if announce:
+        if start == len(stages):
+            print(f"[INFO] All stages already completed: {mp4.name}")
+        elif start:
+            print(f"[INFO] Resuming {mp4.name} after '{stages[start - 1]}' (checkpoint)")
+    input_fp = saved[stages[start - 1]].fingerprint if start else source_fp
+
+    cpu_seconds = 0.0
+    for stage in stages[start:stop]:
+        with metrics.stage(stage, mp4) as timer:
+            output = _run_stage(stage, mp4, outputs)
+        outputs[stage] = output
+        input_fp = checkpoints.record(mp4, stage, output=output, input_fingerprint=input_fp)
+
+        if stage in _CPU_STAGES:
+            cpu_seconds += timer.duration
+        if stage == "transcript":
+            metrics.record_realtime_factor(mp4, timer.values.get("audio_seconds", 0.0), cpu_seconds)
+
+    return outputs
+
+
+def transcribe_stage(mp4: Path) -> Path:
+    """CPUステージ: mp4 -> wav -> 無音除去 -> 文字起こし。
+
+    プロセスプールのワーカーからも呼ばれるため、状態管理(mark_processed)は行わない。
+    """
 
     print(f"[INFO] Start processing: {mp4}")
+    return run_stages(mp4, "transcript")["transcript"]
 
-    # 0) mp4 -> wav
-    wav_path = convert_mp4_to_wav(mp4)
-    print(f"[INFO] Converted to wav: {wav_path}")
 
-    # 無音除去
-    wav_path_no_silence = remove_silence_from_wav(
-        wav_path,
-        start_silence=5,
-        start_threshold_db=-40.0,
-    )
-    print(f"[INFO] Removed silence: {wav_path_no_silence}")
+def publish_stage(mp4: Path) -> None:
+    """ネットワークステージ: 要約 -> Notionページを送信キューに積む。"""
+    # 再開位置は直前の transcribe_stage が表示している
+    run_stages(mp4, "notion", announce=False)
 
-    # 1) 文字起こし（wav入力）
-    transcript_path = transcribe_meeting(wav_path_no_silence, original_mp4=mp4)
-    print("*" * 20)
-    print(f"[INFO] Transcription completed: {transcript_path}")
 
-    # 2) 要約
-    summary_path = summarize_transcript(transcript_path)
+def process_single_meeting(mp4: Path):
+    """1つの会議(mp4)を処理してNotionにアップロードする。"""
+
+    transcribe_stage(mp4)
+    mark_processed(mp4, status="transcribed")
+
+    publish_stage(mp4)
+
+    # 4) キューを送信する（送信できたら done になる。Notion が使えなければ次回の実行で送る）
+    outbox.flush()
 
-    summary_text = summary_path.read_text()
-    transcript_text = transcript_path.read_text()
 
-    # 3) Notionページ作成
-    create_meeting_page(
-        title=mp4.stem,
-        date=datetime.fromtimestamp(mp4.stat().st_mtime),
-        teams_url=None,
-        summary_text=summary_text,
-        transcript_text=transcript_text,
-    )
+def rerun_meeting(mp4: Path, from_stage: str) -> None:
+    """指定したステージ以降のチェックポイントを破棄して、会議を処理し直す。"""
+    checkpoints.invalidate(mp4, from_stage)
+    try:
+        process_single_meeting(mp4)
+    except Exception as e:
+        print(f"[ERROR] while processing {mp4}: {e}")
+        mark_processed(mp4, status="error", note=str(e))
+        raise
 
-    # 4) 状態管理（最終的に done にする）
-    mark_processed(mp4, status="done")
 
+def process_new_meetings(
+    cpu_jobs: int | None = None,
+    net_jobs: int | None = None,
+):
+    """新しいmp4を見つけて、SCHEDULE_POLICY の順にステージ並列エンジンで処理する。
 
-def process_new_meetings():
-    """新しいmp4を見つけて、それぞれ process_single_meeting を呼ぶ"""
+    Args:
+        cpu_jobs: ffmpeg/whisper を実行するプロセス数（省略時は PIPELINE_CPU_JOBS）
+        net_jobs: 要約/Notion を実行するスレッド数（省略時は PIPELINE_NET_JOBS）
+    """
+    from .staged import StagedPipeline
 
     files = find_new_mp4s()
     if not files:
         print("No new meetings.")
+        # 前回送れなかったページがあれば送る
+        outbox.flush()
         return
 
-    for mp4 in files:
-        try:
-            process_single_meeting(mp4)
-        except Exception as e:
-            print(f"[ERROR] while processing {mp4}: {e}")
-            mark_processed(mp4, status="error", note=str(e))
+    cpu_jobs = cpu_jobs or PIPELINE_CPU_JOBS
+    jobs = scheduler.plan(files)
+    print(f"[INFO] Queue: {scheduler.describe(jobs, cpu_jobs)}")
+
+    if WHISPER_BACKEND == "server":
+        # ワーカープロセスを起動する前に、モデル常駐サーバーを用意しておく
+        from .whisper_server import ensure_server
+
+        if not ensure_server():
+            print("[WARN] whisper server is not available; using subprocess mode")
+
+    # Notion への送信はキュー経由で別スレッドが行い、処理の最後にもう一度送る
+    with outbox.OutboxFlusher() as flusher, StagedPipeline(
+        cpu_jobs=cpu_jobs,
+        net_jobs=net_jobs or PIPELINE_NET_JOBS,
+        on_published=flusher.notify,
+    ) as engine:
+        for job in jobs:
+            engine.submit(job.path)
+
+    pending = outbox.pending_count()
+    if pending:
+        print(f"[WARN] {pending} Notion page(s) are still queued; they will be sent on the next run")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+# src/teams_transcript_notion_sync/rate_limit.py
+import time
+from pathlib import Path
+from typing import Callable
+
+from .db import transaction
+
+
+class SharedTokenBucket:
+    """処理状態DB を介して、同じ DB を使うすべてのプロセスで共有するトークンバケット。
+
+    run / watch / job_queue の複数ワーカーが同時に Notion に送っても、合計が rate に収まる。
+    残りトークンは DB の rate_limits テーブルに name ごとに持ち、取得は1回の書き込み
+    トランザクションで行う（時刻はプロセス間で比べられる time.time() を使う）。
+
+    Args:
+        path: 処理状態DB のパス
+        name: バケットの名前（"notion" など）
+        rate: 1秒あたりに補充されるトークン数（= 全プロセス合計の平均リクエスト数/秒）
+        capacity: バケットの容量（= 連続して送れるリクエスト数）
+    """
+
+    def __init__(self, path: Path, name: str, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate は正の値を指定してください")
+        self.path = path
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+
+    def _update(self, change: Callable[[float], float]) -> float:
+        """補充した残りトークンを change(残り) で更新し、更新前の（補充後の）残りを返す。"""
+        with transaction(self.path) as conn:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (self.name,)
+            ).fetchone()
+            if row is None:
+                tokens = self.capacity
+            else:
+                # 時計が戻っても補充量が負にならないようにする
+                elapsed = max(now - row["updated_at"], 0.0)
+                tokens = min(self.capacity, row["tokens"] + elapsed * self.rate)
+            conn.execute(
+                """
+                INSERT INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    tokens = excluded.tokens,
+                    updated_at = excluded.updated_at
+                """,
+                (self.name, change(tokens), now),
+            )
+        return tokens
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """トークンが貯まるまで待ってから消費する。"""
+        while True:
+            available = self._update(lambda t: t - tokens if t >= tokens else t)
+            if available >= tokens:
+                return
+            time.sleep((tokens - available) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """サーバーから待機を指示された（429 Retry-After）場合に、全プロセスの送信を止める。"""
+        # トークンを負にして、seconds 秒後まで誰も取得できないようにする。同じ 429 を複数の
+        # プロセスが受けても待ち時間が積み重ならないよう、足し込まずに下限として設定する
+        self._update(lambda t: min(t, -seconds * self.rate))
@@ -1,10 +1,20 @@
 from __future__ import annotations
+import json
 import os
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Literal, TypedDict
+from typing import Dict, List, Literal, TypedDict
 
-from .config import ONEDRIVE_MEETINGS_DIR, PROCESSED_DB
-from .db import load_db, save_db
+from . import artifact_cache
+from .config import (
+    FILE_STABLE_SECONDS,
+    MEETING_MAX_ATTEMPTS,
+    ONEDRIVE_MEETINGS_DIR,
+    PROCESSED_DB,
+    SCAN_INDEX,
+)
+from .db import get_record, load_db, put_record
 
 
 class ProcessedRecord(TypedDict, total=False):
@@ -13,6 +23,7 @@ class ProcessedRecord(TypedDict, total=False):
     mtime: int
     status: str
     note: str
+    attempts: int  # status=error になった回数（done か録画の更新で 0 に戻る）
 
 
 def _is_target_file(path: Path) -> bool:
@@ -26,37 +37,235 @@ def _is_target_file(path: Path) -> bool:
     return True
 
 
-def find_new_mp4s() -> List[Path]:
-    """新規または更新されたMP4ファイルをOneDriveのディレクトリから探す。"""
-    db = load_db(PROCESSED_DB)
-    new_files: List[Path] = []
+class DirIndexEntry(TypedDict):
+    """スキャンインデックスの1ディレクトリ分のエントリ。"""
+
+    mtime_ns: int
+    # ファイル名 -> [size, mtime(秒)]
+    files: Dict[str, List[int]]
+    subdirs: List[str]
+
+
+@dataclass
+class ScanStats:
+    """スキャン1回分の統計。"""
+
+    dirs_scanned: int = 0
+    dirs_skipped: int = 0
+    files_seen: int = 0
+    files_new: int = 0
+    files_retried: int = 0
+    files_relinked: int = 0
+    files_unstable: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.files_seen} mp4 files ({self.files_new} new, "
+            f"{self.files_retried} retried, "
+            f"{self.files_relinked} unchanged content relinked, "
+            f"{self.files_unstable} still being written) in "
+            f"{self.dirs_scanned + self.dirs_skipped} dirs "
+            f"({self.dirs_scanned} scanned, {self.dirs_skipped} unchanged) "
+            f"in {self.elapsed:.2f}s"
+        )
+
+
+def _load_scan_index(path: Path) -> Dict[str, DirIndexEntry]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except ValueError:
+        # 壊れたインデックスはフルスキャンで作り直す
+        return {}
+
+
+def _save_scan_index(path: Path, index: Dict[str, DirIndexEntry]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(index, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def _scan_dir(
+    dir_path: str,
+    dir_mtime_ns: int,
+    old_index: Dict[str, DirIndexEntry],
+    new_index: Dict[str, DirIndexEntry],
+    stats: ScanStats,
+    full: bool,
+) -> None:
+    """1ディレクトリ分をスキャンし、配下のサブディレクトリを再帰的にたどる。"""
+    cached = old_index.get(dir_path)
+
+    # ディレクトリの mtime はエントリの追加/削除/リネームで変わる。
+    # 変わっていなければ前回の一覧をそのまま使い、ディレクトリの読み直しを省く。
+    # ただしファイルへの追記や上書き（同期中のプレースホルダへの書き込みを含む）では
+    # ディレクトリの mtime は変わらないので、既知の mp4 は stat し直して size / mtime を更新する。
+    if not full and cached is not None and cached["mtime_ns"] == dir_mtime_ns:
+        files: Dict[str, List[int]] = {}
+        for name in cached["files"]:
+            try:
+                st = os.stat(os.path.join(dir_path, name))
+            except FileNotFoundError:
+                continue
+            files[name] = [st.st_size, int(st.st_mtime)]
+        entry = {"mtime_ns": dir_mtime_ns, "files": files, "subdirs": cached["subdirs"]}
+        stats.dirs_skipped += 1
+    else:
+        files = {}
+        subdirs: List[str] = []
+        with os.scandir(dir_path) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append(e.name)
+                elif e.name.lower().endswith(".mp4") and e.is_file():
+                    st = e.stat()
+                    files[e.name] = [st.st_size, int(st.st_mtime)]
+        entry = {"mtime_ns": dir_mtime_ns, "files": files, "subdirs": sorted(subdirs)}
+        stats.dirs_scanned += 1
+
+    new_index[dir_path] = entry
+
+    for name in entry["subdirs"]:
+        sub_path = os.path.join(dir_path, name)
+        try:
+            sub_mtime_ns = os.stat(sub_path, follow_symlinks=False).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        _scan_dir(sub_path, sub_mtime_ns, old_index, new_index, stats, full)
+
+
+def scan_mp4s(
+    root: Path = ONEDRIVE_MEETINGS_DIR,
+    *,
+    index_path: Path = SCAN_INDEX,
+    full: bool = False,
+) -> tuple[Dict[Path, List[int]], ScanStats]:
+    """
+    root 配下の MP4 ファイルを列挙し、{パス: [size, mtime(秒)]} と統計を返す。
+
+    os.scandir の DirEntry を使い、ディレクトリごとの mtime をインデックスに
+    保存しておくことで、変化のないディレクトリは読み直さない（既知の mp4 を stat するだけ）。
+    full=True の場合はインデックスを使わずにすべてのディレクトリを読む。
+    """
+    start = time.perf_counter()
+    stats = ScanStats()
+    old_index = _load_scan_index(index_path)
+    new_index: Dict[str, DirIndexEntry] = {}
 
-    for root, _, files in os.walk(ONEDRIVE_MEETINGS_DIR):
-        root_path = Path(root)
-        for name in files:
-            path = root_path / name
+    root_str = str(root)
+    try:
+        root_mtime_ns = os.stat(root_str).st_mtime_ns
+    except FileNotFoundError:
+        stats.elapsed = time.perf_counter() - start
+        return {}, stats
 
-            if not _is_target_file(path):
+    _scan_dir(root_str, root_mtime_ns, old_index, new_index, stats, full)
+    _save_scan_index(index_path, new_index)
+
+    found: Dict[Path, List[int]] = {}
+    for dir_path, entry in new_index.items():
+        for name, (size, mtime) in sorted(entry["files"].items()):
+            if size == 0:
                 continue
+            found[Path(dir_path) / name] = [size, mtime]
+
+    stats.files_seen = len(found)
+    stats.elapsed = time.perf_counter() - start
+    return found, stats
+
 
-            mtime = int(path.stat().st_mtime)
-            key = str(path)
-            rec = db.get(key)
+def _should_retry(rec: ProcessedRecord) -> bool:
+    """前回の処理が途中で終わった（done / queued でない）会議を、もう一度処理するか。"""
+    return (
+        rec.get("status") not in ("done", "queued")
+        and rec.get("attempts", 0) < MEETING_MAX_ATTEMPTS
+    )
+
+
+def _needs_processing(
+    path: Path,
+    size: int,
+    mtime: int,
+    rec: ProcessedRecord | None,
+    stats: ScanStats,
+) -> bool:
+    """
+    未処理（または更新された）ファイルかどうか。内容が同じ既知の録画なら付け替えて False。
 
-            if rec is None or rec.get("mtime") != mtime:
-                new_files.append(path)
+    更新されていなくても、前回の処理が途中で終わっていれば（_should_retry）True を返す。
+    続きはチェックポイントから再開される。
+    """
+    if rec is not None and rec.get("mtime") == mtime:
+        if _should_retry(rec):
+            stats.files_retried += 1
+            return True
+        return False
+
+    # mtime/パスが変わっただけで内容が同じなら、既存の生成物に付け替えて再処理しない
+    artifacts = artifact_cache.lookup(path, size)
+    if artifacts is not None:
+        artifact_cache.relink(path, artifacts)
+        mark_processed(
+            path,
+            status="done",
+            note=f"unchanged content; relinked from {artifacts.source_path}",
+        )
+        stats.files_relinked += 1
+        return False
+
+    return True
 
+
+def needs_processing(path: Path) -> bool:
+    """1ファイルについて find_new_mp4s と同じ判定を行う（watch モード用）。"""
+    st = path.stat()
+    if st.st_size == 0:
+        return False
+    rec = get_record(PROCESSED_DB, str(path))
+    return _needs_processing(path, st.st_size, int(st.st_mtime), rec, ScanStats())
+
+
+def find_new_mp4s(*, full: bool = False, min_age: float = FILE_STABLE_SECONDS) -> List[Path]:
+    """新規または更新されたMP4ファイルをOneDriveのディレクトリから探す。
+
+    最終更新から min_age 秒経っていないファイル（OneDrive がまだ
+    ダウンロード中の可能性がある）は次回に回す。この判定はインデックスの値ではなく、
+    直前に stat し直した mtime で行う（スキャン後の追記を見落とさないため）。
+    """
+    db = load_db(PROCESSED_DB)
+    found, stats = scan_mp4s(full=full)
+    new_files: List[Path] = []
+    now = time.time()
+
+    for path, (size, mtime) in found.items():
+        rec = db.get(str(path))
+        if rec is not None and rec.get("mtime") == mtime and not _should_retry(rec):
+            continue
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        size, mtime = st.st_size, int(st.st_mtime)
+        if now - st.st_mtime < min_age:
+            stats.files_unstable += 1
+            continue
+        if _needs_processing(path, size, mtime, rec, stats):
+            new_files.append(path)
+
+    stats.files_new = len(new_files) - stats.files_retried
+    print(f"[INFO] Scan: {stats}")
     return new_files
 
 
 def mark_processed(
     path: Path,
-    status: Literal["new", "transcribed", "done", "error"] = "done",
+    status: Literal["new", "transcribed", "queued", "done", "error"] = "done",
     note: str | None = None,
 ) -> None:
     """指定のファイルを処理済みとしてマークする。"""
-    db = load_db(PROCESSED_DB)
-    key = str(path)
     rec: ProcessedRecord = {
         "mtime": int(path.stat().st_mtime),
         "status": status,
@@ -64,5 +273,4 @@ def mark_processed(
     if note:
         rec["note"] = note
 
-    db[key] = rec
-    save_db(PROCESSED_DB, db)
+    put_record(PROCESSED_DB, str(path), rec)
@@ -0,0 +1,220 @@
+# src/teams_transcript_notion_sync/scheduler.py
+"""
+処理順のスケジューリング。
+
+新しい録画の長さを ffprobe で1度だけ調べ（処理状態DBにキャッシュ）、SCHEDULE_POLICY に従って並べる。
+
+    fifo     : 見つかった順（従来の動作）
+    shortest : 短い録画から（3時間の録画の後ろで短い定例が待たされない）
+    newest   : 新しい録画から
+    priority : SCHEDULE_FOLDER_PRIORITY の優先度が高いフォルダから。同じ優先度なら短い順
+
+estimate() は、並べた順に処理したときの各会議の完了予定を、これまでに記録した
+realtime factor（metrics）から見積もる。
+"""
+
+from __future__ import annotations
+
+import heapq
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from . import metrics
+from .audio import probe_duration_seconds
+from .config import (
+    FFPROBE_BIN,
+    ONEDRIVE_MEETINGS_DIR,
+    PROCESSED_DB,
+    SCHEDULE_FOLDER_PRIORITY,
+    SCHEDULE_POLICY,
+)
+from .db import connect, transaction
+
+# ffprobe を並列に実行する数
+_PROBE_JOBS = 4
+# 長さが分からない録画は、ファイルサイズから概算する（Teams の録画でおよそ 2Mbps）
+_FALLBACK_BYTES_PER_SECOND = 250_000
+# realtime factor の記録がまだないときに仮定する値
+_DEFAULT_REALTIME_FACTOR = 0.5
+
+
+@dataclass
+class Job:
+    path: Path
+    size: int
+    mtime: float
+    duration: float | None  # 秒。調べられなかった場合は None
+    priority: int
+
+    @property
+    def estimated_duration(self) -> float:
+        if self.duration is not None:
+            return self.duration
+        return self.size / _FALLBACK_BYTES_PER_SECOND
+
+
+@dataclass
+class Estimate:
+    job: Job
+    start: float  # 今からの秒数
+    finish: float
+
+
+def _load_cached(paths: List[Path], stats: Dict[Path, tuple[int, int]]) -> Dict[Path, float]:
+    conn = connect(PROCESSED_DB)
+    cached: Dict[Path, float] = {}
+    for path in paths:
+        row = conn.execute(
+            "SELECT size, mtime_ns, duration FROM media_durations WHERE path = ?", (str(path),)
+        ).fetchone()
+        if row and (row["size"], row["mtime_ns"]) == stats[path]:
+            cached[path] = row["duration"]
+    return cached
+
+
+def probe_durations(paths: Iterable[Path]) -> Dict[Path, float | None]:
+    """録画の長さ（秒）を返す。調べた結果は size / mtime が変わるまでキャッシュする。"""
+    stats: Dict[Path, tuple[int, int]] = {}
+    for path in paths:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        stats[path] = (st.st_size, st.st_mtime_ns)
+
+    durations: Dict[Path, float | None] = dict(_load_cached(list(stats), stats))
+    missing = [p for p in stats if p not in durations]
+    if not missing:
+        return durations
+
+    no_ffprobe = threading.Event()
+
+    def probe(path: Path) -> float | None:
+        try:
+            return probe_duration_seconds(path)
+        except FileNotFoundError:
+            no_ffprobe.set()
+            return None
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"[WARN] Could not probe duration of {path}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=_PROBE_JOBS) as pool:
+        probed = dict(zip(missing, pool.map(probe, missing)))
+    if no_ffprobe.is_set():
+        print(f"[WARN] {FFPROBE_BIN} is not available; estimating durations from file sizes")
+
+    now = time.time()
+    with transaction(PROCESSED_DB) as conn:
+        conn.executemany(
+            """
+            INSERT INTO media_durations (path, size, mtime_ns, duration, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                duration = excluded.duration,
+                updated_at = excluded.updated_at
+            """,
+            [(str(p), *stats[p], d, now) for p, d in probed.items() if d is not None],
+        )
+    durations.update(probed)
+    return durations
+
+
+def folder_priority(path: Path) -> int:
+    """SCHEDULE_FOLDER_PRIORITY のうち、path を含む最も深いフォルダの優先度（なければ 0）。"""
+    try:
+        rel = path.parent.relative_to(ONEDRIVE_MEETINGS_DIR).as_posix()
+    except ValueError:
+        return 0
+    best, best_len = 0, -1
+    for folder, priority in SCHEDULE_FOLDER_PRIORITY.items():
+        if (rel == folder or rel.startswith(folder + "/")) and len(folder) > best_len:
+            best, best_len = priority, len(folder)
+    return best
+
+
+def plan(paths: Iterable[Path], policy: str = SCHEDULE_POLICY) -> List[Job]:
+    """録画を policy の順に並べた Job のリストを返す。"""
+    paths = list(paths)
+    # fifo でも完了予定の見積もりに長さを使う
+    durations = probe_durations(paths)
+    jobs: List[Job] = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        jobs.append(
+            Job(
+                path=path,
+                size=st.st_size,
+                mtime=st.st_mtime,
+                duration=durations.get(path),
+                priority=folder_priority(path) if policy == "priority" else 0,
+            )
+        )
+
+    # sort は安定なので、同じキーの録画は見つかった順のまま
+    if policy == "shortest":
+        jobs.sort(key=lambda j: j.estimated_duration)
+    elif policy == "newest":
+        jobs.sort(key=lambda j: j.mtime, reverse=True)
+    elif policy == "priority":
+        jobs.sort(key=lambda j: (-j.priority, j.estimated_duration))
+    return jobs
+
+
+def order(paths: Iterable[Path], policy: str = SCHEDULE_POLICY) -> List[Path]:
+    """録画を policy の順に並べ替える。"""
+    return [job.path for job in plan(paths, policy)]
+
+
+def realtime_factor() -> tuple[float, bool]:
+    """(文字起こしまでの realtime factor, 実測値かどうか)。"""
+    observed = metrics.observed_mean("realtime_factor")
+    if observed is None:
+        return _DEFAULT_REALTIME_FACTOR, False
+    return observed, True
+
+
+def estimate(jobs: List[Job], cpu_jobs: int) -> List[Estimate]:
+    """
+    jobs を順に cpu_jobs 並列で処理したときの、各会議の開始/完了予定（今からの秒数）。
+
+    文字起こしまでは 長さ x realtime factor、その後に要約と Notion 登録の平均時間がかかるとみなす。
+    """
+    rtf, _ = realtime_factor()
+    publish = sum(
+        metrics.observed_mean("stage_duration_seconds", f'stage="{stage}"') or 0.0
+        for stage in ("summary", "notion", "notion_upload")
+    )
+    lanes = [0.0] * max(cpu_jobs, 1)
+    estimates: List[Estimate] = []
+    for job in jobs:
+        start = heapq.heappop(lanes)
+        transcribed = start + job.estimated_duration * rtf
+        heapq.heappush(lanes, transcribed)
+        estimates.append(Estimate(job=job, start=start, finish=transcribed + publish))
+    return estimates
+
+
+def describe(jobs: List[Job], cpu_jobs: int, policy: str = SCHEDULE_POLICY) -> str:
+    """キュー全体の概要（件数・音声の合計・完了予定）を1行で返す。"""
+    if not jobs:
+        return "no meetings queued"
+    estimates = estimate(jobs, cpu_jobs)
+    rtf, observed = realtime_factor()
+    audio_hours = sum(j.estimated_duration for j in jobs) / 3600
+    finish = max(e.finish for e in estimates)
+    basis = f"RTF {rtf:.2f}" if observed else f"RTF {rtf:.2f} assumed, no history yet"
+    return (
+        f"{len(jobs)} meeting(s), {audio_hours:.1f}h of audio, policy={policy}; "
+        f"estimated to finish in {finish / 60:.0f} min ({basis})"
+    )
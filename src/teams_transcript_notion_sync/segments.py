@@ -0,0 +1,247 @@
+# src/teams_transcript_notion_sync/segments.py
+"""
+文字起こしのコンパクトな表現（Transcript）。
+
+文字起こし全文を1つの文字列のまま持ち、行（= whisper のセグメント）ごとの
+
+    - 行の先頭位置 / 発話の先頭位置（文字列中のオフセット）
+    - start / end（秒。最初に時刻を使うときに解析する）
+
+を array に入れておく。行ごとの str や tuple は作らないので、長い会議でもメモリは
+本文の文字列とほぼ同じで済み、分割（要約のチャンク / Notion のブロック）や時間帯の検索は
+行の境界のオフセットだけで行える。切り出すときにだけ、本文の必要な範囲をスライスする。
+
+    transcript = Transcript.load(txt_path)
+    transcript.duration                 # 最後の発話の終了時刻
+    transcript.between(600, 1200)       # 10分〜20分に始まる行の範囲
+    transcript.chunks(12000, weight=estimate_tokens)
+
+タイムスタンプのない行は、直前の行の時刻を引き継ぐ（先頭なら 0 秒）。
+行は時刻順に並んでいる前提で、時刻での検索は二分探索で行う。
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import re
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List
+
+from .timestamps import Segment, format_line, parse_timestamp
+
+# 行頭の "[00:10:51.000 --> 00:10:53.000]  " 部分（timestamps._TIMESTAMP_LINE_RE と同じ条件）
+_PREFIX_RE = re.compile(r"[ \t]*\[([0-9:.,]+)[ \t]*-->[ \t]*([0-9:.,]+)\][ \t]*")
+
+
+class TranscriptSegment:
+    """Transcript の1行への参照。値は必要になったときに Transcript から読む。"""
+
+    __slots__ = ("_transcript", "index")
+
+    def __init__(self, transcript: Transcript, index: int):
+        self._transcript = transcript
+        self.index = index
+
+    @property
+    def start(self) -> float:
+        return self._transcript._timing()[0][self.index]
+
+    @property
+    def end(self) -> float:
+        return self._transcript._timing()[1][self.index]
+
+    @property
+    def text(self) -> str:
+        """タイムスタンプを除いた発話。"""
+        t = self._transcript
+        text_start = t._timing()[2][self.index]
+        return t.text[text_start : t._line_end(self.index)]
+
+    @property
+    def line(self) -> str:
+        """タイムスタンプを含む1行（改行なし）。"""
+        t = self._transcript
+        return t.text[t._line_starts[self.index] : t._line_end(self.index)]
+
+    def __iter__(self) -> Iterator:
+        # start, end, text = segment と書けるようにする（timestamps.Segment と同じ並び）
+        return iter((self.start, self.end, self.text))
+
+    def __repr__(self) -> str:
+        return f"TranscriptSegment({self.start!r}, {self.end!r}, {self.text!r})"
+
+
+class Transcript:
+    """文字起こし全文と、行ごとのオフセット・時刻の配列。"""
+
+    __slots__ = ("text", "_line_starts", "_times")
+
+    def __init__(self, text: str):
+        self.text = text
+        # 各行の先頭位置と、最後の行の終わり（番兵）。行の区切りは str.splitlines() と同じ
+        self._line_starts = array("q", accumulate(map(len, text.splitlines(True)), initial=0))
+        # (start, end, 発話の先頭位置) の配列。時刻を使うまで解析しない（チャンク分割だけなら不要）
+        self._times: tuple[array, array, array] | None = None
+
+    def _timing(self) -> tuple[array, array, array]:
+        if self._times is None:
+            text, line_starts = self.text, self._line_starts
+            starts, ends, text_starts = array("d"), array("d"), array("q")
+            start = end = 0.0
+            for i in range(len(line_starts) - 1):
+                pos = text_start = line_starts[i]
+                m = _PREFIX_RE.match(text, pos, line_starts[i + 1])
+                if m:
+                    try:
+                        start, end = parse_timestamp(m.group(1)), parse_timestamp(m.group(2))
+                        text_start = m.end()
+                    except ValueError:
+                        pass
+                starts.append(start)
+                ends.append(end)
+                text_starts.append(text_start)
+            self._times = (starts, ends, text_starts)
+        return self._times
+
+    # ===== 作成 / 保存 =====
+
+    @classmethod
+    def load(cls, path: Path) -> Transcript:
+        return cls(path.read_text())
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Segment]) -> Transcript:
+        """(start, end, text) の並びから、[hh:mm:ss.mmm --> hh:mm:ss.mmm] 形式の文字起こしを作る。"""
+        starts, ends, text_starts = array("d"), array("d"), array("q")
+        lines: List[str] = []
+        pos = 0
+        for start, end, utterance in segments:
+            line = format_line(start, end, utterance) + "\n"
+            starts.append(start)
+            ends.append(end)
+            text_starts.append(pos + len(line) - len(utterance) - 1)
+            lines.append(line)
+            pos += len(line)
+        transcript = cls("".join(lines))
+        if len(transcript) == len(lines):
+            # 発話に改行が含まれていなければ、時刻はそのまま使える
+            transcript._times = (starts, ends, text_starts)
+        return transcript
+
+    @classmethod
+    def from_whisper_json(cls, json_path: Path) -> Transcript:
+        """whisper.cpp の -oj 出力を読み込む（空の発話は捨てる）。"""
+        data = json.loads(json_path.read_text())
+        segments: List[Segment] = []
+        for seg in data.get("transcription", []):
+            text = seg.get("text", "").strip()
+            if not text:
+                continue
+            offsets = seg["offsets"]
+            segments.append((offsets["from"] / 1000, offsets["to"] / 1000, text))
+        return cls.from_segments(segments)
+
+    def write(self, path: Path) -> Path:
+        path.write_text(self.text)
+        return path
+
+    # ===== 参照 =====
+
+    def __len__(self) -> int:
+        return len(self._line_starts) - 1
+
+    def __getitem__(self, index: int) -> TranscriptSegment:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return TranscriptSegment(self, index)
+
+    def __iter__(self) -> Iterator[TranscriptSegment]:
+        return (TranscriptSegment(self, i) for i in range(len(self)))
+
+    def _line_end(self, index: int) -> int:
+        """index 行目の終わり（改行の手前）の位置。"""
+        start, end = self._line_starts[index], self._line_starts[index + 1]
+        line = self.text[start:end].splitlines()
+        return start + len(line[0]) if line else start
+
+    @property
+    def duration(self) -> float:
+        """最後の発話の終了時刻（タイムスタンプがなければ 0）。"""
+        return max(self._timing()[1], default=0.0)
+
+    def span(self, first: int, last: int) -> str:
+        """first 行目から last 行目の手前までの本文（改行を含む）。"""
+        return self.text[self._line_starts[first] : self._line_starts[last]]
+
+    def index_at(self, seconds: float, lo: int = 0) -> int:
+        """start が seconds 以上になる最初の行（なければ len(self)）。"""
+        return bisect.bisect_left(self._timing()[0], seconds, lo)
+
+    def between(self, start: float, end: float) -> range:
+        """start 以上 end 未満の時刻に始まる行の範囲。"""
+        first = self.index_at(start)
+        return range(first, self.index_at(end, first))
+
+    # ===== 分割 =====
+
+    def pack(self, first: int, last: int, max_chars: int) -> List[str]:
+        """
+        first 行目から last 行目の手前までを、行の境界で max_chars 文字以下の文字列に詰める
+        （改行を含む）。
+
+        1行だけで max_chars を超える場合のみ、その行を途中で切る（残りは次の文字列の先頭になる）。
+        """
+        pieces: List[str] = []
+        starts = self._line_starts
+        pos, end = starts[first], starts[last]
+        while pos < end:
+            # pos から max_chars 以内に収まる、いちばん遠い行の境界
+            k = bisect.bisect_right(starts, pos + max_chars, first, last + 1) - 1
+            boundary = starts[k]
+            if boundary <= pos:
+                boundary = min(pos + max_chars, end)
+            pieces.append(self.text[pos:boundary])
+            pos = boundary
+        return pieces
+
+    def _line_weights(self, weight: Callable[[str], int]) -> Iterator[int]:
+        """行ごとの weight（改行を含む）。行の一覧は作らず、オフセットから1行ずつ求める。"""
+        starts = self._line_starts
+        if weight is len:
+            return (starts[i + 1] - starts[i] for i in range(len(self)))
+        text = self.text
+        return (weight(text[starts[i] : starts[i + 1]]) for i in range(len(self)))
+
+    def chunks(self, max_weight: int, weight: Callable[[str], int] = len) -> List[str]:
+        """
+        行の境界で、weight の合計が max_weight 以下になるように分割する（改行を含む）。
+
+        1行だけで max_weight を超える場合は、その行を文字数で分割する。
+        """
+        chunks: List[str] = []
+        starts = self._line_starts
+        # 長い行を切った残り。次の行以降と同じチャンクの先頭になる
+        rest = ""
+        first = 0
+        current = 0
+        for i, line_weight in enumerate(self._line_weights(weight)):
+            if (rest or i > first) and current + line_weight > max_weight:
+                chunks.append(rest + self.span(first, i))
+                rest, first, current = "", i, 0
+            if line_weight > max_weight:
+                # 極端に長い行（タイムスタンプなしの出力など）は文字数で切る
+                line = self.text[starts[i] : starts[i + 1]]
+                step = max(len(line) * max_weight // line_weight, 1)
+                pieces = [line[j : j + step] for j in range(0, len(line), step)]
+                chunks.extend(pieces[:-1])
+                rest, first, current = pieces[-1], i + 1, weight(pieces[-1])
+                continue
+            current += line_weight
+        if rest or first < len(self):
+            chunks.append(rest + self.span(first, len(self)))
+        return chunks
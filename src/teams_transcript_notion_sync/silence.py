@@ -0,0 +1,277 @@
+# src/teams_transcript_notion_sync/silence.py
+"""
+会議の途中も含めた無音区間の除去と、時刻の対応表（OffsetMap）。
+
+    1) ffmpeg の silencedetect で SILENCE_MIN_SECONDS 以上続く無音を探す（デコードだけなので whisper より十分速い）
+    2) 前後に SILENCE_PADDING 秒ずつ残して無音を切り落とした音声を whisper.cpp に渡す
+    3) 文字起こしのタイムスタンプを OffsetMap で元の録画の時刻に戻す
+
+残す区間の境界は 10ms 単位にそろえ、ffmpeg 側でも 10ms（16kHz で 160 サンプル）ごとの
+フレームで選ぶので、切り口がいくつあっても時刻のずれは累積しない。
+
+対応表は文字起こしと同じ名前の <stem>.offsets.json に保存する。
+
+    {"duration": 3600.0, "kept": [[0.0, 812.3], [845.1, 3600.0]]}
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from . import metrics
+from .config import (
+    FFMPEG_BIN,
+    SILENCE_MIN_SECONDS,
+    SILENCE_PADDING,
+    SILENCE_REMOVAL,
+    SILENCE_THRESHOLD_DB,
+)
+from .timestamps import format_line, parse_line
+
+# 区間の境界をそろえる単位（秒）と、そのサンプル数（16kHz）
+_GRID = 0.01
+_GRID_SAMPLES = 160
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[0-9.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[0-9.]+)")
+_TIME_RE = re.compile(r"time=\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def _to_grid(seconds: float) -> int:
+    return max(int(round(seconds / _GRID)), 0)
+
+
+@dataclass
+class OffsetMap:
+    """無音を切った後の音声の時刻と、元の録画の時刻の対応。"""
+
+    duration: float  # 元の音声の長さ（秒）
+    kept: list[tuple[float, float]]  # 元の音声で残した区間 [start, end)
+    _trimmed_starts: list[float] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._trimmed_starts = []
+        position = 0.0
+        for start, end in self.kept:
+            self._trimmed_starts.append(position)
+            position += end - start
+
+    @property
+    def kept_seconds(self) -> float:
+        return sum(end - start for start, end in self.kept)
+
+    @property
+    def removed_seconds(self) -> float:
+        return max(self.duration - self.kept_seconds, 0.0)
+
+    @property
+    def cuts(self) -> int:
+        """切り落とした箇所の数。"""
+        if not self.kept:
+            return 1 if self.duration > 0 else 0
+        n = len(self.kept) - 1
+        n += self.kept[0][0] > 0
+        n += self.kept[-1][1] < self.duration
+        return n
+
+    def to_original(self, t: float) -> float:
+        """無音を切った後の音声の時刻 t を、元の音声の時刻に変換する。"""
+        if not self.kept:
+            return t
+        i = max(bisect.bisect_right(self._trimmed_starts, t) - 1, 0)
+        start, end = self.kept[i]
+        original = start + (t - self._trimmed_starts[i])
+        # 区間の末尾を越えた時刻（whisper の end が少しはみ出すなど）は区間内に収める
+        return min(original, end) if i + 1 < len(self.kept) else original
+
+    def select_filter(self) -> str:
+        """残す区間だけを取り出す ffmpeg のフィルタ（16kHz の PCM に対して使う）。"""
+        # フレームの開始時刻は 10ms の格子上にあるので、半格子ずらした範囲で選ぶ
+        terms = "+".join(
+            f"gte(t,{start - _GRID / 2:.3f})*lt(t,{end - _GRID / 2:.3f})" for start, end in self.kept
+        )
+        return ",".join(
+            [
+                "asetpts=PTS-STARTPTS",
+                f"asetnsamples=n={_GRID_SAMPLES}",
+                f"aselect='{terms or 0}'",
+                "asetpts=N/SR/TB",
+            ]
+        )
+
+    def save(self, path: Path) -> Path:
+        path.write_text(
+            json.dumps(
+                {"duration": round(self.duration, 3), "kept": [[s, e] for s, e in self.kept]},
+                separators=(",", ":"),
+            )
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> OffsetMap | None:
+        """保存された対応表を読む。なければ None。"""
+        try:
+            data = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        return cls(duration=data["duration"], kept=[(s, e) for s, e in data["kept"]])
+
+
+def offsets_path(path: Path) -> Path:
+    """音声/文字起こしのファイルに対応する対応表のパス（<stem>.offsets.json）。"""
+    return path.with_suffix(".offsets.json")
+
+
+def detect_silences(
+    src: Path,
+    *,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    min_seconds: float = SILENCE_MIN_SECONDS,
+) -> tuple[list[tuple[float, float]], float]:
+    """
+    ffmpeg の silencedetect で min_seconds 以上続く無音区間を探し、(無音区間のリスト, 音声の長さ) を返す。
+    """
+    af = ",".join(
+        [
+            "aresample=16000",
+            "aformat=sample_fmts=s16:channel_layouts=mono",
+            "asetpts=PTS-STARTPTS",
+            f"silencedetect=noise={threshold_db}dB:d={min_seconds}",
+        ]
+    )
+    cmd = [FFMPEG_BIN, "-nostdin", "-hide_banner", "-i", str(src), "-vn", "-af", af, "-f", "null", "-"]
+    res = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    if res.returncode != 0:
+        raise subprocess.CalledProcessError(res.returncode, cmd, res.stdout, res.stderr)
+
+    times = _TIME_RE.findall(res.stderr)
+    if not times:
+        raise ValueError(f"could not read the audio duration of {src} from ffmpeg")
+    h, m, s = times[-1]
+    duration = int(h) * 3600 + int(m) * 60 + float(s)
+
+    silences: list[tuple[float, float]] = []
+    start: float | None = None
+    for line in res.stderr.splitlines():
+        if m_start := _SILENCE_START_RE.search(line):
+            start = max(float(m_start.group(1)), 0.0)
+        elif (m_end := _SILENCE_END_RE.search(line)) and start is not None:
+            silences.append((start, min(float(m_end.group(1)), duration)))
+            start = None
+    if start is not None:
+        # 無音のまま終わった
+        silences.append((start, duration))
+    return silences, duration
+
+
+def plan_cuts(
+    silences: list[tuple[float, float]],
+    duration: float,
+    *,
+    min_seconds: float = SILENCE_MIN_SECONDS,
+    padding: float = SILENCE_PADDING,
+) -> OffsetMap:
+    """無音区間から、前後に padding 秒を残して切り落とした後に残す区間を決める。"""
+    total = _to_grid(duration)
+    kept: list[tuple[int, int]] = []
+    position = 0
+    for start, end in silences:
+        if end - start < min_seconds:
+            continue
+        # 先頭と末尾の無音は残さずに切る
+        cut_start = 0 if start <= _GRID else _to_grid(start + padding)
+        cut_end = total if end >= duration - _GRID else _to_grid(end - padding)
+        cut_start = max(cut_start, position)
+        if cut_end <= cut_start:
+            continue
+        if cut_start > position:
+            kept.append((position, cut_start))
+        position = cut_end
+    if position < total:
+        kept.append((position, total))
+    return OffsetMap(duration=duration, kept=[(s * _GRID, e * _GRID) for s, e in kept])
+
+
+def detect(src: Path) -> OffsetMap:
+    """src の無音を調べ、切り落とした後に残す区間を返す。"""
+    silences, duration = detect_silences(src)
+    return plan_cuts(silences, duration)
+
+
+def plan_for(src: Path) -> OffsetMap | None:
+    """
+    SILENCE_REMOVAL=vad なら src の無音を調べて対応表を返す。
+
+    leading の場合や、無音を調べられなかった場合は None（先頭の無音だけを除去する従来の経路）。
+    """
+    if SILENCE_REMOVAL != "vad":
+        return None
+    try:
+        offsets = detect(src)
+    except (subprocess.CalledProcessError, ValueError) as e:
+        print(f"[WARN] Silence detection failed; trimming leading silence only: {e}")
+        return None
+    print(
+        f"[INFO] Silence: cutting {offsets.removed_seconds:.0f}s at {offsets.cuts} place(s) "
+        f"out of {offsets.duration:.0f}s: {src.name}"
+    )
+    return offsets
+
+
+def save_offsets(path: Path, offsets: OffsetMap | None) -> None:
+    """path に対応する対応表を保存する（None なら古い対応表を消す）。"""
+    target = offsets_path(path)
+    if offsets is None:
+        target.unlink(missing_ok=True)
+    else:
+        offsets.save(target)
+
+
+def report(offsets: OffsetMap, whisper_seconds: float) -> None:
+    """切り落とした音声の長さと、それによって節約できた whisper の処理時間（推定）を記録する。"""
+    kept = offsets.kept_seconds
+    # 残した音声と同じ速さで処理できたとみなして、切った分の処理時間を見積もる
+    saved = offsets.removed_seconds * whisper_seconds / kept if kept > 0 else 0.0
+    share = offsets.removed_seconds / offsets.duration if offsets.duration > 0 else 0.0
+    print(
+        f"[INFO] Silence removal saved {offsets.removed_seconds:.0f}s of audio ({share:.0%}) "
+        f"and ~{saved:.1f}s of whisper time"
+    )
+    metrics.add(
+        silence_removed_seconds=offsets.removed_seconds,
+        silence_cuts=offsets.cuts,
+        whisper_seconds_saved=saved,
+    )
+
+
+def remap_file(txt_path: Path, offsets: OffsetMap) -> None:
+    """文字起こしのタイムスタンプを元の録画の時刻に書き換える（タイムスタンプのない行はそのまま）。"""
+    fd, tmp_name = tempfile.mkstemp(dir=txt_path.parent, prefix=f".{txt_path.name}.", suffix=".tmp")
+    try:
+        with open(txt_path) as fin, os.fdopen(fd, "w") as fout:
+            for line in fin:
+                body = line.rstrip("\n")
+                parsed = parse_line(body)
+                if parsed is None:
+                    fout.write(line)
+                    continue
+                start, end, text = parsed
+                fout.write(
+                    format_line(offsets.to_original(start), offsets.to_original(end), text)
+                    + line[len(body) :]
+                )
+        shutil.copymode(txt_path, tmp_name)
+        os.replace(tmp_name, txt_path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
@@ -0,0 +1,189 @@
+# src/teams_transcript_notion_sync/staged.py
+"""
+ステージ並列実行エンジン。
+
+ffmpeg/whisper.cpp（CPUバウンド）と LLM/Notion（ネットワーク待ち）を
+別々のワーカープールで実行し、キューでつなぐ。
+
+    submit(mp4) --> [CPUプロセスプール] --handoff queue--> [ネットワークスレッドプール] --> Notion 送信キュー
+
+- 1件の失敗は他の会議に影響しない（エラーはその会議の status=error として記録）。
+- CPUプールのワーカープロセスが落ちる（OOM killer など）とプール全体が使えなくなるので、
+  プールを作り直し、処理中だった会議を投入し直す（チェックポイントから再開する）。
+- 状態管理(mark_processed)はすべて親プロセスでロックを取って行う。
+- ネットワークステージが終わった会議は status=queued になり、Notion への送信が
+  済んだ時点で outbox が done にする。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .pipeline import publish_stage, transcribe_stage
+from .scanner import mark_processed
+
+# ワーカープロセスが落ちたときに、同じ会議を投入し直す回数の上限
+# （落ちる原因の会議を何度も流して、他の会議を巻き添えにし続けないため）
+_MAX_CPU_RESUBMITS = 2
+
+
+class StagedPipeline:
+    """CPUステージとネットワークステージを別プールで並行実行するエンジン。"""
+
+    def __init__(
+        self,
+        cpu_jobs: int = 1,
+        net_jobs: int = 2,
+        on_published: Callable[[], None] | None = None,
+    ):
+        if cpu_jobs < 1 or net_jobs < 1:
+            raise ValueError("cpu_jobs と net_jobs は1以上を指定してください")
+
+        self._cpu_jobs = cpu_jobs
+        self._cpu_pool = ProcessPoolExecutor(max_workers=cpu_jobs)
+        # プールを作り直した回数（どのプールで落ちたかの判定用）と、会議ごとの投入し直した回数
+        self._cpu_generation = 0
+        self._resubmits: dict[Path, int] = {}
+        self._pool_lock = threading.Lock()
+        self._net_pool = ThreadPoolExecutor(
+            max_workers=net_jobs, thread_name_prefix="net-stage"
+        )
+        # CPUステージ完了 -> ネットワークステージ投入 の受け渡しキュー
+        self._handoff: queue.Queue[Path | None] = queue.Queue()
+        self._status_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._outstanding = 0
+        self.results: dict[str, str] = {}
+        # ページを送信キューに積んだときに呼ぶ（送信スレッドを起こすなど）
+        self._on_published = on_published
+
+        self._forwarder = threading.Thread(
+            target=self._forward, name="stage-handoff", daemon=True
+        )
+        self._forwarder.start()
+
+    # ----- 公開API -----
+
+    def submit(self, mp4: Path) -> None:
+        """会議(mp4)をCPUステージに投入する。"""
+        with self._cond:
+            self._outstanding += 1
+        self._submit_cpu(mp4)
+
+    def join(self) -> dict[str, str]:
+        """投入済みのすべての会議が完了するまで待ち、パスごとの結果を返す。"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._outstanding == 0)
+        return dict(self.results)
+
+    def close(self) -> None:
+        """残りのジョブを待ってからプールを停止する。"""
+        self.join()
+        self._handoff.put(None)
+        self._forwarder.join()
+        self._net_pool.shutdown(wait=True)
+        with self._pool_lock:
+            cpu_pool = self._cpu_pool
+        cpu_pool.shutdown(wait=True)
+
+    def __enter__(self) -> "StagedPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ----- 内部処理 -----
+
+    def _submit_cpu(self, mp4: Path) -> None:
+        with self._pool_lock:
+            pool, generation = self._cpu_pool, self._cpu_generation
+        try:
+            fut = pool.submit(transcribe_stage, mp4)
+        except BrokenProcessPool as e:
+            self._resubmit_cpu(mp4, generation, e)
+            return
+        except Exception as e:
+            self._finish(mp4, "error", e)
+            return
+        fut.add_done_callback(
+            lambda f, mp4=mp4, generation=generation: self._on_cpu_done(mp4, generation, f)
+        )
+
+    def _resubmit_cpu(self, mp4: Path, generation: int, error: BrokenProcessPool) -> None:
+        """ワーカープロセスが落ちて使えなくなったプールを作り直し、会議を投入し直す。"""
+        with self._pool_lock:
+            # 同じプールで処理中だった会議はすべてここに来るので、作り直すのは最初の1回だけ
+            if generation == self._cpu_generation:
+                print("[WARN] A CPU worker process died; restarting the process pool")
+                # 壊れたプールのコールバックから呼ばれるので、終了は待たない
+                self._cpu_pool.shutdown(wait=False)
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self._cpu_jobs)
+                self._cpu_generation += 1
+            resubmits = self._resubmits[mp4] = self._resubmits.get(mp4, 0) + 1
+        if resubmits > _MAX_CPU_RESUBMITS:
+            self._finish(mp4, "error", error)
+            return
+        print(f"[WARN] Resubmitting {mp4.name} (worker process died, retry {resubmits})")
+        self._submit_cpu(mp4)
+
+    def _on_cpu_done(self, mp4: Path, generation: int, fut: Future) -> None:
+        try:
+            fut.result()
+        except BrokenProcessPool as e:
+            self._resubmit_cpu(mp4, generation, e)
+            return
+        except Exception as e:
+            self._finish(mp4, "error", e)
+            return
+        self._set_status(mp4, "transcribed")
+        self._handoff.put(mp4)
+
+    def _forward(self) -> None:
+        while True:
+            mp4 = self._handoff.get()
+            if mp4 is None:
+                return
+            try:
+                fut = self._net_pool.submit(publish_stage, mp4)
+            except Exception as e:
+                self._finish(mp4, "error", e)
+                continue
+            fut.add_done_callback(lambda f, mp4=mp4: self._on_net_done(mp4, f))
+
+    def _on_net_done(self, mp4: Path, fut: Future) -> None:
+        try:
+            fut.result()
+        except Exception as e:
+            self._finish(mp4, "error", e)
+            return
+        # status=queued は outbox.enqueue が記録済み（送信済みなら done になっている）
+        self._complete(mp4, "queued")
+        if self._on_published is not None:
+            self._on_published()
+
+    def _finish(self, mp4: Path, status: str, error: Exception | None = None) -> None:
+        if error is not None:
+            print(f"[ERROR] while processing {mp4}: {error}")
+            self._set_status(mp4, status, note=str(error))
+        else:
+            self._set_status(mp4, status)
+        self._complete(mp4, status)
+
+    def _complete(self, mp4: Path, status: str) -> None:
+        with self._cond:
+            self.results[str(mp4)] = status
+            self._outstanding -= 1
+            self._cond.notify_all()
+
+    def _set_status(self, mp4: Path, status: str, note: str | None = None) -> None:
+        with self._status_lock:
+            try:
+                mark_processed(mp4, status=status, note=note)
+            except Exception as e:
+                # 状態記録の失敗で他の会議を止めない
+                print(f"[ERROR] failed to update status for {mp4}: {e}")
@@ -1,11 +1,18 @@
 import re
-
-import openai
+from concurrent.futures import ThreadPoolExecutor
 
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
-from .config import SUMMARY_DIR, LLM_BASE_URL, LLM_MODEL, LLM_API_KEY
+from .config import (
+    SUMMARY_DIR,
+    LLM_MODEL,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAX_PARALLEL,
+    SUMMARY_REPAIR_ATTEMPTS,
+)
+from . import llm_cache, llm_router, metrics
+from .segments import Transcript
 
 # 正規表現: Markdownテーブルの区切り行検出用
 _SEP_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)+\|?\s*$")
@@ -38,6 +45,77 @@ SUMMARY_PROMPT_TEMPLATE = """
 """
 
 
+PARTIAL_SUMMARY_PROMPT_TEMPLATE = """
+あなたは日本語の社内会議録を「トピック別に表で要約」する専門家です。
+以下は長い会議の文字起こしの一部（全{total}パート中の第{index}パート）です。
+このパートに含まれる内容だけを要約してください。
+
+【出力フォーマットの絶対ルール】
+- 出力は Markdown のテーブル「1つだけ」。テーブル以外の文章は禁止。
+- テーブルは「トピック」「内容」の2列で固定する。
+- 1行目はヘッダ行、2行目は区切り行（---）とする。
+- 3行目以降にトピック別要約を2〜7行で書く。決定事項・次のステップがあれば必ず含める。
+- セル内に改行や “|” を入れない。
+
+ーーー ここから文字起こし（第{index}パート） ーーー
+{transcript}
+ーーー ここまで文字起こし（第{index}パート） ーーー
+"""
+
+REDUCE_PROMPT_TEMPLATE = """
+あなたは日本語の社内会議録を「トピック別に表で要約」する専門家です。
+以下は1つの会議を時系列に分割して要約した部分要約の表です。
+これらを統合し、会議全体の要約を作成してください。
+重複するトピックはまとめ、決定事項と次のステップは漏らさないでください。
+
+【出力フォーマットの絶対ルール】
+- 出力は Markdown のテーブル「1つだけ」。テーブル以外の文章・見出し・注釈・引用・箇条書きは禁止。
+- テーブルは必ず次の2列で固定する（列の追加/削除は禁止）。
+  1) トピック
+  2) 内容
+- 1行目はヘッダ行、2行目は区切り行（---）とする。
+- 3行目以降にトピック別要約を3〜7行で書く。
+- 各セルは1〜3文で簡潔に。
+- セル内に改行は入れない。必要なら「、」「;」でつなぐ。
+- セル内で “|” を使わない（使うと列が壊れるため）。
+
+ーーー ここから部分要約 ーーー
+{partials}
+ーーー ここまで部分要約 ーーー
+"""
+
+REPAIR_PROMPT_TEMPLATE = """
+次のテキストは Markdown の2列テーブル（トピック / 内容）として不正です。
+検証エラー: {error_code}
+
+内容は変えずに、次のルールを満たすテーブル「1つだけ」に整形し直してください。
+- テーブル以外の文章・見出し・注釈は禁止。
+- 1行目はヘッダ行「| トピック | 内容 |」、2行目は区切り行「|---|---|」。
+- 3行目以降にトピック別要約を書く。セル内に改行や “|” を入れない。
+
+ーーー ここから整形対象 ーーー
+{summary}
+ーーー ここまで整形対象 ーーー
+"""
+
+_SYSTEM_PROMPT = "あなたは厳密で要約が得意なアシスタントです。"
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算。日本語は1文字≒1トークン、ASCIIは4文字≒1トークンとみなす。"""
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return (len(text) - ascii_chars) + ascii_chars // 4 + 1
+
+
+def split_transcript(transcript: str, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> List[str]:
+    """
+    文字起こしを行（タイムスタンプ行）の境界で、max_tokens 以下のチャンクに分割する。
+
+    1行だけで max_tokens を超える場合は、その行を文字数で分割する。
+    """
+    return Transcript(transcript).chunks(max_tokens, weight=estimate_tokens)
+
+
 def validate_and_normalize_markdown_table(text: str) -> Tuple[bool, str, str]:
     """Markdownテーブル形式の要約テキストを検証・正規化する。
     Args:
@@ -96,38 +174,138 @@ def validate_and_normalize_markdown_table(text: str) -> Tuple[bool, str, str]:
     return True, normalized, ""
 
 
-def summarize_transcript(transcript_path: Path) -> Path:
-    """指定された文字起こしファイルを要約し、要約ファイルのパスを返す。"""
-    SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
+def _messages(prompt: str) -> list[dict[str, str]]:
+    return [
+        {
+            "role": "system",
+            "content": _SYSTEM_PROMPT,
+        },
+        {"role": "user", "content": prompt},
+    ]
 
-    transcript = transcript_path.read_text()
-    truncated = transcript[:15000]
-    prompt = SUMMARY_PROMPT_TEMPLATE.format(transcript=truncated)
 
-    client = openai.OpenAI(
-        api_key=LLM_API_KEY,
-        base_url=LLM_BASE_URL,
-    )
+def _chat(prompt: str, *, use_cache: bool = True) -> str:
+    """LLM を呼び出す。use_cache=True ならキャッシュを参照・保存する。"""
+    messages = _messages(prompt)
+    if use_cache:
+        cached = llm_cache.get(LLM_MODEL, messages)
+        if cached is not None:
+            metrics.add(llm_cache_hits=1)
+            return cached
 
-    res = client.chat.completions.create(
+    # LLM_BACKENDS のうち最も空いているゲートウェイに送る（失敗したら別の台に切り替える）
+    res = llm_router.get_router().chat(
         model=LLM_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": "あなたは厳密で要約が得意なアシスタントです。",
-            },
-            {"role": "user", "content": prompt},
-        ],
+        messages=messages,
+    )
+    content = res.choices[0].message.content or ""
+    usage = getattr(res, "usage", None)
+    metrics.add(
+        llm_requests=1,
+        llm_prompt_tokens=getattr(usage, "prompt_tokens", None) or 0,
+        llm_completion_tokens=getattr(usage, "completion_tokens", None) or 0,
     )
 
-    summary = res.choices[0].message.content
+    if use_cache:
+        llm_cache.put(LLM_MODEL, messages, content)
+    return content
+
+
+def _complete_table(prompt: str) -> str:
+    """
+    最終要約の表を取得する。
+
+    出力が不正な表なら、不正な出力とエラーコードだけを送って整形し直させる
+    （最大 SUMMARY_REPAIR_ATTEMPTS 回。文字起こし全文は再送しない）。
+    正しい表になった結果だけを元のプロンプトのキーでキャッシュする。
+    """
+    messages = _messages(prompt)
+    cached = llm_cache.get(LLM_MODEL, messages)
+    if cached is not None:
+        metrics.add(llm_cache_hits=1)
+        return cached
+
+    summary = _chat(prompt, use_cache=False)
     is_valid, normalized, error_code = validate_and_normalize_markdown_table(summary)
+
+    for attempt in range(SUMMARY_REPAIR_ATTEMPTS):
+        if is_valid:
+            break
+        print(f"[WARN] Summary table invalid ({error_code}); repair attempt {attempt + 1}")
+        metrics.add(retries=1)
+        summary = _chat(
+            REPAIR_PROMPT_TEMPLATE.format(error_code=error_code, summary=summary),
+            use_cache=False,
+        )
+        is_valid, normalized, error_code = validate_and_normalize_markdown_table(summary)
+
     if not is_valid:
 
         raise ValueError(
             f"要約のフォーマットが不正です (error_code={error_code}):\n{summary}"
         )
-    summary = normalized
+
+    llm_cache.put(LLM_MODEL, messages, normalized)
+    return normalized
+
+
+def _summarize_partials(chunks: List[str]) -> List[str]:
+    """各チャンクを並列に要約する（map）。部分要約は多少崩れていてもそのまま使う。"""
+
+    def summarize_part(index: int) -> str:
+        prompt = PARTIAL_SUMMARY_PROMPT_TEMPLATE.format(
+            index=index + 1, total=len(chunks), transcript=chunks[index]
+        )
+        partial = _chat(prompt)
+        is_valid, normalized, _ = validate_and_normalize_markdown_table(partial)
+        return normalized if is_valid else partial.strip()
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_MAX_PARALLEL) as pool:
+        return list(pool.map(metrics.bind(summarize_part), range(len(chunks))))
+
+
+def _reduce_partials(partials: List[str]) -> str:
+    """
+    部分要約を1つの表に統合する（reduce）。
+
+    部分要約の合計が1回のプロンプトに収まらない場合は、収まる単位で並列に統合してから
+    さらに統合する（階層的 reduce）。
+    """
+    while True:
+        joined = "\n\n".join(partials) + "\n"
+        groups = split_transcript(joined, SUMMARY_CHUNK_TOKENS)
+        if len(groups) == 1 or len(groups) >= len(partials):
+            # 1回に収まった（または統合しても縮まない）ので最終要約にする
+            return _complete_table(REDUCE_PROMPT_TEMPLATE.format(partials=joined))
+
+        with ThreadPoolExecutor(max_workers=SUMMARY_MAX_PARALLEL) as pool:
+            partials = list(
+                pool.map(
+                    metrics.bind(lambda g: _chat(REDUCE_PROMPT_TEMPLATE.format(partials=g))),
+                    groups,
+                )
+            )
+
+
+def summarize_transcript(transcript_path: Path) -> Path:
+    """指定された文字起こしファイルを要約し、要約ファイルのパスを返す。
+
+    SUMMARY_CHUNK_TOKENS に収まらない長い文字起こしは、行境界でチャンクに分割して
+    並列に要約し（map）、部分要約を1つの表に統合する（reduce）。
+    """
+    SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
+
+    transcript = transcript_path.read_text()
+    chunks = split_transcript(transcript)
+    metrics.add(transcript_chars=len(transcript), summary_chunks=len(chunks))
+
+    if len(chunks) <= 1:
+        prompt = SUMMARY_PROMPT_TEMPLATE.format(transcript=transcript)
+        summary = _complete_table(prompt)
+    else:
+        print(f"[INFO] Summarizing {len(chunks)} chunks (map-reduce): {transcript_path}")
+        summary = _reduce_partials(_summarize_partials(chunks))
+
     out_path = SUMMARY_DIR / f"{transcript_path.stem}_summary.txt"
     out_path.write_text(summary)
     return out_path
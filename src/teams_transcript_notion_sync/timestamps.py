@@ -0,0 +1,51 @@
+"""
+文字起こしのタイムスタンプ行ユーティリティ。
+
+whisper.cpp の出力と同じ形式の行を扱う:
+
+    [00:10:51.000 --> 00:10:53.000]  分かりました
+"""
+
+from __future__ import annotations
+
+import re
+
+# 1発話分のセグメント: (start秒, end秒, テキスト)
+Segment = tuple[float, float, str]
+
+_TIMESTAMP_LINE_RE = re.compile(
+    r"^\s*\[(?P<start>[0-9:.,]+)\s*-->\s*(?P<end>[0-9:.,]+)\]\s*(?P<text>.*)$"
+)
+
+
+def parse_timestamp(value: str) -> float:
+    """"hh:mm:ss.mmm"（"mm:ss.mmm" や "," 区切りも可）を秒に変換する。"""
+    parts = value.strip().replace(",", ".").split(":")
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"invalid timestamp: {value!r}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """秒を "hh:mm:ss.mmm" 形式に変換する。"""
+    ms = max(int(round(seconds * 1000)), 0)
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def format_line(start: float, end: float, text: str) -> str:
+    """タイムスタンプ付きの1行を組み立てる。"""
+    return f"[{format_timestamp(start)} --> {format_timestamp(end)}]  {text}"
+
+
+def parse_line(line: str) -> tuple[float, float, str] | None:
+    """タイムスタンプ付きの行を (start, end, text) に分解する。該当しなければ None。"""
+    m = _TIMESTAMP_LINE_RE.match(line)
+    if not m:
+        return None
+    return parse_timestamp(m.group("start")), parse_timestamp(m.group("end")), m.group("text")
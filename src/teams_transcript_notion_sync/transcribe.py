@@ -1,45 +1,348 @@
 # src/teams_transcript_notion_sync/transcribe.py
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import os
+import re
 import subprocess
+import tempfile
+import time
 
-from .config import TRANSCRIPT_DIR, WHISPER_BIN, WHISPER_MODEL
+from . import metrics
+from .config import (
+    TRANSCRIPT_DIR,
+    TRANSCRIPT_INLINE_REPEAT,
+    TRANSCRIPT_REPEAT_MIN_RUN,
+    WHISPER_BACKEND,
+    WHISPER_BIN,
+    WHISPER_MODEL,
+    TRANSCRIBE_CHUNK_SECONDS,
+    TRANSCRIBE_CHUNK_OVERLAP,
+    TRANSCRIBE_JOBS,
+)
 from .scanner import mark_processed
-from .noise_filter import remove_speaker_label_noise
+from .noise_filter import RepeatStats, filter_file
+from .audio import extract_wav_segment, open_pcm_stream, wav_duration_seconds
+from .silence import OffsetMap, offsets_path, plan_for, remap_file, report, save_offsets
+from .segments import Transcript
+from .timestamps import Segment
+from .whisper_server import WhisperServerError, transcribe_via_server
 
 
-def transcribe_meeting(wav_path: Path, original_mp4: Path | None = None) -> Path:
-    """
-    .wav を whisper.cpp で文字起こしして .txt を生成する。
-    original_mp4 は processed 状態管理用（なければ無視）。
-    """
-    TRANSCRIPT_DIR.mkdir(parents=True, exist_ok=True)
-
-    out_prefix = TRANSCRIPT_DIR / wav_path.stem
-
+def _whisper_cmd(
+    input_arg: str,
+    out_prefix: Path,
+    *,
+    output_flag: str = "-oj",
+    threads: int | None = None,
+) -> list[str]:
+    """whisper.cpp の実行コマンドを組み立てる。input_arg に "-" を渡すと stdin から読む。"""
     cmd = [
         str(WHISPER_BIN),
         "-m",
         str(WHISPER_MODEL),
         "-f",
-        str(wav_path),
+        input_arg,
         "-l",
         "ja",
         "-of",
         str(out_prefix),
-        "-otxt",
+        output_flag,
     ]
+    if threads:
+        cmd += ["-t", str(threads)]
+    return cmd
 
-    subprocess.run(cmd, check=True)
 
-    txt_path = out_prefix.with_suffix(".txt")
-    # whisper.cpp が生成した txt を読み込み、ノイズを除去して上書き保存する
-    raw_text = txt_path.read_text()
-    cleaned_text = remove_speaker_label_noise(raw_text)
-    if cleaned_text != raw_text:
-        txt_path.write_text(cleaned_text)
+def _segments_via_server(audio: Path | bytes) -> list[Segment] | None:
+    """
+    WHISPER_BACKEND=server なら常駐サーバーで文字起こしする。
+
+    サーバーを使わない設定、またはサーバーが使えない場合は None を返す
+    （呼び出し側はサブプロセス方式で処理する）。
+    """
+    if WHISPER_BACKEND != "server":
+        return None
+    try:
+        return transcribe_via_server(audio)
+    except WhisperServerError as e:
+        print(f"[WARN] whisper server failed, falling back to subprocess: {e}")
+        return None
+
+
+def _write_segments(segments: list[Segment], txt_path: Path) -> Path:
+    """セグメントを [hh:mm:ss.mmm --> hh:mm:ss.mmm] 形式の txt として書き出す。"""
+    return Transcript.from_segments(segments).write(txt_path)
+
+
+def _run_whisper(
+    cmd: list[str], out_prefix: Path, txt_path: Path, **kwargs
+) -> subprocess.CompletedProcess:
+    """
+    whisper.cpp をセグメント単位の JSON 出力（-oj）で実行し、txt に書き出す。
+
+    txt の各行は whisper のセグメントそのままの時刻になる。
+    """
+    result = subprocess.run(cmd, **kwargs)
+    if result.returncode == 0:
+        json_path = out_prefix.with_suffix(".json")
+        Transcript.from_whisper_json(json_path).write(txt_path)
+        json_path.unlink()
+    return result
+
+
+def _finalize_transcript(
+    txt_path: Path,
+    original_mp4: Path | None,
+    offsets: OffsetMap | None = None,
+    whisper_seconds: float = 0.0,
+) -> Path:
+    """whisper.cpp が生成した txt からノイズを除去し、必要なら status を更新する。"""
+    # 途中の無音を切った音声なら、タイムスタンプを元の録画の時刻に戻す
+    if offsets is not None and offsets.removed_seconds > 0:
+        remap_file(txt_path, offsets)
+        report(offsets, whisper_seconds)
+
+    # whisper.cpp が生成した txt を1行ずつノイズ除去（ラベルと繰り返し）し、変化があれば置き換える
+    stats = RepeatStats()
+    filter_file(
+        txt_path,
+        repeat_min_run=TRANSCRIPT_REPEAT_MIN_RUN,
+        inline_repeat=TRANSCRIPT_INLINE_REPEAT,
+        stats=stats,
+    )
+    if stats.lines_removed or stats.chars_removed:
+        print(
+            f"[INFO] Collapsed repetitions: {stats.lines_removed} line(s), "
+            f"{stats.chars_removed} chars removed"
+        )
+        metrics.add(
+            repeat_lines_removed=stats.lines_removed,
+            repeat_chars_removed=stats.chars_removed,
+        )
 
     # mp4 が渡されていれば status 更新
     if original_mp4 is not None:
         mark_processed(original_mp4, status="transcribed")
 
     return txt_path
+
+
+def transcribe_meeting(wav_path: Path, original_mp4: Path | None = None) -> Path:
+    """
+    .wav を whisper.cpp で文字起こしして .txt を生成する。
+    original_mp4 は processed 状態管理用（なければ無視）。
+    .wav の隣に無音除去の対応表があれば、タイムスタンプを元の録画の時刻に戻す。
+    """
+    TRANSCRIPT_DIR.mkdir(parents=True, exist_ok=True)
+
+    out_prefix = TRANSCRIPT_DIR / wav_path.stem
+    txt_path = out_prefix.with_suffix(".txt")
+
+    started = time.perf_counter()
+    segments = _segments_via_server(wav_path)
+    if segments is not None:
+        _write_segments(segments, txt_path)
+    else:
+        cmd = _whisper_cmd(str(wav_path), out_prefix)
+        _run_whisper(cmd, out_prefix, txt_path, check=True)
+
+    return _finalize_transcript(
+        txt_path,
+        original_mp4,
+        OffsetMap.load(offsets_path(wav_path)),
+        time.perf_counter() - started,
+    )
+
+
+def transcribe_stream(
+    mp4_path: Path,
+    *,
+    start_silence: float = 5,
+    start_threshold_db: float = -40.0,
+    original_mp4: Path | None = None,
+) -> Path:
+    """
+    mp4 を ffmpeg でデコードしながら、PCM をパイプで whisper.cpp に渡して文字起こしする。
+
+    中間の .wav / -nosilence.wav を書かないストリーミング経路。
+    出力ファイル名はファイル経路と同じ transcripts/<stem>-nosilence.txt とする。
+    SILENCE_REMOVAL=vad なら先に mp4 の無音を調べ、対応表を txt の隣に保存する。
+    """
+    TRANSCRIPT_DIR.mkdir(parents=True, exist_ok=True)
+
+    out_prefix = TRANSCRIPT_DIR / f"{mp4_path.stem}-nosilence"
+    txt_path = out_prefix.with_suffix(".txt")
+
+    offsets = plan_for(mp4_path)
+    save_offsets(txt_path, offsets)
+    ffmpeg = open_pcm_stream(
+        mp4_path,
+        start_silence=start_silence,
+        start_threshold_db=start_threshold_db,
+        offsets=offsets,
+    )
+    started = time.perf_counter()
+
+    if WHISPER_BACKEND == "server":
+        # サーバーへはメモリ上の PCM をそのまま送る（ディスクには書かない）
+        with ffmpeg.stdout:
+            audio = ffmpeg.stdout.read()
+        if ffmpeg.wait() != 0:
+            raise subprocess.CalledProcessError(ffmpeg.returncode, ffmpeg.args)
+
+        segments = _segments_via_server(audio)
+        if segments is not None:
+            _write_segments(segments, txt_path)
+        else:
+            _run_whisper(
+                _whisper_cmd("-", out_prefix),
+                out_prefix,
+                txt_path,
+                input=audio,
+                check=True,
+            )
+        return _finalize_transcript(txt_path, original_mp4, offsets, time.perf_counter() - started)
+
+    try:
+        whisper = _run_whisper(
+            _whisper_cmd("-", out_prefix),
+            out_prefix,
+            txt_path,
+            stdin=ffmpeg.stdout,
+        )
+    finally:
+        # whisper 側が先に終了しても ffmpeg が SIGPIPE で止まるように閉じておく
+        ffmpeg.stdout.close()
+        ffmpeg_rc = ffmpeg.wait()
+
+    if ffmpeg_rc != 0:
+        raise subprocess.CalledProcessError(ffmpeg_rc, ffmpeg.args)
+    whisper.check_returncode()
+
+    return _finalize_transcript(txt_path, original_mp4, offsets, time.perf_counter() - started)
+
+
+# ===== 分割並列文字起こし =====
+
+
+def plan_windows(
+    duration: float,
+    chunk_seconds: float,
+    overlap_seconds: float,
+) -> list[tuple[float, float]]:
+    """音声全体を、オーバーラップ付きの固定長ウィンドウ [start, end) に分割する。"""
+    if chunk_seconds <= overlap_seconds:
+        raise ValueError("chunk_seconds は overlap_seconds より大きくしてください")
+
+    windows: list[tuple[float, float]] = []
+    start = 0.0
+    while True:
+        end = min(start + chunk_seconds, duration)
+        windows.append((start, end))
+        if end >= duration:
+            return windows
+        start = end - overlap_seconds
+
+
+_NORMALIZE_RE = re.compile(r"[\s、。,.!?！？「」]+")
+
+
+def _same_utterance(a: str, b: str) -> bool:
+    """オーバーラップ区間で二重に認識された発話かどうかを判定する。"""
+    a = _NORMALIZE_RE.sub("", a)
+    b = _NORMALIZE_RE.sub("", b)
+    if not a or not b:
+        return a == b
+    return a == b or (min(len(a), len(b)) >= 4 and (a in b or b in a))
+
+
+def stitch_segments(
+    windows: list[tuple[float, float]],
+    chunk_segments: list[list[Segment]],
+    overlap_seconds: float,
+) -> list[Segment]:
+    """
+    ウィンドウごとの結果（チャンク内の相対時刻）を、元音声の時刻に直して1本につなぐ。
+
+    - 隣り合うウィンドウはオーバーラップ区間の中点で切り替える。
+    - 切り替え付近で両方のウィンドウに現れた同じ発話は1つにまとめる。
+    """
+    cuts = [windows[i + 1][0] + overlap_seconds / 2 for i in range(len(windows) - 1)]
+
+    stitched: list[Segment] = []
+    for i, ((win_start, _), segments) in enumerate(zip(windows, chunk_segments)):
+        lower = cuts[i - 1] if i > 0 else float("-inf")
+        upper = cuts[i] if i < len(cuts) else float("inf")
+        for start, end, text in segments:
+            start += win_start
+            end += win_start
+            if not lower <= start < upper:
+                continue
+            if (
+                stitched
+                and start - stitched[-1][0] <= overlap_seconds
+                and _same_utterance(stitched[-1][2], text)
+            ):
+                # 境界をまたいだ重複: 先に現れた方（開始時刻）を残し、終了時刻だけ伸ばす
+                prev_start, prev_end, prev_text = stitched[-1]
+                longer = text if len(text) > len(prev_text) else prev_text
+                stitched[-1] = (prev_start, max(prev_end, end), longer)
+                continue
+            stitched.append((start, end, text))
+    return stitched
+
+
+def transcribe_chunked(
+    wav_path: Path,
+    *,
+    chunk_seconds: float = TRANSCRIBE_CHUNK_SECONDS,
+    overlap_seconds: float = TRANSCRIBE_CHUNK_OVERLAP,
+    jobs: int = TRANSCRIBE_JOBS,
+    original_mp4: Path | None = None,
+) -> Path:
+    """
+    長い .wav をオーバーラップ付きのウィンドウに分割し、whisper.cpp を並列に実行して
+    1本の .txt（[hh:mm:ss.mmm --> hh:mm:ss.mmm] 形式）にまとめる。
+
+    出力先・ノイズ除去・status 更新・タイムスタンプの復元は transcribe_meeting と同じ。
+    """
+    TRANSCRIPT_DIR.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    windows = plan_windows(wav_duration_seconds(wav_path), chunk_seconds, overlap_seconds)
+    # whisper.cpp 1プロセスあたりのスレッド数をコア数から割り当てる
+    threads = max((os.cpu_count() or 1) // max(jobs, 1), 1)
+
+    with tempfile.TemporaryDirectory(prefix=f"{wav_path.stem}-chunks-", dir=TRANSCRIPT_DIR) as tmp:
+        tmp_dir = Path(tmp)
+
+        def run_window(index: int) -> list[Segment]:
+            start, end = windows[index]
+            chunk_wav = extract_wav_segment(
+                wav_path, tmp_dir / f"chunk{index:04d}.wav", start, end
+            )
+            segments = _segments_via_server(chunk_wav)
+            if segments is not None:
+                return segments
+
+            prefix = tmp_dir / f"chunk{index:04d}"
+            cmd = _whisper_cmd(str(chunk_wav), prefix, threads=threads)
+            subprocess.run(cmd, check=True)
+            chunk_wav.unlink()
+            return [
+                (seg.start, seg.end, seg.text)
+                for seg in Transcript.from_whisper_json(prefix.with_suffix(".json"))
+            ]
+
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+            chunk_segments = list(pool.map(run_window, range(len(windows))))
+
+    segments = stitch_segments(windows, chunk_segments, overlap_seconds)
+
+    txt_path = _write_segments(segments, (TRANSCRIPT_DIR / wav_path.stem).with_suffix(".txt"))
+    return _finalize_transcript(
+        txt_path,
+        original_mp4,
+        OffsetMap.load(offsets_path(wav_path)),
+        time.perf_counter() - started,
+    )
@@ -0,0 +1,283 @@
+# src/teams_transcript_notion_sync/watch.py
+"""
+watch モード（常駐して新しい録画を待つ）。
+
+    [inotify / ポーリング] --変化した mp4--> [StabilityTracker] --書き込みが止まった mp4--> StagedPipeline.submit
+
+- Linux では inotify（ctypes で libc を直接呼ぶ）で ONEDRIVE_MEETINGS_DIR 以下を監視する。
+  使えない環境（macOS、監視数の上限など）では差分スキャンによるポーリングに切り替える。
+- OneDrive がダウンロード中のファイルを拾わないよう、サイズと mtime が
+  FILE_STABLE_SECONDS の間変わらなくなってから処理に回す。
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import signal
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Set
+
+from .config import (
+    FILE_STABLE_SECONDS,
+    ONEDRIVE_MEETINGS_DIR,
+    PIPELINE_CPU_JOBS,
+    PIPELINE_NET_JOBS,
+    WATCH_BACKEND,
+    WATCH_POLL_INTERVAL,
+    WHISPER_BACKEND,
+)
+from .scanner import find_new_mp4s, needs_processing, scan_mp4s
+
+# <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_candidate(name: str) -> bool:
+    # OneDrive/Office の一時ファイル（".xxx" / "~$xxx"）は対象外
+    return name.lower().endswith(".mp4") and not name.startswith((".", "~$"))
+
+
+class InotifyWatcher:
+    """inotify で root 以下のディレクトリを再帰的に監視する。"""
+
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        self._dirs: Dict[int, str] = {}
+        self.root = root
+        try:
+            self._add_tree(str(root))
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            # ENOSPC: fs.inotify.max_user_watches に達した
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        self._dirs[wd] = path
+
+    def _add_tree(self, top: str) -> Set[Path]:
+        """top 以下のディレクトリをすべて監視対象にし、既にある mp4 を返す。"""
+        found: Set[Path] = set()
+        for dir_path, dirnames, filenames in os.walk(top):
+            self._add_watch(dir_path)
+            found.update(Path(dir_path) / n for n in filenames if _is_candidate(n))
+        return found
+
+    def poll(self, timeout: float) -> Set[Path]:
+        """timeout 秒までイベントを待ち、変化のあった mp4 のパスを返す。"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & _IN_Q_OVERFLOW:
+                    # イベントを取りこぼしたので、全体を読み直す
+                    print("[WARN] inotify queue overflowed; rescanning")
+                    changed.update(self._add_tree(str(self.root)))
+                    continue
+                if mask & _IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                parent = self._dirs.get(wd)
+                if parent is None or not name:
+                    continue
+                path = os.path.join(parent, name)
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # 新しいフォルダ（移動してきたものは中身ごと）を監視に加える
+                        changed.update(self._add_tree(path))
+                elif _is_candidate(name):
+                    changed.add(Path(path))
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """差分スキャン（scanner.scan_mp4s）を一定間隔で実行して変化を検出する。"""
+
+    def __init__(self, root: Path, interval: float = WATCH_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        # 起動時点の一覧を基準にし、以降に追加/更新されたものだけを返す
+        self._snapshot: Dict[Path, list] = scan_mp4s(root)[0]
+        self._next_scan = time.monotonic() + interval
+
+    def poll(self, timeout: float) -> Set[Path]:
+        now = time.monotonic()
+        if now < self._next_scan:
+            time.sleep(min(timeout, self._next_scan - now))
+            return set()
+        self._next_scan = now + self.interval
+
+        found, _ = scan_mp4s(self.root)
+        changed = {
+            p
+            for p, stat in found.items()
+            if _is_candidate(p.name) and self._snapshot.get(p) != stat
+        }
+        self._snapshot = found
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(root: Path = ONEDRIVE_MEETINGS_DIR, backend: str = WATCH_BACKEND):
+    """設定に応じた監視方法を返す（auto なら inotify を試してからポーリング）。"""
+    if backend in ("auto", "inotify"):
+        try:
+            watcher = InotifyWatcher(root)
+            print(f"[INFO] Watching {root} with inotify")
+            return watcher
+        except OSError as e:
+            if backend == "inotify":
+                raise
+            print(f"[INFO] inotify is not available ({e}); falling back to polling")
+    print(f"[INFO] Watching {root} by polling every {WATCH_POLL_INTERVAL:g}s")
+    return PollingWatcher(root)
+
+
+class StabilityTracker:
+    """サイズと mtime が stable_seconds の間変わらなくなったファイルを返す。"""
+
+    def __init__(self, stable_seconds: float = FILE_STABLE_SECONDS):
+        self.stable_seconds = stable_seconds
+        # パス -> (size, mtime_ns, 最後に変化を見た時刻)
+        self._pending: Dict[Path, tuple[int, int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, paths: Iterable[Path]) -> None:
+        """変化のあったファイルを登録する（登録済みなら待ち時間をリセットする）。"""
+        now = time.monotonic()
+        for path in paths:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                self._pending.pop(path, None)
+                continue
+            self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+
+    def pop_ready(self) -> list[Path]:
+        """書き込みが止まったファイルを取り出す。"""
+        now = time.monotonic()
+        ready: list[Path] = []
+        for path, (size, mtime_ns, since) in list(self._pending.items()):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                del self._pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns) or st.st_size == 0:
+                self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - since >= self.stable_seconds:
+                del self._pending[path]
+                ready.append(path)
+        return ready
+
+
+def watch(
+    cpu_jobs: int | None = None,
+    net_jobs: int | None = None,
+    *,
+    backend: str = WATCH_BACKEND,
+    stable_seconds: float = FILE_STABLE_SECONDS,
+    stop: threading.Event | None = None,
+) -> None:
+    """ONEDRIVE_MEETINGS_DIR を監視し、書き込みの終わった新しい録画を順次処理する。
+
+    Ctrl+C / SIGTERM（または stop.set()）で、処理中の会議を終えてから停止する。
+    """
+    from . import outbox, scheduler
+    from .staged import StagedPipeline
+
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    if WHISPER_BACKEND == "server":
+        from .whisper_server import ensure_server
+
+        if not ensure_server():
+            print("[WARN] whisper server is not available; using subprocess mode")
+
+    watcher = open_watcher(ONEDRIVE_MEETINGS_DIR, backend)
+    tracker = StabilityTracker(stable_seconds)
+    # 起動前に届いていた録画も、書き込みが終わっているか確認してから処理する
+    tracker.touch(find_new_mp4s(min_age=0))
+    # 投入済みのファイル -> 投入時の mtime_ns（同じ内容を二重に投入しない）
+    submitted: Dict[Path, int] = {}
+    tick = max(min(1.0, stable_seconds / 2), 0.05)
+
+    with outbox.OutboxFlusher() as flusher, StagedPipeline(
+        cpu_jobs=cpu_jobs or PIPELINE_CPU_JOBS,
+        net_jobs=net_jobs or PIPELINE_NET_JOBS,
+        on_published=flusher.notify,
+    ) as engine:
+        try:
+            while not stop.is_set():
+                tracker.touch(watcher.poll(tick))
+                # 同時に書き込みの終わった録画は SCHEDULE_POLICY の順に投入する
+                for path in scheduler.order(tracker.pop_ready()):
+                    try:
+                        mtime_ns = path.stat().st_mtime_ns
+                        if submitted.get(path) == mtime_ns or not needs_processing(path):
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    print(f"[INFO] Ready: {path}")
+                    submitted[path] = mtime_ns
+                    engine.submit(path)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print("[INFO] Stopping watch; waiting for running meetings to finish")
+            watcher.close()
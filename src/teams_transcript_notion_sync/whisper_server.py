@@ -0,0 +1,141 @@
+# src/teams_transcript_notion_sync/whisper_server.py
+"""
+常駐 whisper サーバー（whisper.cpp の whisper-server 互換）バックエンド。
+
+モデルをサーバー側で1度だけ読み込み、会議ごとの文字起こしは HTTP の
+POST /inference（multipart の file + response_format=verbose_json）で依頼する。
+
+WHISPER_SERVER_BIN が設定されていれば、サーバーが起動していない場合に
+このプロセスから起動し、終了時に停止する。
+"""
+
+from __future__ import annotations
+
+import atexit
+import subprocess
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from .config import (
+    WHISPER_MODEL,
+    WHISPER_SERVER_BIN,
+    WHISPER_SERVER_START_TIMEOUT,
+    WHISPER_SERVER_TIMEOUT,
+    WHISPER_SERVER_URL,
+)
+from .timestamps import Segment
+
+
+class WhisperServerError(RuntimeError):
+    """whisper サーバーに接続できない、またはエラー応答が返った場合の例外。"""
+
+
+_server_proc: subprocess.Popen | None = None
+
+
+def server_available(url: str = WHISPER_SERVER_URL, timeout: float = 1.0) -> bool:
+    """サーバーが HTTP で応答するかどうかを返す。"""
+    import requests
+
+    try:
+        requests.get(url, timeout=timeout)
+    except requests.RequestException:
+        return False
+    return True
+
+
+def ensure_server(url: str = WHISPER_SERVER_URL) -> bool:
+    """
+    サーバーが使える状態にする。既に起動済みなら何もしない。
+
+    Returns:
+        サーバーが利用可能なら True。起動できなかった場合は False（呼び出し側はサブプロセスで処理する）。
+    """
+    global _server_proc
+
+    if server_available(url):
+        return True
+    if not WHISPER_SERVER_BIN or _server_proc is not None:
+        return False
+
+    parsed = urlparse(url)
+    cmd = [
+        str(WHISPER_SERVER_BIN),
+        "-m",
+        str(WHISPER_MODEL),
+        "-l",
+        "ja",
+        "--host",
+        parsed.hostname or "127.0.0.1",
+        "--port",
+        str(parsed.port or 8080),
+    ]
+    print(f"[INFO] Starting whisper server: {' '.join(cmd)}")
+    _server_proc = subprocess.Popen(cmd)
+    atexit.register(_stop_server)
+
+    deadline = time.monotonic() + WHISPER_SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if _server_proc.poll() is not None:
+            print(f"[WARN] whisper server exited with code {_server_proc.returncode}")
+            return False
+        if server_available(url):
+            return True
+        time.sleep(0.5)
+
+    print("[WARN] whisper server did not become ready in time")
+    return False
+
+
+def _stop_server() -> None:
+    if _server_proc is not None and _server_proc.poll() is None:
+        _server_proc.terminate()
+        try:
+            _server_proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _server_proc.kill()
+
+
+def transcribe_via_server(
+    audio: Path | bytes,
+    *,
+    language: str = "ja",
+    url: str = WHISPER_SERVER_URL,
+    timeout: float = WHISPER_SERVER_TIMEOUT,
+) -> list[Segment]:
+    """
+    WAV（ファイルパスまたはバイト列）をサーバーで文字起こしし、セグメントを返す。
+
+    Raises:
+        WhisperServerError: 接続失敗・タイムアウト・エラー応答の場合
+    """
+    import requests
+
+    data = audio.read_bytes() if isinstance(audio, Path) else audio
+
+    try:
+        res = requests.post(
+            f"{url.rstrip('/')}/inference",
+            files={"file": ("audio.wav", data, "audio/wav")},
+            data={
+                "response_format": "verbose_json",
+                "language": language,
+                "temperature": "0.0",
+            },
+            timeout=timeout,
+        )
+        res.raise_for_status()
+        body = res.json()
+    except (requests.RequestException, ValueError) as e:
+        raise WhisperServerError(str(e)) from e
+
+    if "error" in body:
+        raise WhisperServerError(str(body["error"]))
+
+    segments: list[Segment] = []
+    for seg in body.get("segments", []):
+        text = seg.get("text", "").strip()
+        if text:
+            segments.append((float(seg["start"]), float(seg["end"]), text))
+    return segments
@@ -0,0 +1,30 @@
+# tests/conftest.py
+"""
+パッケージを import するテストのための設定。
+
+config は必須の環境変数を最初に参照したときに要求するため、import 前にダミー値と
+一時ディレクトリを設定しておく（benchmarks/_common.bootstrap_env と同じ考え方）。
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+_base_dir = Path(tempfile.mkdtemp(prefix="teams-sync-tests-"))
+for key, value in {
+    "APP_BASE_DIR": str(_base_dir),
+    "ONEDRIVE_MEETINGS_DIR": str(_base_dir / "meetings"),
+    "WHISPER_BIN": str(ROOT / "benchmarks" / "stubs" / "fake_whisper.py"),
+    "WHISPER_MODEL": str(_base_dir / "ggml-dummy.bin"),
+    "NOTION_TOKEN": "secret_dummy",
+    "NOTION_DATABASE_ID": "dummy",
+    "BASE_URL": "http://127.0.0.1:9/v1",
+    "MODEL": "dummy",
+}.items():
+    os.environ.setdefault(key, value)
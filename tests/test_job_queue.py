@@ -0,0 +1,118 @@
+# tests/test_job_queue.py
+"""
+ジョブキュー（job_queue）の確認: 同時の取り出し、リース切れの引き継ぎ、リースを失ったワーカーの扱い。
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from teams_transcript_notion_sync import job_queue, pipeline, scanner
+from teams_transcript_notion_sync.db import connect
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def queue_db(tmp_path, monkeypatch) -> Path:
+    db_path = tmp_path / "processed_files.sqlite3"
+    monkeypatch.setattr(job_queue, "PROCESSED_DB", db_path)
+    monkeypatch.setattr(scanner, "PROCESSED_DB", db_path)
+    return db_path
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    fake = _Clock()
+    monkeypatch.setattr(job_queue.time, "time", fake.time)
+    return fake
+
+
+def _meetings(tmp_path: Path, n: int) -> list[Path]:
+    paths = []
+    for i in range(n):
+        path = tmp_path / "meetings" / f"meeting-{i:02d}.mp4"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+        paths.append(path)
+    return paths
+
+
+def _job(db_path: Path, path: Path) -> dict:
+    row = connect(db_path).execute(
+        "SELECT status, worker, attempts FROM jobs WHERE path = ?", (str(path),)
+    ).fetchone()
+    return dict(row)
+
+
+def test_concurrent_claims_never_return_the_same_job(tmp_path, queue_db):
+    paths = _meetings(tmp_path, 20)
+    assert job_queue.enqueue(paths) == 20
+
+    claimed: list[Path] = []
+    lock = threading.Lock()
+    start = threading.Barrier(8)
+
+    def worker(name: str) -> None:
+        start.wait()
+        while (lease := job_queue.claim(name, lease_seconds=60)) is not None:
+            with lock:
+                claimed.append(lease.path)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=60)
+
+    assert sorted(claimed) == paths
+    assert job_queue.count_by_status() == {"leased": 20}
+
+
+def test_expired_lease_is_requeued_and_taken_over_once(tmp_path, queue_db, clock):
+    (path,) = _meetings(tmp_path, 1)
+    job_queue.enqueue([path])
+
+    # a はハートビートを送らないまま止まる
+    lease_a = job_queue.claim("a", lease_seconds=30)
+    assert lease_a is not None and lease_a.attempts == 1
+    clock.now += 10
+    assert job_queue.claim("b", lease_seconds=30) is None
+
+    clock.now += 21
+    lease_b = job_queue.claim("b", lease_seconds=30)
+    assert lease_b is not None and lease_b.path == path and lease_b.attempts == 2
+    assert job_queue.claim("c", lease_seconds=30) is None
+    assert _job(queue_db, path) == {"status": "leased", "worker": "b", "attempts": 2}
+
+
+def test_worker_that_lost_its_lease_does_not_publish_or_complete(
+    tmp_path, queue_db, clock, monkeypatch
+):
+    (path,) = _meetings(tmp_path, 1)
+    job_queue.enqueue([path])
+    lease_a = job_queue.claim("a", lease_seconds=30)
+    published: list[Path] = []
+
+    def slow_transcribe(mp4: Path) -> None:
+        # 文字起こしの間にリースが切れ、b が引き継ぐ
+        clock.now += 31
+        assert job_queue.claim("b", lease_seconds=30) is not None
+
+    monkeypatch.setattr(pipeline, "transcribe_stage", slow_transcribe)
+    monkeypatch.setattr(pipeline, "publish_stage", published.append)
+
+    assert job_queue._process(lease_a, lease_seconds=30) is False
+    assert published == []
+    assert job_queue.complete(lease_a) is False
+    assert job_queue.fail(lease_a, RuntimeError("late")) is False
+    assert _job(queue_db, path) == {"status": "leased", "worker": "b", "attempts": 2}
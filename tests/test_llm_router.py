@@ -0,0 +1,126 @@
+# tests/test_llm_router.py
+"""
+llm_router.Router の確認: 切り替え、健全性、振り分け、同時実行の上限、クールダウン。
+
+ゲートウェイには benchmarks/stubs/fake_llm.py を使う。
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from teams_transcript_notion_sync import llm_router
+from teams_transcript_notion_sync.llm_router import Router
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks" / "stubs"))
+
+from fake_llm import start_fake_llm  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "会議の要約"}]
+
+
+@pytest.fixture
+def gateways():
+    servers = [start_fake_llm(latency=0.0) for _ in range(2)]
+    yield [(server.RequestHandlerClass.state, f"{url}/v1") for server, url in servers]
+    for server, _ in servers:
+        server.shutdown()
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    fake = _Clock()
+    monkeypatch.setattr(llm_router.time, "monotonic", fake.monotonic)
+    return fake
+
+
+def _router(gateways, **kwargs) -> Router:
+    return Router([url for _, url in gateways], api_key="dummy", **kwargs)
+
+
+def test_transient_error_fails_over_to_another_backend(gateways):
+    (bad, _), (good, _) = gateways
+    bad.fail_status = 503
+    router = _router(gateways, cooldown=30.0)
+    # まだ応答のない台は同じ見込み時間なので、先に並べた（落ちている）台が選ばれる
+    router.chat(model="dummy", messages=MESSAGES)
+
+    assert (bad.failed, good.requests) == (1, 1)
+    first, second = router.stats()
+    assert first["errors"] == 1 and not first["healthy"]
+    assert second["errors"] == 0 and second["healthy"]
+
+    # 外している間は、落ちた台に送らない
+    router.chat(model="dummy", messages=MESSAGES)
+    assert (bad.failed, good.requests) == (1, 2)
+
+
+def test_non_transient_error_leaves_backend_health_untouched(gateways):
+    (state, _), (other, _) = gateways
+    state.fail_status = 400
+    router = _router(gateways)
+
+    with pytest.raises(Exception):
+        router.chat(model="dummy", messages=MESSAGES)
+    # リクエスト自体の誤りは別の台に送り直さない
+    assert (state.failed, other.requests) == (1, 0)
+    first, _ = router.stats()
+    assert first["healthy"] and first["errors"] == 0 and first["in_flight"] == 0
+
+
+def test_least_cost_backend_is_chosen(gateways):
+    router = _router(gateways)
+    slow, fast = router.backends
+    slow.latency, fast.latency = 1.8, 0.5
+    # fast の見込み時間は処理中の件数に応じて 0.5, 1.0, 1.5, 2.0 と増える
+    assert [router._acquire([]) for _ in range(3)] == [fast, fast, fast]
+    assert router._acquire([]) is slow
+
+
+def test_in_flight_cap_makes_callers_wait(gateways):
+    router = _router(gateways, max_inflight=1)
+    first = router._acquire([])
+    second = router._acquire([])
+    assert {first, second} == set(router.backends)
+
+    acquired: list = []
+    waiter = threading.Thread(target=lambda: acquired.append(router._acquire([])))
+    waiter.start()
+    waiter.join(timeout=0.2)
+    assert waiter.is_alive() and acquired == []
+
+    router._release(second, elapsed=0.1)
+    waiter.join(timeout=5)
+    assert acquired == [second]
+    assert [b.in_flight for b in router.backends] == [1, 1]
+
+
+def test_cooldown_doubles_and_backend_returns_after_it(gateways, clock):
+    router = _router(gateways, cooldown=10.0)
+    down, up = router.backends
+    up.latency = 5.0
+
+    assert router._release(router._acquire([]), error=RuntimeError("503")) == 10.0
+    assert router._acquire([]) is up
+    router._release(up, elapsed=5.0)
+
+    clock.now += 10.0
+    backend = router._acquire([])
+    assert backend is down
+    # 連続して失敗すると倍の時間外す
+    assert router._release(backend, error=RuntimeError("503")) == 20.0
+    clock.now += 19.0
+    assert router._acquire([]) is up
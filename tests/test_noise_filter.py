@@ -0,0 +1,88 @@
+# tests/test_noise_filter.py
+"""
+whisper の繰り返し（noise_filter.collapse_lines）の除去の確認。
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from teams_transcript_notion_sync.noise_filter import RepeatStats, collapse_lines
+
+
+def _ts(second: int, text: str) -> str:
+    return f"[00:00:{second:02d}.000 --> 00:00:{second + 1:02d}.000]  {text}"
+
+
+@pytest.mark.parametrize(
+    ("lines", "min_run", "expected"),
+    [
+        pytest.param(
+            ["はい", "ご視聴ありがとうございました"] + ["ご視聴ありがとうございました"] * 2,
+            3,
+            ["はい", "ご視聴ありがとうございました"],
+            id="run-at-threshold",
+        ),
+        pytest.param(
+            ["はい", "ありがとうございました", "ありがとうございました", "次へ"],
+            3,
+            ["はい", "ありがとうございました", "ありがとうございました", "次へ"],
+            id="run-below-threshold",
+        ),
+        pytest.param(
+            ["同じ"] * 5,
+            2,
+            ["同じ"],
+            id="lower-threshold",
+        ),
+        pytest.param(
+            ["同じ"] * 5,
+            0,
+            ["同じ"] * 5,
+            id="disabled",
+        ),
+        pytest.param(
+            ["同じ", "同じ", "別の発話", "同じ", "同じ"],
+            3,
+            ["同じ", "同じ", "別の発話", "同じ", "同じ"],
+            id="interrupted-by-other-line",
+        ),
+        pytest.param(
+            ["同じ", "同じ", "", "同じ", "同じ", "同じ"],
+            3,
+            ["同じ", "同じ", "", "同じ"],
+            id="interrupted-by-blank-line",
+        ),
+        pytest.param(
+            ["同じ。", "同じ", "ＯＮＥ", "one!", "One"],
+            3,
+            ["同じ。", "同じ", "ＯＮＥ"],
+            id="normalized-comparison",
+        ),
+    ],
+)
+def test_collapse_lines(lines, min_run, expected):
+    assert list(collapse_lines(lines, min_run=min_run)) == expected
+
+
+def test_collapsed_line_keeps_first_timestamp():
+    lines = [_ts(1, "はい"), _ts(2, "以上です"), _ts(3, "以上です"), _ts(4, "以上です。"), _ts(5, "次へ")]
+    stats = RepeatStats()
+
+    assert list(collapse_lines(lines, min_run=3, stats=stats)) == [
+        _ts(1, "はい"),
+        _ts(2, "以上です"),
+        _ts(5, "次へ"),
+    ]
+    assert stats.lines_removed == 2
+    assert stats.chars_removed == len(_ts(3, "以上です")) + len(_ts(4, "以上です。")) + 2
+
+
+def test_inline_repeat_is_collapsed_within_a_line():
+    lines = [_ts(1, "そうですね、そうですね、そうですね、そうですね")]
+    stats = RepeatStats()
+
+    assert list(collapse_lines(lines, min_run=0, inline=True, stats=stats)) == [
+        _ts(1, "そうですね")
+    ]
+    assert stats.lines_removed == 0 and stats.chars_removed > 0
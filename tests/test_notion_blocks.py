@@ -0,0 +1,54 @@
+# tests/test_notion_blocks.py
+"""
+notion_writer.pack_transcript_blocks のトグルが、1リクエストの上限に収まることの確認。
+"""
+
+from __future__ import annotations
+
+from teams_transcript_notion_sync import notion_writer
+from teams_transcript_notion_sync.notion_writer import (
+    block_count,
+    iter_batches,
+    pack_transcript_blocks,
+    payload_bytes,
+)
+
+
+def _transcript(lines: int, chars: int) -> str:
+    return "".join(
+        f"[00:{i // 60:02d}:{i % 60:02d}.000 --> 00:{i // 60:02d}:{i % 60:02d}.900]  {'あ' * chars}\n"
+        for i in range(lines)
+    )
+
+
+def _pack(text: str, chars: int) -> list[dict]:
+    # 1行を1つの段落にする
+    return pack_transcript_blocks(
+        text, layout="toggle", group_minutes=60, segment_chars=chars + 50, segments_per_block=1
+    )
+
+
+def _toggles(blocks: list[dict]) -> list[dict]:
+    return [b for b in blocks if "toggle" in b]
+
+
+def test_toggle_children_are_capped_by_count():
+    blocks = _pack(_transcript(150, 10), 10)
+    (toggle,) = _toggles(blocks)
+    assert block_count(toggle) == notion_writer.NOTION_MAX_CHILDREN
+    assert len(blocks) == 1 + 150 - (notion_writer.NOTION_MAX_CHILDREN - 1)
+
+
+def test_toggle_children_are_capped_by_payload_bytes(monkeypatch):
+    monkeypatch.setattr(notion_writer, "NOTION_MAX_PAYLOAD_BYTES", 20_000)
+    blocks = _pack(_transcript(40, 1000), 1000)
+    (toggle,) = _toggles(blocks)
+    assert payload_bytes(toggle) <= 20_000
+    # 入りきらない段落はトグルの外に、順番どおり続ける
+    outside = blocks[1:]
+    assert outside and all("paragraph" in b for b in outside)
+    assert len(toggle["toggle"]["children"]) + len(outside) == 40
+
+    # どのバッチもサイズの上限に収まる
+    for batch in iter_batches(blocks, max_bytes=20_000):
+        assert sum(payload_bytes(b) for b in batch) <= 20_000
@@ -0,0 +1,246 @@
+# tests/test_notion_call.py
+"""
+notion_writer._call のリトライ（429 / Retry-After / 5xx / タイムアウト）と、
+プロセス間で共有するレートリミッター（rate_limit.SharedTokenBucket）の確認。
+
+429 の経路は benchmarks/stubs/mock_notion.py に本物の Client でつないでも確かめる。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+from notion_client import Client
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from teams_transcript_notion_sync import notion_writer, rate_limit
+from teams_transcript_notion_sync.rate_limit import SharedTokenBucket
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks" / "stubs"))
+
+from mock_notion import start_mock_notion  # noqa: E402
+
+
+def _http_error(status: int, headers: dict | None = None) -> HTTPResponseError:
+    # コンストラクタの引数は notion-client 2.x と 3.x で違うため、属性を直接入れる
+    error = HTTPResponseError.__new__(HTTPResponseError)
+    Exception.__init__(error, f"Request to Notion API failed with status: {status}")
+    error.code = "notionhq_client_response_error"
+    error.status = status
+    error.headers = headers or {}
+    error.body = ""
+    return error
+
+
+class _FakeLimiter:
+    def __init__(self) -> None:
+        self.acquired = 0
+        self.pauses: list[float] = []
+
+    def acquire(self) -> None:
+        self.acquired += 1
+
+    def pause(self, seconds: float) -> None:
+        self.pauses.append(seconds)
+
+
+class _Flaky:
+    """渡したエラーを順に送出し、尽きたら "ok" を返す API 呼び出し。"""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls: list[dict] = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def limiter(monkeypatch) -> _FakeLimiter:
+    fake = _FakeLimiter()
+    monkeypatch.setattr(notion_writer, "_rate_limiter", fake)
+    return fake
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list[float]:
+    slept: list[float] = []
+    monkeypatch.setattr(notion_writer.time, "sleep", slept.append)
+    return slept
+
+
+def test_call_pauses_all_senders_for_retry_after_on_429(limiter, sleeps):
+    fn = _Flaky(_http_error(429, {"Retry-After": "7"}))
+
+    assert notion_writer._call(fn, page_id="p") == "ok"
+    assert fn.calls == [{"page_id": "p"}, {"page_id": "p"}]
+    # 待つのはこのスレッドだけでなく、レートリミッターを共有する全体
+    assert limiter.pauses == [7.0]
+    assert sleeps == []
+    assert limiter.acquired == 2
+
+
+def test_call_backs_off_exponentially_on_429_without_retry_after(limiter, sleeps):
+    fn = _Flaky(_http_error(429), _http_error(429, {"Retry-After": "soon"}))
+
+    assert notion_writer._call(fn) == "ok"
+    assert limiter.pauses == [1.0, 2.0]
+
+
+def test_call_sleeps_without_pausing_on_5xx(limiter, sleeps):
+    fn = _Flaky(_http_error(503), _http_error(502, {"Retry-After": "3"}))
+
+    assert notion_writer._call(fn) == "ok"
+    assert sleeps == [1.0, 3.0]
+    assert limiter.pauses == []
+
+
+def test_call_retries_timeouts(limiter, sleeps):
+    fn = _Flaky(RequestTimeoutError(), RequestTimeoutError())
+
+    assert notion_writer._call(fn) == "ok"
+    assert sleeps == [1.0, 2.0]
+
+
+def test_call_does_not_retry_client_errors(limiter, sleeps):
+    fn = _Flaky(_http_error(400))
+
+    with pytest.raises(HTTPResponseError):
+        notion_writer._call(fn)
+    assert len(fn.calls) == 1
+    assert limiter.pauses == [] and sleeps == []
+
+
+def test_call_gives_up_after_max_retries(monkeypatch, limiter, sleeps):
+    monkeypatch.setattr(notion_writer, "NOTION_MAX_RETRIES", 2)
+    fn = _Flaky(*[_http_error(429, {"Retry-After": "1"}) for _ in range(5)])
+
+    with pytest.raises(HTTPResponseError):
+        notion_writer._call(fn)
+    assert len(fn.calls) == 3
+    assert limiter.acquired == 3
+
+
+def test_call_waits_for_retry_after_from_mock_notion(tmp_path, monkeypatch):
+    server, url = start_mock_notion(rate=1.0, burst=1.0)
+    try:
+        bucket = SharedTokenBucket(tmp_path / "state.sqlite3", "notion", rate=100.0)
+        monkeypatch.setattr(notion_writer, "_rate_limiter", bucket)
+        client = Client(auth="secret_dummy", base_url=url)
+        parent = {"database_id": "dummy"}
+
+        start = time.monotonic()
+        notion_writer._call(client.pages.create, parent=parent, properties={})
+        # 2件目は 429 + Retry-After: 1 を受け、1秒待ってから送り直す
+        notion_writer._call(client.pages.create, parent=parent, properties={})
+        assert time.monotonic() - start >= 1.0
+
+        stats = json.load(urllib.request.urlopen(f"{url}/__stats"))
+        assert stats["rate_limited"] == 1
+        assert stats["pages"] == 2
+    finally:
+        server.shutdown()
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    fake = _Clock()
+    monkeypatch.setattr(rate_limit.time, "time", fake.time)
+    monkeypatch.setattr(rate_limit.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_shared_bucket_budget_is_shared_between_instances(tmp_path, clock):
+    # 同じ DB を使う2つのインスタンス（= 2つのプロセス）
+    a = SharedTokenBucket(tmp_path / "state.sqlite3", "notion", rate=2.0, capacity=2.0)
+    b = SharedTokenBucket(tmp_path / "state.sqlite3", "notion", rate=2.0, capacity=2.0)
+
+    a.acquire()
+    a.acquire()
+    assert clock.sleeps == []
+    b.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_shared_bucket_pause_applies_to_other_instances(tmp_path, clock):
+    a = SharedTokenBucket(tmp_path / "state.sqlite3", "notion", rate=2.0, capacity=2.0)
+    b = SharedTokenBucket(tmp_path / "state.sqlite3", "notion", rate=2.0, capacity=2.0)
+    other = SharedTokenBucket(tmp_path / "state.sqlite3", "other", rate=2.0, capacity=2.0)
+
+    a.pause(3.0)
+    b.acquire()
+    # 残り 0 から -6 まで下がったトークンが 1 に戻るまで（7 / 2 秒）待つ
+    assert sum(clock.sleeps) == pytest.approx(3.5)
+    # 名前の違うバケットには影響しない
+    clock.sleeps.clear()
+    other.acquire()
+    assert clock.sleeps == []
+
+
+def test_shared_bucket_pauses_do_not_accumulate(tmp_path, clock):
+    a = SharedTokenBucket(tmp_path / "state.sqlite3", "notion", rate=2.0, capacity=2.0)
+    b = SharedTokenBucket(tmp_path / "state.sqlite3", "notion", rate=2.0, capacity=2.0)
+
+    # 同じ 429（Retry-After: 3）を2つのプロセスが受けても、待つのは 3 秒分だけ
+    a.pause(3.0)
+    b.pause(3.0)
+    # 短い指示は長い待ちを縮めない
+    b.pause(1.0)
+    a.acquire()
+    assert sum(clock.sleeps) == pytest.approx(3.5)
+
+
+_ACQUIRE = """
+import sys
+from pathlib import Path
+from teams_transcript_notion_sync.rate_limit import SharedTokenBucket
+
+bucket = SharedTokenBucket(Path(sys.argv[1]), "notion", rate=20.0, capacity=1.0)
+for _ in range(int(sys.argv[2])):
+    bucket.acquire()
+"""
+
+
+def test_shared_bucket_limits_the_total_rate_of_several_processes(tmp_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(Path(notion_writer.__file__).parents[1]), env.get("PYTHONPATH")) if p
+    )
+    db_path = tmp_path / "state.sqlite3"
+    # スキーマを先に作っておく
+    SharedTokenBucket(db_path, "warmup", rate=1.0).acquire()
+
+    start = time.monotonic()
+    procs = [
+        subprocess.Popen([sys.executable, "-c", _ACQUIRE, str(db_path), "10"], env=env)
+        for _ in range(3)
+    ]
+    assert all(p.wait(timeout=60) == 0 for p in procs)
+    elapsed = time.monotonic() - start
+
+    # 合計 30 件を 20 件/秒（最初の1件はバケットの残り）: プロセスごとの上限なら 0.45 秒で終わる
+    assert elapsed >= 29 / 20
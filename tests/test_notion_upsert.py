@@ -0,0 +1,141 @@
+# tests/test_notion_upsert.py
+"""
+notion_writer.upsert_page の差分更新（_reconcile_blocks）の確認。
+
+Notion API はメモリ上のフェイク（ページ直下のブロックの並びだけを持つ）で置き換える。
+"""
+
+from __future__ import annotations
+
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from teams_transcript_notion_sync import notion_writer
+
+
+class _FakeClient:
+    """notion_client.Client のうち upsert_page が使う API だけを持つフェイク。"""
+
+    def __init__(self) -> None:
+        self.page: list[tuple[str, dict]] = []  # ページ直下の (block_id, block)
+        self.calls: list[tuple[str, dict]] = []
+        self._ids = (f"block-{i}" for i in itertools.count())
+        self.pages = SimpleNamespace(create=self._create_page, update=self._update_page)
+        self.blocks = SimpleNamespace(
+            update=self._update,
+            delete=self._delete,
+            children=SimpleNamespace(append=self._append, list=self._list),
+        )
+
+    def _create_page(self, *, parent, properties, children):
+        self.page = [(next(self._ids), block) for block in children]
+        return {"id": "page"}
+
+    def _update_page(self, *, page_id, properties):
+        self.calls.append(("pages.update", {}))
+
+    def _append(self, *, block_id, children, after=None):
+        self.calls.append(("append", {"after": after, "count": len(children)}))
+        created = [(next(self._ids), block) for block in children]
+        ids = self.ids()
+        pos = ids.index(after) + 1 if after is not None else len(ids)
+        self.page[pos:pos] = created
+        return {"results": [{"id": block_id} for block_id, _ in created]}
+
+    def _list(self, *, block_id, page_size, start_cursor=None):
+        return {"results": [{"id": i} for i in self.ids()], "has_more": False}
+
+    def _update(self, *, block_id, **body):
+        self.calls.append(("update", {"block_id": block_id}))
+        ((btype, content),) = body.items()
+        self.page = [
+            (i, {"type": btype, btype: content} if i == block_id else b) for i, b in self.page
+        ]
+
+    def _delete(self, *, block_id):
+        self.calls.append(("delete", {"block_id": block_id}))
+        self.page = [(i, b) for i, b in self.page if i != block_id]
+
+    def ids(self) -> list[str]:
+        return [block_id for block_id, _ in self.page]
+
+    def contents(self) -> list[tuple[str, str]]:
+        return [(b["type"], b[b["type"]]["rich_text"][0]["text"]["content"]) for _, b in self.page]
+
+
+class _NoLimit:
+    def acquire(self) -> None:
+        pass
+
+    def pause(self, seconds: float) -> None:
+        pass
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch) -> _FakeClient:
+    fake = _FakeClient()
+    monkeypatch.setattr(notion_writer, "_get_client", lambda: fake)
+    monkeypatch.setattr(notion_writer, "_rate_limiter", _NoLimit())
+    monkeypatch.setattr(notion_writer, "PROCESSED_DB", tmp_path / "processed_files.sqlite3")
+    monkeypatch.setattr(notion_writer, "NOTION_SOURCE_KEY_PROPERTY", "")
+    return fake
+
+
+def _block(btype: str, text: str) -> dict:
+    return {"object": "block", "type": btype, btype: {"rich_text": [notion_writer._rich_text(text)]}}
+
+
+def _p(text: str) -> dict:
+    return _block("paragraph", text)
+
+
+def _upsert(blocks: list[dict]) -> str:
+    return notion_writer.upsert_page("meeting.mp4", {"database_id": "db"}, {}, blocks)
+
+
+def test_same_type_change_is_updated_in_place(client):
+    _upsert([_block("heading_2", "議題"), _p("案A"), _p("以上")])
+    ids = client.ids()
+
+    _upsert([_block("heading_2", "議題"), _p("案B"), _p("以上")])
+    assert client.calls == [("update", {"block_id": ids[1]})]
+    assert client.ids() == ids
+    assert client.contents()[1] == ("paragraph", "案B")
+
+
+def test_type_change_replaces_the_block(client):
+    _upsert([_p("議題"), _p("案A"), _p("以上")])
+    ids = client.ids()
+
+    _upsert([_p("議題"), _block("heading_3", "案A"), _p("以上")])
+    assert client.calls == [
+        ("delete", {"block_id": ids[1]}),
+        ("append", {"after": ids[0], "count": 1}),
+    ]
+    assert client.contents() == [("paragraph", "議題"), ("heading_3", "案A"), ("paragraph", "以上")]
+    assert client.ids()[0] == ids[0] and client.ids()[2] == ids[2]
+
+
+def test_extra_blocks_are_deleted(client):
+    _upsert([_p("1"), _p("2"), _p("3"), _p("4")])
+    ids = client.ids()
+
+    _upsert([_p("1"), _p("2")])
+    assert client.calls == [("delete", {"block_id": ids[2]}), ("delete", {"block_id": ids[3]})]
+    assert client.ids() == ids[:2]
+
+
+def test_missing_blocks_are_inserted_after_the_right_sibling(client):
+    _upsert([_p("1"), _p("2"), _p("4")])
+    ids = client.ids()
+
+    _upsert([_p("1"), _p("2"), _p("3"), _p("4")])
+    assert client.calls == [("append", {"after": ids[1], "count": 1})]
+    assert client.contents() == [("paragraph", t) for t in ("1", "2", "3", "4")]
+
+    # 変更がなければ書き込み API を呼ばない
+    client.calls.clear()
+    _upsert([_p("1"), _p("2"), _p("3"), _p("4")])
+    assert client.calls == []
@@ -0,0 +1,149 @@
+# tests/test_resume.py
+"""
+途中で失敗した会議を、次の `run` がチェックポイントから再開することの確認。
+
+ffmpeg / whisper.cpp / LLM / Notion は benchmarks/stubs のスタンドインを使い、
+CLI を別プロセスで実行する（設定は import 時の環境変数で決まるため）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = ROOT / "benchmarks"
+STUB_DIR = BENCH_DIR / "stubs"
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(STUB_DIR))
+
+from _common import make_fake_mp4  # noqa: E402
+from fake_llm import start_fake_llm  # noqa: E402
+from mock_notion import start_mock_notion  # noqa: E402
+
+
+@pytest.fixture
+def llm():
+    server, url = start_fake_llm(latency=0.0)
+    yield server, url
+    server.shutdown()
+
+
+@pytest.fixture
+def notion():
+    server, url = start_mock_notion(rate=100.0)
+    yield url
+    server.shutdown()
+
+
+def _env(base: Path, llm_url: str, notion_url: str, **overrides: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        APP_BASE_DIR=str(base),
+        ONEDRIVE_MEETINGS_DIR=str(base / "meetings"),
+        FFMPEG_BIN=str(STUB_DIR / "fake_ffmpeg.py"),
+        FFPROBE_BIN=str(STUB_DIR / "fake_ffprobe.py"),
+        WHISPER_BIN=str(STUB_DIR / "fake_whisper.py"),
+        WHISPER_BACKEND="subprocess",
+        WHISPER_MODEL=str(base / "ggml-dummy.bin"),
+        AUDIO_MODE="file",
+        BASE_URL=f"{llm_url}/v1",
+        API_KEY="dummy",
+        MODEL="dummy",
+        NOTION_TOKEN="secret_dummy",
+        NOTION_DATABASE_ID="dummy",
+        NOTION_BASE_URL=notion_url,
+        NOTION_OUTBOX_INTERVAL="0.2",
+        FILE_STABLE_SECONDS="0",
+        FAKE_WHISPER_RTF="0",
+        FAKE_WHISPER_LOAD_SECONDS="0",
+        METRICS_LOG=str(base / "metrics.jsonl"),
+        **overrides,
+    )
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(ROOT / "src"), os.environ.get("PYTHONPATH")) if p
+    )
+    return env
+
+
+def _run(env: dict) -> str:
+    cmd = [sys.executable, "-c", "from teams_transcript_notion_sync.cli import main; main()", "run"]
+    res = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True, timeout=120)
+    return res.stdout
+
+
+def _stages_run(metrics_log: Path) -> list[str]:
+    """計測ログから、実際に実行された（ok / error の）ステージを順に返す。"""
+    if not metrics_log.exists():
+        return []
+    events = [json.loads(line) for line in metrics_log.read_text().splitlines()]
+    return [e["stage"] for e in events if e["event"] == "stage"]
+
+
+def _first_failure(metrics_log: Path) -> str | None:
+    """計測ログから、最初に失敗したステージを返す。"""
+    events = [json.loads(line) for line in metrics_log.read_text().splitlines()]
+    return next(
+        (e["stage"] for e in events if e["event"] == "stage" and e["status"] == "error"), None
+    )
+
+
+def _meeting(base: Path) -> dict:
+    conn = sqlite3.connect(base / "data" / "processed_files.sqlite3")
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT status, attempts FROM processed_files").fetchone()
+    conn.close()
+    return dict(row)
+
+
+def test_run_resumes_failed_meeting_from_checkpoint(tmp_path, llm, notion):
+    llm_server, llm_url = llm
+    env = _env(tmp_path, llm_url, notion)
+    make_fake_mp4(tmp_path / "meetings" / "meeting.mp4", seconds=120)
+
+    # 1回目: 要約で失敗する
+    llm_server.RequestHandlerClass.state.fail_status = 400
+    _run(env)
+    assert _meeting(tmp_path) == {"status": "error", "attempts": 1}
+    first = _stages_run(tmp_path / "metrics.jsonl")
+    assert first[:3] == ["wav", "nosilence", "transcript"]
+    assert _first_failure(tmp_path / "metrics.jsonl") == "summary"
+
+    # 2回目: 録画は変わっていないが、失敗した会議なので選ばれ、要約から再開する
+    (tmp_path / "metrics.jsonl").unlink()
+    llm_server.RequestHandlerClass.state.fail_status = 0
+    out = _run(env)
+    assert out.count("Resuming meeting.mp4 after 'transcript'") == 1
+    assert _stages_run(tmp_path / "metrics.jsonl")[:2] == ["summary", "notion"]
+    assert not {"wav", "nosilence", "transcript"} & set(_stages_run(tmp_path / "metrics.jsonl"))
+    assert _meeting(tmp_path) == {"status": "done", "attempts": 0}
+
+    # 3回目: 完了した会議は選ばない
+    (tmp_path / "metrics.jsonl").unlink()
+    _run(env)
+    assert _stages_run(tmp_path / "metrics.jsonl") == []
+
+
+def test_run_stops_retrying_after_max_attempts(tmp_path, llm, notion):
+    llm_server, llm_url = llm
+    env = _env(tmp_path, llm_url, notion, MEETING_MAX_ATTEMPTS="2")
+    make_fake_mp4(tmp_path / "meetings" / "meeting.mp4", seconds=120)
+
+    llm_server.RequestHandlerClass.state.fail_status = 400
+    _run(env)
+    assert _first_failure(tmp_path / "metrics.jsonl") == "summary"
+    _run(env)
+    assert _meeting(tmp_path) == {"status": "error", "attempts": 2}
+
+    # 上限に達した会議は、録画が更新されるまで選ばない
+    (tmp_path / "metrics.jsonl").unlink()
+    llm_server.RequestHandlerClass.state.fail_status = 0
+    _run(env)
+    assert _stages_run(tmp_path / "metrics.jsonl") == []
+    assert _meeting(tmp_path)["status"] == "error"
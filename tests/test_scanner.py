@@ -0,0 +1,81 @@
+# tests/test_scanner.py
+"""
+差分スキャン（scanner.scan_mp4s）の確認。
+"""
+
+from __future__ import annotations
+
+import os
+
+from teams_transcript_notion_sync.scanner import scan_mp4s
+
+
+def _append(path, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def test_skipped_directory_still_sees_appended_files(tmp_path):
+    root = tmp_path / "meetings"
+    (root / "2024").mkdir(parents=True)
+    mp4 = root / "2024" / "meeting.mp4"
+    mp4.write_bytes(b"x" * 10)
+    index = tmp_path / "scan_index.json"
+
+    found, _ = scan_mp4s(root, index_path=index)
+    assert found[mp4][0] == 10
+
+    # 追記ではディレクトリの mtime は変わらない
+    dir_mtime = (root / "2024").stat().st_mtime_ns
+    _append(mp4, b"y" * 5)
+    os.utime(mp4, (1_700_000_100, 1_700_000_100))
+    assert (root / "2024").stat().st_mtime_ns == dir_mtime
+
+    found, stats = scan_mp4s(root, index_path=index)
+    assert stats.dirs_skipped == 2 and stats.dirs_scanned == 0
+    assert found[mp4] == [15, 1_700_000_100]
+
+
+def test_placeholder_is_reported_once_written(tmp_path):
+    root = tmp_path / "meetings"
+    root.mkdir()
+    mp4 = root / "meeting.mp4"
+    mp4.touch()
+    index = tmp_path / "scan_index.json"
+
+    found, _ = scan_mp4s(root, index_path=index)
+    assert mp4 not in found
+
+    _append(mp4, b"x" * 8)
+    found, stats = scan_mp4s(root, index_path=index)
+    assert stats.dirs_skipped == 1
+    assert found[mp4][0] == 8
+
+
+def test_file_appended_after_scan_waits_for_min_age(monkeypatch):
+    from teams_transcript_notion_sync import scanner
+    from teams_transcript_notion_sync.config import ONEDRIVE_MEETINGS_DIR
+
+    mp4 = ONEDRIVE_MEETINGS_DIR / "appending" / "meeting.mp4"
+    mp4.parent.mkdir(parents=True, exist_ok=True)
+    mp4.write_bytes(b"x" * 10)
+    start = 1_700_000_000.0
+    os.utime(mp4, (start, start))
+    monkeypatch.setattr(scanner.time, "time", lambda: start + 3)
+
+    # スキャンの直後に OneDrive が追記する（インデックスの mtime は古いまま）
+    scan = scanner.scan_mp4s
+
+    def scan_then_append(**kwargs):
+        result = scan(**kwargs)
+        _append(mp4, b"y" * 10)
+        os.utime(mp4, (start + 2.5, start + 2.5))
+        return result
+
+    monkeypatch.setattr(scanner, "scan_mp4s", scan_then_append)
+    assert mp4 not in scanner.find_new_mp4s(min_age=2.0)
+
+    # 書き込みが止まってから min_age 秒経てば処理する
+    monkeypatch.setattr(scanner, "scan_mp4s", scan)
+    monkeypatch.setattr(scanner.time, "time", lambda: start + 5)
+    assert mp4 in scanner.find_new_mp4s(min_age=2.0)
@@ -0,0 +1,112 @@
+# tests/test_silence.py
+"""
+無音の除去（silence.plan_cuts）と、時刻の対応表（OffsetMap.to_original / remap_file）の確認。
+
+100 秒の音声に、先頭 0-5、途中 20-30（切る）と 50-52（短いので残す）、末尾 90-100 の無音がある。
+前後 0.5 秒を残して切るので、残すのは [4.5, 20.5) と [29.5, 90.5)。
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from teams_transcript_notion_sync.silence import OffsetMap, plan_cuts, remap_file
+from teams_transcript_notion_sync.timestamps import format_line
+
+SILENCES = [(0.0, 5.0), (20.0, 30.0), (50.0, 52.0), (90.0, 100.0)]
+
+
+@pytest.fixture
+def offsets() -> OffsetMap:
+    return plan_cuts(SILENCES, 100.0, min_seconds=3.0, padding=0.5)
+
+
+def _kept(offsets: OffsetMap) -> list[tuple[float, float]]:
+    return [(round(start, 3), round(end, 3)) for start, end in offsets.kept]
+
+
+def _to_trimmed(offsets: OffsetMap, t: float) -> float:
+    """元の音声の時刻 t（残した区間の中）を、無音を切った後の時刻に変換する。"""
+    position = 0.0
+    for start, end in offsets.kept:
+        if start <= t < end:
+            return position + (t - start)
+        position += end - start
+    raise ValueError(f"{t} is inside a cut")
+
+
+def test_plan_cuts_keeps_padding_and_drops_edges(offsets):
+    assert _kept(offsets) == [(4.5, 20.5), (29.5, 90.5)]
+    assert offsets.kept_seconds == pytest.approx(77.0)
+    assert offsets.removed_seconds == pytest.approx(23.0)
+    assert offsets.cuts == 3
+
+
+@pytest.mark.parametrize(
+    ("silences", "kept"),
+    [
+        pytest.param([], [(0.0, 100.0)], id="no-silence"),
+        pytest.param([(40.0, 41.0)], [(0.0, 100.0)], id="too-short"),
+        pytest.param(
+            [(40.0, 43.6), (43.8, 50.0)],
+            [(0.0, 40.5), (43.1, 44.3), (49.5, 100.0)],
+            id="close-silences",
+        ),
+        pytest.param([(0.0, 100.0)], [], id="all-silence"),
+    ],
+)
+def test_plan_cuts_cases(silences, kept):
+    assert _kept(plan_cuts(silences, 100.0, min_seconds=3.0, padding=0.5)) == kept
+
+
+@pytest.mark.parametrize("t", [4.5, 10.0, 20.49, 29.5, 51.0, 90.4])
+def test_round_trip_original_to_trimmed_to_original(offsets, t):
+    assert offsets.to_original(_to_trimmed(offsets, t)) == pytest.approx(t)
+
+
+@pytest.mark.parametrize(
+    ("trimmed", "original"),
+    [
+        pytest.param(0.0, 4.5, id="start"),
+        pytest.param(15.999, 20.499, id="just-before-cut"),
+        # 切り口ちょうどは、切った後の区間の先頭に写す（切った無音の中には写さない）
+        pytest.param(16.0, 29.5, id="at-cut"),
+        pytest.param(77.0, 90.5, id="end"),
+        # whisper の end が音声の長さを少し越えても、そのまま伸ばす
+        pytest.param(77.5, 91.0, id="past-end"),
+    ],
+)
+def test_to_original_at_boundaries(offsets, trimmed, original):
+    assert offsets.to_original(trimmed) == pytest.approx(original)
+
+
+def test_to_original_never_lands_inside_a_cut(offsets):
+    mapped = [offsets.to_original(i / 100) for i in range(0, 7701)]
+    assert mapped == sorted(mapped)
+    assert not [t for t in mapped if t < 4.5 or 20.5 < t < 29.5]
+
+
+def test_to_original_without_kept_regions_is_identity():
+    assert OffsetMap(duration=10.0, kept=[]).to_original(3.2) == 3.2
+
+
+def test_remap_file_rewrites_timestamps_only(tmp_path, offsets):
+    txt = tmp_path / "meeting.txt"
+    txt.write_text(
+        "\n".join(
+            [
+                format_line(1.0, 3.0, "はじめます"),
+                "# タイムスタンプのない行",
+                # 切り口をまたぐ発言: 始まりは切る前、終わりは切った後の区間
+                format_line(15.0, 17.0, "予算の件ですが"),
+            ]
+        )
+        + "\n"
+    )
+
+    remap_file(txt, offsets)
+    assert txt.read_text().splitlines() == [
+        format_line(5.5, 7.5, "はじめます"),
+        "# タイムスタンプのない行",
+        format_line(19.5, 30.5, "予算の件ですが"),
+    ]
@@ -0,0 +1,85 @@
+# tests/test_transcribe_stitch.py
+"""
+分割並列文字起こし（transcribe.stitch_segments）のつなぎ目の確認。
+
+ウィンドウは plan_windows(100, 60, 10) = [(0, 60), (50, 100)]、切り替えはオーバーラップの中点 55 秒。
+チャンクの結果はウィンドウ内の相対時刻で書く。
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from teams_transcript_notion_sync.transcribe import (
+    _same_utterance,
+    plan_windows,
+    stitch_segments,
+)
+
+OVERLAP = 10.0
+WINDOWS = plan_windows(100.0, 60.0, OVERLAP)
+
+
+def test_plan_windows_overlap():
+    assert WINDOWS == [(0.0, 60.0), (50.0, 100.0)]
+
+
+@pytest.mark.parametrize(
+    ("chunks", "expected"),
+    [
+        pytest.param(
+            [
+                [(10.0, 12.0, "はじめます"), (54.8, 56.0, "次の議題です")],
+                [(5.1, 6.0, "次の議題です。"), (20.0, 22.0, "以上です")],
+            ],
+            [(10.0, 12.0, "はじめます"), (54.8, 56.0, "次の議題です。"), (70.0, 72.0, "以上です")],
+            id="duplicate-across-overlap",
+        ),
+        pytest.param(
+            [
+                [(53.0, 57.0, "予算の件ですが")],
+                [(3.0, 7.0, "予算の件ですが"), (8.0, 9.0, "承認します")],
+            ],
+            [(53.0, 57.0, "予算の件ですが"), (58.0, 59.0, "承認します")],
+            id="straddles-midpoint",
+        ),
+        pytest.param(
+            [
+                [(53.0, 57.0, "予算の件ですが")],
+                [(5.5, 7.0, "はい")],
+            ],
+            [(53.0, 57.0, "予算の件ですが"), (55.5, 57.0, "はい")],
+            id="different-utterances-near-midpoint",
+        ),
+        pytest.param(
+            [[(10.0, 12.0, "はじめます"), (56.0, 58.0, "後半は次のチャンク")], []],
+            [(10.0, 12.0, "はじめます")],
+            id="empty-last-chunk",
+        ),
+        pytest.param(
+            [[], [(4.0, 6.0, "前半のチャンク"), (10.0, 12.0, "再開します")]],
+            [(60.0, 62.0, "再開します")],
+            id="empty-first-chunk",
+        ),
+        pytest.param([[], []], [], id="all-empty"),
+    ],
+)
+def test_stitch_segments(chunks, expected):
+    assert stitch_segments(WINDOWS, chunks, OVERLAP) == expected
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "same"),
+    [
+        ("次の議題です", "次の議題です。", True),
+        ("次の 議題、です", "次の議題です", True),
+        ("予算の件ですが", "予算の件ですが承認します", True),
+        ("はい", "はい。", True),
+        ("はい", "はいそうです", False),  # 短い発話は部分一致でまとめない
+        ("予算の件", "日程の件", False),
+        ("", "。", True),
+        ("", "はい", False),
+    ],
+)
+def test_same_utterance(a, b, same):
+    assert _same_utterance(a, b) is same